@@ -1,11 +1,75 @@
-from . import datasets, transforms, samplers, tools
+from typing import List
+
+from . import datasets, transforms, samplers, tools, workers
 from .__version__ import __title__, __description__, __url__, __version__
 from .__version__ import __author__, __author_email__, __license__, __copyright__
 
-__all__ = ["get_video_backend", "datasets", "transforms", "samplers", "tools"]
+__all__ = [
+    "get_video_backend",
+    "set_video_backend",
+    "list_video_backends",
+    "get_decoder_threads",
+    "set_decoder_threads",
+    "datasets",
+    "transforms",
+    "samplers",
+    "tools",
+    "workers",
+]
 
 _video_backend = "lintel"
+_decoder_threads = 0
 
 
 def get_video_backend() -> str:
+    """Name of the decoder backend used to load videos when a dataset doesn't specify
+    its own backend."""
     return _video_backend
+
+
+def set_video_backend(backend: str) -> None:
+    """Set the decoder backend used to load videos.
+
+    Args:
+        backend: Name of a registered backend, one of :func:`list_video_backends`.
+
+    Raises:
+        ValueError: If ``backend`` is not a registered backend.
+    """
+    from .internal.readers import get_video_backend_info
+
+    global _video_backend
+    _video_backend = get_video_backend_info(backend).name
+
+
+def list_video_backends() -> List[str]:
+    """Names of the decoder backends whose dependencies are installed."""
+    from .internal.readers import available_video_backends
+
+    return available_video_backends()
+
+
+def get_decoder_threads() -> int:
+    """Number of threads each video decoder uses, ``0`` lets the decoder choose
+    (usually one per CPU)."""
+    return _decoder_threads
+
+
+def set_decoder_threads(threads: int) -> None:
+    """Set the number of threads each video decoder uses.
+
+    Decoders default to a thread per CPU, which oversubscribes the CPUs when many
+    :class:`~torch.utils.data.DataLoader` workers decode at once, see
+    :class:`~torchvideo.workers.WorkerBudget`. Backends that can't control their
+    thread count ignore it.
+
+    Args:
+        threads: Number of decoder threads, or ``0`` to let the decoder choose.
+
+    Raises:
+        ValueError: If ``threads`` is negative.
+    """
+    if threads < 0:
+        raise ValueError("threads must be non-negative, got {}".format(threads))
+    global _decoder_threads
+    _decoder_threads = threads
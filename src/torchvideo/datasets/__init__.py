@@ -1,6 +1,8 @@
 from .label_sets import *
 from .gulp_video_dataset import GulpVideoDataset
 from .image_folder_video_dataset import ImageFolderVideoDataset
+from .sliding_window_video_dataset import SlidingWindowVideoDataset, VideoWindow
+from .manifest import DatasetManifest, ManifestEntry, default_manifest_path
 from .video_dataset import VideoDataset
 from .video_folder_dataset import VideoFolderDataset, VideoRecordDataset, StaticFrameCounter
 from .video_collage_dataset import VideoCollageDataset
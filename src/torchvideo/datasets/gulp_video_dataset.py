@@ -1,16 +1,24 @@
-import numbers
+from functools import partial
+from itertools import repeat
 from pathlib import Path
-from typing import Union, Optional, Callable, Tuple, cast, List
+from typing import Union, Optional, Callable, Tuple, List, Iterator
 import torch
 
 import numpy as np
 from gulpio import GulpDirectory
 
+from ..internal.readers import (
+    FrameCache,
+    _reconstruct_frames,
+    _rgb_to_luma,
+    _split_clips,
+)
 from .label_sets import LabelSet, GulpLabelSet
+from .manifest import DatasetManifest, ManifestEntry, load_manifest, stat_entry
 from .video_dataset import VideoDataset
 from .types import NDArrayVideoTransform, empty_label, Label
-from .helpers import invoke_transform
-from ..samplers import FrameSampler, _default_sampler
+from .helpers import invoke_sample_transform
+from ..samplers import FrameSampler, IndexPlan, MultiClip, _default_sampler
 
 
 class GulpVideoDataset(VideoDataset):
@@ -37,6 +45,9 @@ class GulpVideoDataset(VideoDataset):
         label_set: Optional[LabelSet] = None,
         sampler: FrameSampler = _default_sampler(),
         transform: Optional[NDArrayVideoTransform] = None,
+        manifest: Optional[Union[str, Path, DatasetManifest]] = None,
+        frame_cache: Optional[FrameCache] = None,
+        grayscale: bool = False,
     ):
         """
         Args:
@@ -58,6 +69,19 @@ class GulpVideoDataset(VideoDataset):
                 you wish to create a custom label_set using the gulp_directory,
                 which you can then pass in with the gulp_directory itself to avoid
                 reading the gulp metadata twice.
+            manifest: Optional :class:`DatasetManifest`, or path to a saved manifest,
+                listing the video ids of the dataset, their frame counts and the
+                chunk file storing them. The gulp metadata isn't read until frames
+                are first loaded, unless a chunk has changed since the manifest was
+                built (its videos' frames are then recounted) or ``label_field`` is
+                given. Labels are taken from the manifest unless ``label_set`` or
+                ``label_field`` is given. Videos in chunks that no longer exist are
+                dropped.
+            frame_cache: Optional :class:`~torchvideo.internal.readers.FrameCache`
+                of decoded frames, only frames missing from the cache are read from
+                the gulp chunks and decoded.
+            grayscale: Whether to convert frames to single channel luma, giving a
+                ``(T, H, W, 1)`` array.
         """
 
         if transform is None:
@@ -71,60 +95,81 @@ class GulpVideoDataset(VideoDataset):
                     "Expected gulp_dir.output ({}) to be the same as "
                     "root_path ({})".format(gulp_directory.output_dir, root_path)
                 )
-            self.gulp_dir = gulp_directory
-        else:
-            self.gulp_dir = GulpDirectory(str(root_path))
+        self._gulp_dir = gulp_directory
 
-        label_set = self._get_label_set(self.gulp_dir, label_field, label_set)
         super().__init__(
-            root_path, label_set=label_set, sampler=sampler, transform=transform
+            root_path,
+            label_set=label_set,
+            sampler=sampler,
+            transform=transform,
+            frame_cache=frame_cache,
+            grayscale=grayscale,
         )
-        self._video_ids = self._get_video_ids(self.gulp_dir, filter)
-        self.labels = self._label_examples(self._video_ids, self.label_set)
+        if manifest is None or label_field is not None:
+            self.label_set = self._get_label_set(
+                self.gulp_dir, label_field, self.label_set
+            )
+        if manifest is not None:
+            manifest = load_manifest(
+                manifest, self.root_path, video_frame_counter=self._get_frame_count
+            )
+            if filter is not None:
+                manifest = manifest.subset(
+                    np.array(
+                        [filter(id_) for id_ in manifest.video_ids], dtype=np.bool_
+                    )
+                )
+            self._video_ids = manifest.video_ids.tolist()
+        else:
+            self._video_ids = self._get_video_ids(self.gulp_dir, filter)
+        self.manifest = manifest
+        if manifest is not None and self.label_set is None:
+            self.labels = manifest.labels
+        else:
+            self.labels = self._label_examples(self._video_ids, self.label_set)
+
+    @property
+    def gulp_dir(self) -> GulpDirectory:
+        """The :class:`GulpDirectory` of the dataset. Its metadata is read on first
+        use, so a dataset constructed from a manifest only reads it when frames are
+        loaded."""
+        if self._gulp_dir is None:
+            self._gulp_dir = GulpDirectory(str(self.root_path))
+        return self._gulp_dir
 
     @property
     def video_ids(self):
         return self._video_ids
 
+    @property
+    def video_lengths(self) -> List[int]:
+        """The number of frames of each video."""
+        if self.manifest is not None:
+            return self.manifest.frame_counts.tolist()
+        return [self._get_frame_count(id_) for id_ in self._video_ids]
+
     def __len__(self):
         return len(self._video_ids)
 
     def __getitem__(self, index) -> Union[torch.Tensor, Tuple[torch.Tensor, Label]]:
         id_ = self._video_ids[index]
-        frame_count = self._get_frame_count(id_)
-        frame_idx = self.sampler.sample(frame_count)
-        if isinstance(frame_idx, slice):
-            frames = self._load_frames(id_, frame_idx)
-        elif isinstance(frame_idx, list):
-            if isinstance(frame_idx[0], slice):
-                frame_idx = cast(List[slice], frame_idx)
-                frames = np.concatenate(
-                    [self._load_frames(id_, slice_) for slice_ in frame_idx]
-                )
-            elif isinstance(frame_idx[0], numbers.Number):
-                frames = np.concatenate(
-                    [
-                        self._load_frames(id_, slice(index, index + 1))
-                        for index in frame_idx
-                    ]
-                )
-            else:
-                raise TypeError(
-                    "frame_idx was a list of {} but we only support "
-                    "int and slice elements".format(type(frame_idx[0]).__name__)
-                )
+        if self.manifest is not None:
+            frame_count = int(self.manifest.frame_counts[index])
         else:
-            raise TypeError(
-                "frame_idx was of type {} but we only support slice, "
-                "List[slice], List[int]".format(type(frame_idx).__name__)
-            )
+            frame_count = self._get_frame_count(id_)
+        frame_idx = self._sample_frames(index, frame_count)
+        frames = self._load_planned_frames(id_, frame_idx)
+        if isinstance(frame_idx, MultiClip):
+            frames = _split_clips(frames, frame_idx, as_ndarray=True)
 
         if self.labels is not None:
             label = self.labels[index]
         else:
             label = empty_label
 
-        frames, label = invoke_transform(self.transform, frames, label)
+        frames, label = invoke_sample_transform(
+            self.transform, frames, label, frame_idx
+        )
 
         if label is not empty_label:
             return frames, label
@@ -159,9 +204,51 @@ class GulpVideoDataset(VideoDataset):
             label_set = GulpLabelSet(gulp_dir.merged_meta_dict, label_field=label_field)
         return label_set
 
+    def _manifest_entries(self, workers: int = 0) -> Iterator[ManifestEntry]:
+        labels = self.labels if self.labels is not None else repeat(None)
+        for id_, label in zip(self._video_ids, labels):
+            chunk_path = Path(self._get_chunk(id_).data_file_path)
+            yield stat_entry(
+                chunk_path,
+                id_,
+                str(chunk_path.relative_to(self.root_path)),
+                self._get_frame_count(id_),
+                label,
+            )
+
+    def _get_chunk(self, id_: str):
+        return self.gulp_dir.chunk_objs_lookup[self.gulp_dir.chunk_lookup[id_]]
+
     def _load_frames(self, id_: str, frame_idx: slice) -> np.ndarray:
         frames, _ = self.gulp_dir[id_, frame_idx]
-        return np.array(frames, dtype=np.uint8)
+        frames = np.array(frames, dtype=np.uint8)
+        if self.grayscale and frames.shape[-1] == 3:
+            frames = _rgb_to_luma(frames)
+        return frames
+
+    def _load_planned_frames(
+        self, id_: str, frame_idx: Union[IndexPlan, MultiClip]
+    ) -> np.ndarray:
+        plan = IndexPlan.from_frame_idx(frame_idx)
+        if self.frame_cache is None:
+            frames = self._read_runs(id_, plan.runs)
+        else:
+            frames = self.frame_cache.get_frames(
+                (str(self.root_path), id_, self.grayscale),
+                plan.load_idx,
+                partial(self._read_frames, id_),
+            )
+        return _reconstruct_frames(frames, plan.reconstruction_idx, as_ndarray=True)
+
+    def _read_frames(self, id_: str, frame_numbers: List[int]) -> np.ndarray:
+        return self._read_runs(id_, IndexPlan.from_frame_idx(frame_numbers).runs)
+
+    def _read_runs(self, id_: str, runs: np.ndarray) -> np.ndarray:
+        # Each run of consecutive frames is read in one go, and frames between runs
+        # aren't read at all
+        return np.concatenate(
+            [self._load_frames(id_, slice(start, stop)) for start, stop in runs]
+        )
 
     def _get_frame_count(self, id_: str):
         info = self.gulp_dir.merged_meta_dict[id_]
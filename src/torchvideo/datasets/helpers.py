@@ -1,3 +1,7 @@
+import numpy as np
+import torch
+
+from torchvideo.samplers import MultiClip
 from torchvideo.transforms.transforms.compose import _supports_target
 
 
@@ -5,3 +9,19 @@ def invoke_transform(transform, frames, label):
     if _supports_target(transform):
         return transform(frames, label)
     return transform(frames), label
+
+
+def invoke_sample_transform(transform, frames, label, frames_idx):
+    """Apply ``transform`` to a sample, transforming each clip of a
+    :class:`~torchvideo.samplers.MultiClip` sample separately and stacking the
+    results into a single :math:`(K, C, T, H, W)` tensor."""
+    if not isinstance(frames_idx, MultiClip):
+        return invoke_transform(transform, frames, label)
+    transformed = [invoke_transform(transform, clip, label) for clip in frames]
+    return stack_clips([clip for clip, _ in transformed]), transformed[-1][1]
+
+
+def stack_clips(clips):
+    if isinstance(clips[0], torch.Tensor):
+        return torch.stack(clips)
+    return np.stack(clips)
@@ -1,3 +1,7 @@
+from functools import partial
+from itertools import repeat
+
+import numpy as np
 import torch
 from pathlib import Path
 from typing import Union, Optional, Callable, Tuple, List, Iterator
@@ -5,12 +9,28 @@ from typing import Union, Optional, Callable, Tuple, List, Iterator
 import PIL.Image
 from PIL.Image import Image
 
-from torchvideo.samplers import FrameSampler, frame_idx_to_list, _default_sampler
-from torchvideo.transforms import PILVideoToTensor
+from torchvideo.internal.probing import count_frames, probe_videos
+from torchvideo.samplers import (
+    FrameSampler,
+    IndexPlan,
+    MultiClip,
+    frame_idx_to_list,
+    _default_sampler,
+)
+from torchvideo.internal.readers import (
+    FrameCache,
+    FrameSize,
+    _reconstruct_frames,
+    _resize_frame,
+    _scaled_size,
+    _split_clips,
+)
+from torchvideo.transforms import NDArrayVideoToTensor, PILVideoToTensor
 from .video_dataset import VideoDataset
 from .types import Label, empty_label, PILVideoTransform
-from .helpers import invoke_transform
+from .helpers import invoke_sample_transform
 from .label_sets import LabelSet
+from .manifest import DatasetManifest, ManifestEntry, load_manifest, stat_entry
 
 
 class ImageFolderVideoDataset(VideoDataset):
@@ -41,6 +61,14 @@ class ImageFolderVideoDataset(VideoDataset):
         sampler: FrameSampler = _default_sampler(),
         transform: Optional[PILVideoTransform] = None,
         frame_counter: Optional[Callable[[Path], int]] = None,
+        frame_counter_workers: int = 0,
+        frame_counter_processes: bool = False,
+        manifest: Optional[Union[str, Path, DatasetManifest]] = None,
+        update_manifest: bool = False,
+        as_ndarray: bool = False,
+        frame_size: Optional[FrameSize] = None,
+        frame_cache: Optional[FrameCache] = None,
+        grayscale: bool = False,
     ):
         """
 
@@ -61,18 +89,93 @@ class ImageFolderVideoDataset(VideoDataset):
                 folder and should return a positive integer representing the number of
                 frames. This tends to be useful if you've precomputed the number of
                 frames in a dataset.
+            frame_counter_workers: Number of threads used to count the frames of the
+                videos, ``0`` counts them serially. Progress is logged at ``INFO``
+                level and videos that can't be counted are reported together in a
+                :class:`~torchvideo.internal.probing.FrameCountError`.
+            frame_counter_processes: Count frames with a pool of
+                ``frame_counter_workers`` processes instead of threads, in which case
+                ``frame_counter`` must be picklable.
+            manifest: Optional :class:`DatasetManifest`, or path to a saved manifest,
+                listing the video folders in ``root_path`` and their frame counts. The
+                folder is not scanned and frames are only counted for video folders
+                that have changed since the manifest was built. Labels are taken from
+                the manifest unless ``label_set`` is given.
+            update_manifest: Whether to pick up video folders added to ``root_path``
+                since the manifest was built, see :meth:`DatasetManifest.update`. The
+                folder is only listed if its modification time has changed and only
+                new video folders are probed. A manifest loaded from a path is saved
+                back.
+            as_ndarray: Whether to load frames into a contiguous ``(T, H, W, C)``
+                uint8 :class:`numpy.ndarray` rather than returning PIL images. The
+                array is handed to ``transform`` (by default
+                :class:`NDArrayVideoToTensor`).
+            frame_size: Optional size to load frames at, either the maximum length of
+                the shorter side of each frame (frames are never upscaled) or an
+                exact ``(height, width)``. JPEG frames are decoded at a reduced
+                scale by libjpeg before being resized.
+            frame_cache: Optional :class:`~torchvideo.internal.readers.FrameCache`
+                of loaded frames, only frames missing from the cache are read from
+                disk and decoded.
+            grayscale: Whether to load single channel luma frames, as mode ``"L"``
+                images or a ``(T, H, W, 1)`` array. Only the luma channel of JPEG
+                frames is decoded.
         """
-        super().__init__(root_path, label_set, sampler=sampler, transform=transform)
-        self._video_dirs = sorted(
-            [d for d in self.root_path.iterdir() if filter is None or filter(d)]
-        )
-        self.labels = self._label_examples(self._video_dirs, label_set)
-        self.video_lengths = self._measure_video_lengths(
-            self._video_dirs, frame_counter
+        super().__init__(
+            root_path,
+            label_set,
+            sampler=sampler,
+            transform=transform,
+            as_ndarray=as_ndarray,
+            frame_size=frame_size,
+            frame_cache=frame_cache,
+            grayscale=grayscale,
         )
         self.filename_template = filename_template
+        if manifest is not None:
+            if frame_counter is None:
+                frame_counter = _count_frame_files
+            update = None
+            if update_manifest:
+                update = partial(
+                    DatasetManifest.update,
+                    root=self.root_path,
+                    is_video=lambda path: path.is_dir()
+                    and (filter is None or filter(path)),
+                    probe=partial(self._probe_manifest_entry, frame_counter),
+                    workers=frame_counter_workers,
+                )
+            manifest = load_manifest(manifest, self.root_path, frame_counter, update)
+            if filter is not None:
+                manifest = manifest.subset(
+                    np.array(
+                        [filter(self.root_path / path) for path in manifest.paths],
+                        dtype=np.bool_,
+                    )
+                )
+            self._video_dirs = [self.root_path / path for path in manifest.paths]
+            if label_set is None:
+                self.labels = manifest.labels
+            else:
+                self.labels = self._label_examples(self._video_dirs, label_set)
+            self.video_lengths = manifest.frame_counts.tolist()
+        else:
+            self._video_dirs = sorted(
+                [d for d in self.root_path.iterdir() if filter is None or filter(d)]
+            )
+            self.labels = self._label_examples(self._video_dirs, label_set)
+            self.video_lengths = self._measure_video_lengths(
+                self._video_dirs,
+                frame_counter,
+                workers=frame_counter_workers,
+                use_processes=frame_counter_processes,
+            )
+        self.manifest = manifest
         if self.transform is None:
-            self.transform = PILVideoToTensor()
+            if as_ndarray:
+                self.transform = NDArrayVideoToTensor()
+            else:
+                self.transform = PILVideoToTensor()
 
     @property
     def video_ids(self):
@@ -86,14 +189,16 @@ class ImageFolderVideoDataset(VideoDataset):
     ) -> Union[torch.Tensor, Tuple[torch.Tensor, Label]]:
         video_folder = self._video_dirs[index]
         video_length = self.video_lengths[index]
-        frames_idx = self.sampler.sample(video_length)
+        frames_idx = self._sample_frames(index, video_length)
         frames = self._load_frames(frames_idx, video_folder)
         if self.labels is not None:
             label = self.labels[index]
         else:
             label = empty_label
 
-        frames_tensor, label = invoke_transform(self.transform, frames, label)
+        frames_tensor, label = invoke_sample_transform(
+            self.transform, frames, label, frames_idx
+        )
 
         if label == empty_label:
             return frames_tensor
@@ -101,12 +206,16 @@ class ImageFolderVideoDataset(VideoDataset):
 
     @staticmethod
     def _measure_video_lengths(
-        video_dirs, frame_counter: Optional[Callable[[Path], int]]
+        video_dirs,
+        frame_counter: Optional[Callable[[Path], int]],
+        workers: int = 0,
+        use_processes: bool = False,
     ):
         if frame_counter is None:
-            return [len(list(video_dir.iterdir())) for video_dir in video_dirs]
-        else:
-            return [frame_counter(video_dir) for video_dir in video_dirs]
+            frame_counter = _count_frame_files
+        return count_frames(
+            video_dirs, frame_counter, workers=workers, use_processes=use_processes
+        )
 
     @staticmethod
     def _label_examples(video_dirs, label_set: Optional[LabelSet]):
@@ -115,9 +224,57 @@ class ImageFolderVideoDataset(VideoDataset):
         else:
             return None
 
+    def _manifest_entries(self, workers: int = 0) -> Iterator[ManifestEntry]:
+        first_frames = [
+            video_dir / self.filename_template.format(1)
+            for video_dir in self._video_dirs
+        ]
+        sizes = probe_videos(first_frames, _get_image_size, workers=workers)
+        labels = self.labels if self.labels is not None else repeat(None)
+        for video_dir, video_length, label, size in zip(
+            self._video_dirs, self.video_lengths, labels, sizes
+        ):
+            width, height = size if size is not None else (-1, -1)
+            yield stat_entry(
+                video_dir,
+                video_dir.name,
+                video_dir.name,
+                video_length,
+                label,
+                height=height,
+                width=width,
+            )
+
+    def _probe_manifest_entry(
+        self, frame_counter: Callable[[Path], int], video_dir: Path, relative_path: str
+    ) -> ManifestEntry:
+        label = None
+        if self.label_set is not None:
+            label = self.label_set[video_dir.name]
+        width, height = _get_image_size(video_dir / self.filename_template.format(1))
+        return stat_entry(
+            video_dir,
+            video_dir.name,
+            relative_path,
+            frame_counter(video_dir),
+            label,
+            height=height,
+            width=width,
+        )
+
     def _load_frames(
-        self, frames_idx: Union[slice, List[slice], List[int]], video_folder: Path
-    ) -> Iterator[Image]:
+        self,
+        frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+        video_folder: Path,
+    ) -> Union[Iterator[Image], np.ndarray]:
+        if isinstance(frames_idx, MultiClip):
+            # Images shared by several clips are only loaded once
+            frames = self._load_frames_ndarray(
+                frames_idx, video_folder, as_ndarray=True
+            )
+            return _split_clips(frames, frames_idx, self.as_ndarray)
+        if self.as_ndarray or self.frame_cache is not None:
+            return self._load_frames_ndarray(frames_idx, video_folder)
         frame_numbers = frame_idx_to_list(frames_idx)
         filepaths = [
             video_folder / self.filename_template.format(index + 1)
@@ -127,7 +284,72 @@ class ImageFolderVideoDataset(VideoDataset):
         # shape: (n_frames, height, width, channels)
         return frames
 
+    def _load_frames_ndarray(
+        self,
+        frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+        video_folder: Path,
+        as_ndarray: Optional[bool] = None,
+    ) -> Union[Iterator[Image], np.ndarray]:
+        # Each image is decoded once, even if it is requested multiple times
+        plan = IndexPlan.from_frame_idx(frames_idx)
+        if self.frame_cache is None:
+            frames = self._read_images(video_folder, plan.load_idx.tolist())
+        else:
+            frames = self.frame_cache.get_frames(
+                (str(video_folder), self.frame_size, self.grayscale),
+                plan.load_idx,
+                partial(self._read_images, video_folder),
+            )
+        if as_ndarray is None:
+            as_ndarray = self.as_ndarray
+        return _reconstruct_frames(
+            frames, plan.reconstruction_idx, as_ndarray=as_ndarray
+        )
+
+    def _read_images(self, video_folder: Path, frame_numbers: List[int]) -> np.ndarray:
+        if not frame_numbers:
+            raise ValueError("No frames to read from {}".format(video_folder))
+        frames = None
+        for i, index in enumerate(frame_numbers):
+            path = video_folder / self.filename_template.format(index + 1)
+            with self._load_image(path) as image:
+                frame = np.asarray(image)
+            if frames is None:
+                frames = np.empty(
+                    (len(frame_numbers),) + frame.shape, dtype=frame.dtype
+                )
+            frames[i] = frame
+        if self.grayscale:
+            frames = frames[..., np.newaxis]
+        return frames
+
     def _load_image(self, path: Path) -> Image:
         if not path.exists():
             raise ValueError("Image path {} does not exist".format(path))
-        return PIL.Image.open(str(path))
+        image = PIL.Image.open(str(path))
+        mode = "L" if self.grayscale else "RGB"
+        height, width = image.height, image.width
+        if self.frame_size is not None:
+            height, width = _scaled_size(height, width, self.frame_size)
+        if self.frame_size is not None or self.grayscale:
+            # Let JPEG images decode only the channels needed and at the smallest
+            # DCT scale at least as large as the target size, a no-op for other
+            # formats.
+            image.draft(mode, (width, height))
+        # Palette, RGBA, CMYK, etc. images are converted so that every frame has
+        # the same number of channels
+        if image.mode != mode:
+            image = image.convert(mode)
+        if self.frame_size is not None:
+            image = _resize_frame(image, (height, width))
+        return image
+
+
+def _count_frame_files(video_dir: Path) -> int:
+    return len(list(video_dir.iterdir()))
+
+
+def _get_image_size(path: Path) -> Tuple[int, int]:
+    # Opening an image only reads its header, so this doesn't decode the image
+    with PIL.Image.open(str(path)) as image:
+        return image.size
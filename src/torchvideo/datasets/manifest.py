@@ -0,0 +1,551 @@
+import logging
+import os
+from collections import OrderedDict, namedtuple
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Sequence, Union
+
+import numpy as np
+
+from torchvideo.internal.probing import probe_videos
+
+_LOG = logging.getLogger(__name__)
+
+#: Filename of a dataset manifest within the dataset root, see
+#: :func:`default_manifest_path`.
+MANIFEST_FILENAME = "torchvideo_manifest.npz"
+_MANIFEST_VERSION = 1
+
+ManifestEntry = namedtuple(
+    "ManifestEntry",
+    (
+        "video_id",
+        "path",
+        "frame_count",
+        "height",
+        "width",
+        "fps",
+        "size",
+        "mtime_ns",
+        "label",
+    ),
+)
+"""A single video of a :class:`DatasetManifest`. ``path`` is relative to the dataset
+root, unknown resolutions are ``-1``, an unknown frame rate is ``nan`` and an unknown
+label is ``None``."""
+
+
+def default_manifest_path(root: Union[str, Path]) -> Path:
+    """Path of the manifest of the dataset stored at ``root``."""
+    return Path(root) / MANIFEST_FILENAME
+
+
+class DatasetManifest:
+    """Compact description of every video in a dataset, stored as columnar arrays so
+    that datasets can be constructed without scanning and probing videos.
+
+    Build a manifest from a constructed dataset with :meth:`from_dataset`, save it
+    with :meth:`save` and pass the path (or the manifest itself) to the ``manifest``
+    argument of :class:`VideoFolderDataset`, :class:`ImageFolderVideoDataset`,
+    :class:`GulpVideoDataset` or :class:`VideoRecordDataset`.
+
+    Each video's size and modification time are recorded, datasets recount the frames
+    of any video that has changed since the manifest was built and drop videos that
+    no longer exist (see :meth:`validate`). The modification times of the directories
+    holding the videos are recorded too, so that videos added to the dataset can be
+    picked up by listing only the directories that have changed (see :meth:`update`).
+    """
+
+    def __init__(
+        self,
+        video_ids: np.ndarray,
+        paths: np.ndarray,
+        frame_counts: np.ndarray,
+        heights: np.ndarray,
+        widths: np.ndarray,
+        fps: np.ndarray,
+        sizes: np.ndarray,
+        mtimes_ns: np.ndarray,
+        label_idx: np.ndarray,
+        label_names: np.ndarray,
+        dir_paths: Optional[np.ndarray] = None,
+        dir_mtimes_ns: Optional[np.ndarray] = None,
+    ) -> None:
+        self.video_ids = np.asarray(video_ids, dtype=np.str_)
+        self.paths = np.asarray(paths, dtype=np.str_)
+        self.frame_counts = np.asarray(frame_counts, dtype=np.int64)
+        self.heights = np.asarray(heights, dtype=np.int32)
+        self.widths = np.asarray(widths, dtype=np.int32)
+        self.fps = np.asarray(fps, dtype=np.float64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+        self.mtimes_ns = np.asarray(mtimes_ns, dtype=np.int64)
+        self.label_idx = np.asarray(label_idx, dtype=np.int64)
+        self.label_names = np.asarray(label_names)
+        self.dir_paths = np.asarray(
+            dir_paths if dir_paths is not None else [], dtype=np.str_
+        )
+        self.dir_mtimes_ns = np.asarray(
+            dir_mtimes_ns if dir_mtimes_ns is not None else [], dtype=np.int64
+        )
+
+    @classmethod
+    def from_entries(
+        cls,
+        entries: Iterable[ManifestEntry],
+        dir_mtimes_ns: Optional[Dict[str, int]] = None,
+    ) -> "DatasetManifest":
+        entries = list(entries)
+        label_lookup = OrderedDict()  # type: OrderedDict
+        for entry in entries:
+            if entry.label is None:
+                continue
+            if not isinstance(entry.label, (str, int, np.integer)):
+                raise ValueError(
+                    "Only str and int labels can be stored in a manifest, "
+                    "but got {!r}".format(entry.label)
+                )
+            if entry.label not in label_lookup:
+                label_lookup[entry.label] = len(label_lookup)
+        columns = list(zip(*entries)) if entries else [()] * len(ManifestEntry._fields)
+        entry_columns = ManifestEntry(*columns)
+        if dir_mtimes_ns is None:
+            dir_mtimes_ns = {}
+        return cls(
+            video_ids=np.array(entry_columns.video_id, dtype=np.str_),
+            paths=np.array(entry_columns.path, dtype=np.str_),
+            frame_counts=np.array(entry_columns.frame_count, dtype=np.int64),
+            heights=np.array(entry_columns.height, dtype=np.int32),
+            widths=np.array(entry_columns.width, dtype=np.int32),
+            fps=np.array(entry_columns.fps, dtype=np.float64),
+            sizes=np.array(entry_columns.size, dtype=np.int64),
+            mtimes_ns=np.array(entry_columns.mtime_ns, dtype=np.int64),
+            label_idx=np.array(
+                [label_lookup.get(label, -1) for label in entry_columns.label],
+                dtype=np.int64,
+            ),
+            label_names=np.array(list(label_lookup.keys())),
+            dir_paths=np.array(list(dir_mtimes_ns.keys()), dtype=np.str_),
+            dir_mtimes_ns=np.array(list(dir_mtimes_ns.values()), dtype=np.int64),
+        )
+
+    @classmethod
+    def from_dataset(cls, dataset, workers: int = 0) -> "DatasetManifest":
+        """Build a manifest describing every video in ``dataset``.
+
+        Args:
+            dataset: A :class:`VideoFolderDataset`, :class:`ImageFolderVideoDataset`,
+                :class:`GulpVideoDataset` or :class:`VideoRecordDataset`.
+            workers: Number of threads used to probe the resolution and frame rate of
+                the videos.
+        """
+        entries = list(dataset._manifest_entries(workers))
+        return cls.from_entries(
+            entries,
+            _stat_dirs(Path(dataset.root), _parent_dirs(e.path for e in entries)),
+        )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "DatasetManifest":
+        with np.load(str(path), allow_pickle=False) as data:
+            version = int(data["version"])
+            if version != _MANIFEST_VERSION:
+                raise ValueError(
+                    "Unsupported manifest version {} in {}".format(version, path)
+                )
+            return cls(
+                video_ids=data["video_ids"],
+                paths=data["paths"],
+                frame_counts=data["frame_counts"],
+                heights=data["heights"],
+                widths=data["widths"],
+                fps=data["fps"],
+                sizes=data["sizes"],
+                mtimes_ns=data["mtimes_ns"],
+                label_idx=data["label_idx"],
+                label_names=data["label_names"],
+                dir_paths=data["dir_paths"] if "dir_paths" in data else None,
+                dir_mtimes_ns=(
+                    data["dir_mtimes_ns"] if "dir_mtimes_ns" in data else None
+                ),
+            )
+
+    def save(self, path: Union[str, Path]) -> None:
+        # Write to a temporary file first so that readers never see a partial
+        # manifest
+        path = Path(path)
+        tmp_path = path.with_name(path.name + ".tmp")
+        with tmp_path.open("wb") as f:
+            np.savez(
+                f,
+                version=_MANIFEST_VERSION,
+                video_ids=self.video_ids,
+                paths=self.paths,
+                frame_counts=self.frame_counts,
+                heights=self.heights,
+                widths=self.widths,
+                fps=self.fps,
+                sizes=self.sizes,
+                mtimes_ns=self.mtimes_ns,
+                label_idx=self.label_idx,
+                label_names=self.label_names,
+                dir_paths=self.dir_paths,
+                dir_mtimes_ns=self.dir_mtimes_ns,
+            )
+        os.replace(str(tmp_path), str(path))
+
+    def __len__(self) -> int:
+        return len(self.video_ids)
+
+    def __getitem__(self, index: int) -> ManifestEntry:
+        label_idx = self.label_idx[index]
+        return ManifestEntry(
+            video_id=str(self.video_ids[index]),
+            path=str(self.paths[index]),
+            frame_count=int(self.frame_counts[index]),
+            height=int(self.heights[index]),
+            width=int(self.widths[index]),
+            fps=float(self.fps[index]),
+            size=int(self.sizes[index]),
+            mtime_ns=int(self.mtimes_ns[index]),
+            label=None if label_idx < 0 else self.label_names[label_idx].item(),
+        )
+
+    @property
+    def labels(self) -> Optional[List[Any]]:
+        """The label of each video, or ``None`` if the manifest has no labels."""
+        if len(self.label_names) == 0:
+            return None
+        return [
+            None if idx < 0 else self.label_names[idx].item() for idx in self.label_idx
+        ]
+
+    def subset(self, indices: Union[Sequence[int], np.ndarray]) -> "DatasetManifest":
+        """Manifest of the videos at ``indices`` (or where a boolean mask is set)."""
+        indices = np.asarray(indices)
+        if len(indices) == 0:
+            indices = indices.astype(np.intp)
+        return DatasetManifest(
+            video_ids=self.video_ids[indices],
+            paths=self.paths[indices],
+            frame_counts=self.frame_counts[indices],
+            heights=self.heights[indices],
+            widths=self.widths[indices],
+            fps=self.fps[indices],
+            sizes=self.sizes[indices],
+            mtimes_ns=self.mtimes_ns[indices],
+            label_idx=self.label_idx[indices],
+            label_names=self.label_names,
+            dir_paths=self.dir_paths,
+            dir_mtimes_ns=self.dir_mtimes_ns,
+        )
+
+    def validate(
+        self,
+        root: Union[str, Path],
+        frame_counter: Optional[Callable[[Path], int]] = None,
+        video_frame_counter: Optional[Callable[[str], int]] = None,
+    ) -> "DatasetManifest":
+        """Bring the manifest up to date with the files under ``root``.
+
+        Videos that no longer exist are dropped and videos whose size or modification
+        time differ from the manifest have their frames recounted (if a counter is
+        given). Each file is only checked once, however many videos it stores. Videos
+        added since the manifest was built are not picked up, use :meth:`update` for
+        that.
+
+        Args:
+            root: Root directory of the dataset.
+            frame_counter: Used to recount the frames of a modified video given its
+                path.
+            video_frame_counter: Used to recount the frames of a modified video given
+                its id, for datasets storing several videos per file. Takes
+                precedence over ``frame_counter``.
+
+        Returns:
+            The validated manifest, ``self`` if nothing changed.
+        """
+        root = Path(root)
+        if self._changed_dirs(root):
+            _LOG.info(
+                "{} has changed since its manifest was built, videos added since "
+                "then are not included".format(root)
+            )
+        exists = np.ones(len(self), dtype=np.bool_)
+        sizes = self.sizes.copy()
+        mtimes_ns = self.mtimes_ns.copy()
+        stats = {}  # type: Dict[str, Optional[os.stat_result]]
+        for i, path in enumerate(self.paths.tolist()):
+            if path not in stats:
+                try:
+                    stats[path] = os.stat(str(root / path))
+                except OSError:
+                    stats[path] = None
+            stat = stats[path]
+            if stat is None:
+                exists[i] = False
+                continue
+            sizes[i] = stat.st_size
+            mtimes_ns[i] = stat.st_mtime_ns
+        stale = exists & ((sizes != self.sizes) | (mtimes_ns != self.mtimes_ns))
+        if exists.all() and not stale.any():
+            return self
+        if not exists.all():
+            _LOG.warning(
+                "Dropping {} videos from the manifest that no longer exist".format(
+                    int((~exists).sum())
+                )
+            )
+        frame_counts = self.frame_counts.copy()
+        if video_frame_counter is not None or frame_counter is not None:
+            for i in np.flatnonzero(stale):
+                _LOG.info("Recounting frames of modified {}".format(self.paths[i]))
+                if video_frame_counter is not None:
+                    frame_counts[i] = video_frame_counter(str(self.video_ids[i]))
+                else:
+                    frame_counts[i] = frame_counter(root / str(self.paths[i]))
+        validated = DatasetManifest(
+            video_ids=self.video_ids,
+            paths=self.paths,
+            frame_counts=frame_counts,
+            heights=self.heights,
+            widths=self.widths,
+            fps=self.fps,
+            sizes=sizes,
+            mtimes_ns=mtimes_ns,
+            label_idx=self.label_idx,
+            label_names=self.label_names,
+            dir_paths=self.dir_paths,
+            dir_mtimes_ns=self.dir_mtimes_ns,
+        )
+        return validated.subset(exists)
+
+    def update(
+        self,
+        root: Union[str, Path],
+        is_video: Callable[[Path], bool],
+        probe: Callable[[Path, str], ManifestEntry],
+        recursive: bool = False,
+        check_modified: bool = False,
+        workers: int = 0,
+    ) -> "DatasetManifest":
+        """Incrementally bring the manifest up to date with videos added to, removed
+        from, or modified in ``root``.
+
+        Only directories whose modification time has changed since the manifest was
+        built (and directories that didn't exist then) are listed, and only the new or
+        modified videos found in them are probed. Videos in unchanged directories are
+        kept as they are unless ``check_modified`` is set.
+
+        Args:
+            root: Root directory of the dataset.
+            is_video: Predicate deciding whether a directory entry is a video of the
+                dataset.
+            probe: Callable producing the manifest entry of a video given its path and
+                its path relative to ``root``.
+            recursive: Whether to descend into subdirectories that aren't videos.
+            check_modified: Whether to also check the size and modification time of
+                videos in unchanged directories.
+            workers: Number of threads to probe new videos with.
+
+        Returns:
+            The updated manifest, ``self`` if nothing changed.
+        """
+        root = Path(root)
+        recorded_dirs = dict(zip(self.dir_paths.tolist(), self.dir_mtimes_ns.tolist()))
+        current_dirs = _stat_dirs(root, recorded_dirs.keys())
+        to_list = self._changed_dirs(root, current_dirs)
+        if "." not in recorded_dirs:
+            to_list.append(".")
+            current_dirs.update(_stat_dirs(root, ["."]))
+        listed_dirs = set()
+        found = set()
+        while to_list:
+            relative_dir = to_list.pop()
+            listed_dirs.add(relative_dir)
+            for child in (root / relative_dir).iterdir():
+                relative_path = _relative_path(child, root)
+                if is_video(child):
+                    found.add(relative_path)
+                elif (
+                    recursive and relative_path not in recorded_dirs and child.is_dir()
+                ):
+                    current_dirs.update(_stat_dirs(root, [relative_path]))
+                    to_list.append(relative_path)
+
+        paths = self.paths.tolist()
+        parents = [_parent_dir(path) for path in paths]
+        keep = np.array(
+            [
+                (parent in current_dirs or parent not in recorded_dirs)
+                and (parent not in listed_dirs or path in found)
+                for path, parent in zip(paths, parents)
+            ],
+            dtype=np.bool_,
+        )
+        to_probe = sorted(found.difference(paths))
+        if check_modified or listed_dirs:
+            for i in np.flatnonzero(keep):
+                if check_modified or parents[i] in listed_dirs:
+                    if self._is_modified(root, i):
+                        keep[i] = False
+                        to_probe.append(paths[i])
+        if keep.all() and not to_probe and current_dirs == recorded_dirs:
+            return self
+
+        _LOG.info(
+            "Probing {} new or modified videos in {} changed directories".format(
+                len(to_probe), len(listed_dirs)
+            )
+        )
+        probed = probe_videos(
+            [root / path for path in to_probe],
+            lambda path: probe(path, _relative_path(path, root)),
+            workers=workers,
+        )
+        added = DatasetManifest.from_entries(
+            [entry for entry in probed if entry is not None]
+        )
+        updated = self.subset(keep)._concatenate(added)
+        updated = updated.subset(np.argsort(updated.paths, kind="stable"))
+        updated.dir_paths = np.array(list(current_dirs.keys()), dtype=np.str_)
+        updated.dir_mtimes_ns = np.array(list(current_dirs.values()), dtype=np.int64)
+        return updated
+
+    def _changed_dirs(
+        self, root: Path, current_dirs: Optional[Dict[str, int]] = None
+    ) -> List[str]:
+        if current_dirs is None:
+            current_dirs = _stat_dirs(root, self.dir_paths.tolist())
+        return [
+            path
+            for path, mtime_ns in zip(self.dir_paths.tolist(), self.dir_mtimes_ns)
+            if path in current_dirs and current_dirs[path] != mtime_ns
+        ]
+
+    def _is_modified(self, root: Path, index: int) -> bool:
+        try:
+            stat = os.stat(str(root / str(self.paths[index])))
+        except OSError:
+            return True
+        return (
+            stat.st_size != self.sizes[index]
+            or stat.st_mtime_ns != self.mtimes_ns[index]
+        )
+
+    def _concatenate(self, other: "DatasetManifest") -> "DatasetManifest":
+        label_names = self.label_names.tolist()
+        label_lookup = {name: idx for idx, name in enumerate(label_names)}
+        remap = []
+        for name in other.label_names.tolist():
+            if name not in label_lookup:
+                label_lookup[name] = len(label_names)
+                label_names.append(name)
+            remap.append(label_lookup[name])
+        # Unlabelled videos have label_idx -1, which indexes the trailing -1
+        other_label_idx = np.array(remap + [-1], dtype=np.int64)[other.label_idx]
+        return DatasetManifest(
+            video_ids=np.concatenate([self.video_ids, other.video_ids]),
+            paths=np.concatenate([self.paths, other.paths]),
+            frame_counts=np.concatenate([self.frame_counts, other.frame_counts]),
+            heights=np.concatenate([self.heights, other.heights]),
+            widths=np.concatenate([self.widths, other.widths]),
+            fps=np.concatenate([self.fps, other.fps]),
+            sizes=np.concatenate([self.sizes, other.sizes]),
+            mtimes_ns=np.concatenate([self.mtimes_ns, other.mtimes_ns]),
+            label_idx=np.concatenate([self.label_idx, other_label_idx]),
+            label_names=np.array(label_names),
+            dir_paths=self.dir_paths,
+            dir_mtimes_ns=self.dir_mtimes_ns,
+        )
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(<{} videos>)".format(len(self))
+
+
+def load_manifest(
+    manifest: Union[str, Path, DatasetManifest],
+    root: Union[str, Path],
+    frame_counter: Optional[Callable[[Path], int]] = None,
+    update: Optional[Callable[[DatasetManifest], DatasetManifest]] = None,
+    video_frame_counter: Optional[Callable[[str], int]] = None,
+) -> DatasetManifest:
+    """Load (if given a path) and validate ``manifest`` against the files in ``root``.
+
+    If validation changes a manifest loaded from disk, the updated manifest is saved
+    back so subsequent loads don't need to recount frames.
+
+    Args:
+        manifest: The manifest, or the path to a saved manifest.
+        root: Root directory of the dataset.
+        frame_counter: Used to recount the frames of modified videos.
+        update: Optional callable applied to the validated manifest to pick up new
+            videos, see :meth:`DatasetManifest.update`.
+        video_frame_counter: Used to recount the frames of modified videos given
+            their ids, see :meth:`DatasetManifest.validate`.
+    """
+    if isinstance(manifest, DatasetManifest):
+        validated = manifest.validate(root, frame_counter, video_frame_counter)
+        return validated if update is None else update(validated)
+    loaded = DatasetManifest.load(manifest)
+    validated = loaded.validate(root, frame_counter, video_frame_counter)
+    if update is not None:
+        validated = update(validated)
+    if validated is not loaded:
+        try:
+            validated.save(manifest)
+        except OSError as e:
+            _LOG.warning("Couldn't update manifest {}: {}".format(manifest, e))
+    return validated
+
+
+def stat_entry(
+    path: Path,
+    video_id: str,
+    relative_path: str,
+    frame_count: int,
+    label: Any = None,
+    height: int = -1,
+    width: int = -1,
+    fps: float = float("nan"),
+) -> ManifestEntry:
+    """Construct a :class:`ManifestEntry` for the file at ``path``, filling in its size
+    and modification time."""
+    stat = os.stat(str(path))
+    return ManifestEntry(
+        video_id=video_id,
+        path=relative_path,
+        frame_count=frame_count,
+        height=height,
+        width=width,
+        fps=fps,
+        size=stat.st_size,
+        mtime_ns=stat.st_mtime_ns,
+        label=label,
+    )
+
+
+def _relative_path(path: Path, root: Path) -> str:
+    return str(path.relative_to(root))
+
+
+def _parent_dir(relative_path: str) -> str:
+    return str(Path(relative_path).parent)
+
+
+def _parent_dirs(relative_paths: Iterable[str]) -> List[str]:
+    """All directories containing ``relative_paths``, up to and including the root
+    directory ``"."``."""
+    dirs = {"."}
+    for path in relative_paths:
+        dirs.update(str(parent) for parent in Path(path).parents)
+    return sorted(dirs)
+
+
+def _stat_dirs(root: Path, relative_dirs: Iterable[str]) -> Dict[str, int]:
+    """Modification times of the directories in ``relative_dirs`` that exist."""
+    mtimes_ns = OrderedDict()  # type: Dict[str, int]
+    for relative_dir in relative_dirs:
+        try:
+            mtimes_ns[relative_dir] = os.stat(str(root / relative_dir)).st_mtime_ns
+        except OSError:
+            continue
+    return mtimes_ns
@@ -0,0 +1,166 @@
+from collections import namedtuple
+from pathlib import Path
+from typing import Callable, Iterator, Optional, Sequence, Union
+from typing import List  # noqa
+
+import numpy as np
+import torch.utils.data
+
+from torchvideo.internal.readers import FrameSize, _is_video_file, stream_pyav_frames
+from torchvideo.transforms import NDArrayVideoToTensor
+
+
+class VideoWindow(
+    namedtuple("VideoWindow", ["frames", "timestamps", "video", "start"])
+):
+    """Window of consecutive frames of a video, as produced by
+    :class:`SlidingWindowVideoDataset`.
+
+    Attributes:
+        frames: The frames of the window, transformed by the dataset's
+            ``transform``.
+        timestamps: ``(window_length,)`` float array of the presentation time of
+            each frame in seconds.
+        video: Index of the video in :attr:`SlidingWindowVideoDataset.video_paths`.
+        start: Frame number of the first frame of the window.
+    """
+
+
+class SlidingWindowVideoDataset(torch.utils.data.IterableDataset):
+    """Dataset of overlapping windows of consecutive frames over whole videos, for
+    dense inference over long videos.
+
+    Each video is decoded once, front to back, into a ring buffer of
+    ``window_length`` frames. A window is emitted every ``stride`` frames once its
+    last frame has been decoded, so every frame is decoded exactly once however much
+    the windows overlap, and the memory held per video is bounded by the window
+    rather than the length of the video. When ``stride`` exceeds
+    ``window_length``, frames between windows are decoded (later frames depend on
+    them) but not converted.
+
+    Example:
+        >>> dataset = SlidingWindowVideoDataset(root, window_length=32, stride=8)
+        >>> for window in DataLoader(dataset, batch_size=16, num_workers=4):
+        ...     scores = model(window.frames)
+        ...     # window.video, window.start and window.timestamps locate each
+        ...     # window in its video
+
+    Frames are streamed with PyAV whatever the default video backend is. With
+    multiple ``DataLoader`` workers each worker streams its own share of the videos,
+    so the windows of different videos are interleaved.
+    """
+
+    def __init__(
+        self,
+        videos: Union[str, Path, Sequence[Union[str, Path]]],
+        window_length: int,
+        stride: int = 1,
+        transform: Optional[Callable] = None,
+        drop_last: bool = False,
+        frame_size: Optional[FrameSize] = None,
+        grayscale: bool = False,
+        fast_decode: bool = False,
+    ) -> None:
+        """
+        Args:
+            videos: Folder of video files, or a sequence of paths to videos.
+            window_length: Number of frames in each window.
+            stride: Number of frames between the starts of consecutive windows.
+            transform: Optional transform over the ``(T, H, W, C)`` uint8 array of
+                the frames of each window, defaults to :class:`NDArrayVideoToTensor`.
+            drop_last: Whether to drop the frames at the end of a video that no full
+                window covers. Otherwise they are emitted in a final window, on the
+                stride, whose frames past the end of the video are filled with the
+                final frame, so videos shorter than ``window_length`` still produce
+                a window.
+            frame_size: Optional size to decode frames at, see
+                :class:`~torchvideo.datasets.VideoDataset`.
+            grayscale: Whether to decode single channel luma frames.
+            fast_decode: Whether to let the decoder trade accuracy for speed, see
+                :func:`~torchvideo.internal.readers.default_loader`.
+        """
+        if window_length < 1:
+            raise ValueError(
+                "window_length must be at least 1, got {}".format(window_length)
+            )
+        if stride < 1:
+            raise ValueError("stride must be at least 1, got {}".format(stride))
+        if isinstance(videos, (str, Path)):
+            root = Path(videos)
+            self.video_paths = sorted(
+                child for child in root.iterdir() if _is_video_file(child)
+            )  # type: List[Path]
+        else:
+            self.video_paths = [Path(path) for path in videos]
+        self.window_length = window_length
+        self.stride = stride
+        if transform is None:
+            transform = NDArrayVideoToTensor()
+        self.transform = transform
+        self.drop_last = drop_last
+        self.frame_size = frame_size
+        self.grayscale = grayscale
+        self.fast_decode = fast_decode
+
+    @property
+    def video_ids(self):
+        return self.video_paths
+
+    def __iter__(self) -> Iterator[VideoWindow]:
+        worker_info = torch.utils.data.get_worker_info()
+        video_indices = range(len(self.video_paths))
+        if worker_info is not None:
+            video_indices = video_indices[worker_info.id :: worker_info.num_workers]
+        for video_index in video_indices:
+            for start, frames, timestamps in self._video_windows(
+                self.video_paths[video_index]
+            ):
+                if self.transform is not None:
+                    frames = self.transform(frames)
+                yield VideoWindow(frames, timestamps, video_index, start)
+
+    def _video_windows(self, video_path: Path):
+        window_length = self.window_length
+        stride = self.stride
+        frame_buffer = None  # type: Optional[np.ndarray]
+        timestamp_buffer = np.empty(window_length, dtype=np.float64)
+        next_start = 0
+        last_frame_number = -1
+        last_covered = -1
+        # Frame n is kept in slot n % window_length, which only ever holds frames
+        # of the window being filled
+        for frame_number, timestamp, frame in stream_pyav_frames(
+            video_path,
+            size=self.frame_size,
+            grayscale=self.grayscale,
+            fast_decode=self.fast_decode,
+            frame_filter=_window_frame_filter(window_length, stride),
+        ):
+            if frame_buffer is None:
+                frame_buffer = np.empty(
+                    (window_length,) + frame.shape, dtype=frame.dtype
+                )
+            slot = frame_number % window_length
+            frame_buffer[slot] = frame
+            timestamp_buffer[slot] = timestamp
+            last_frame_number = frame_number
+            if frame_number == next_start + window_length - 1:
+                slots = np.arange(next_start, next_start + window_length)
+                slots %= window_length
+                yield next_start, frame_buffer[slots], timestamp_buffer[slots]
+                last_covered = frame_number
+                next_start += stride
+        if not self.drop_last and frame_buffer is not None:
+            if last_frame_number > last_covered:
+                frame_numbers = np.arange(next_start, next_start + window_length)
+                slots = np.minimum(frame_numbers, last_frame_number) % window_length
+                yield next_start, frame_buffer[slots], timestamp_buffer[slots]
+
+
+def _window_frame_filter(
+    window_length: int, stride: int
+) -> Optional[Callable[[int], bool]]:
+    if stride <= window_length:
+        # Windows overlap or abut, so every frame is in some window
+        return None
+    return lambda frame_number: frame_number % stride < window_length
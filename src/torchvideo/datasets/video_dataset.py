@@ -1,11 +1,20 @@
 from pathlib import Path
-from typing import Union, Optional, Tuple, List, Any, Callable, Iterator  # noqa
+from typing import Union, Optional, Tuple, List, Any, Callable, Dict, Iterator  # noqa
 
+import numpy as np
 from PIL.Image import Image
 
 import torch.utils.data
 
-from torchvideo.samplers import FrameSampler, _default_sampler
+from torchvideo.internal.readers import FrameCache, FrameSize, load_video_index
+from torchvideo.samplers import (
+    EpochPlan,
+    FrameSampler,
+    IndexPlan,
+    KeyframeAwareSampler,
+    MultiClip,
+    _default_sampler,
+)
 from .label_sets import LabelSet
 from .types import Label, Transform
 
@@ -21,6 +30,12 @@ class VideoDataset(torch.utils.data.Dataset):
         label_set: Optional[LabelSet] = None,
         sampler: FrameSampler = _default_sampler(),
         transform: Optional[Transform] = None,
+        backend: Optional[str] = None,
+        as_ndarray: bool = False,
+        frame_size: Optional[FrameSize] = None,
+        frame_cache: Optional[FrameCache] = None,
+        grayscale: bool = False,
+        fast_decode: bool = False,
     ) -> None:
         """
 
@@ -29,10 +44,35 @@ class VideoDataset(torch.utils.data.Dataset):
             label_set: Optional label set for labelling examples.
             sampler: Optional sampler for drawing frames from each video.
             transform: Optional transform over the list of frames.
+            backend: Optional name of the decoder backend used to load videos,
+                defaults to :func:`torchvideo.get_video_backend`.
+            as_ndarray: Whether to load frames as a contiguous ``(T, H, W, C)`` uint8
+                :class:`numpy.ndarray` rather than as PIL images, in which case
+                ``transform`` receives the array.
+            frame_size: Optional size to decode frames at, either the maximum
+                length of the shorter side of each frame or an exact
+                ``(height, width)``. Frames are scaled by the decoder where the
+                backend supports it, which is considerably cheaper than decoding at
+                full resolution and resizing in ``transform``.
+            frame_cache: Optional :class:`~torchvideo.internal.readers.FrameCache`
+                of decoded frames, only frames missing from the cache are decoded.
+            grayscale: Whether to load single channel luma frames, as mode ``"L"``
+                images or a ``(T, H, W, 1)`` array.
+            fast_decode: Whether to let the decoder trade accuracy for speed, see
+                :func:`~torchvideo.internal.readers.default_loader`.
         """
         self.root = Path(root)
+        self.root_path = self.root
+        self.backend = backend
+        self.as_ndarray = as_ndarray
+        self.frame_size = frame_size
+        self.frame_cache = frame_cache
+        self.grayscale = grayscale
+        self.fast_decode = fast_decode
         self.label_set = label_set
         self.sampler = sampler
+        self.epoch_plan = None  # type: Optional[EpochPlan]
+        self._keyframes = {}  # type: Dict[str, Optional[np.ndarray]]
         self.transform = transform
         self.labels = None  # type: Optional[List[Any]]
         """The labels corresponding to the examples in the dataset. To get the label
@@ -64,11 +104,76 @@ class VideoDataset(torch.utils.data.Dataset):
         """Total number of examples in the dataset"""
         raise NotImplementedError()
 
-    @staticmethod
+    def set_epoch_plan(self, epoch_plan: Optional[EpochPlan]) -> None:
+        """Load the frames planned for each video by ``epoch_plan`` rather than
+        drawing them from ``sampler``, see
+        :meth:`~torchvideo.samplers.FrameSampler.plan_epoch`.
+
+        Example:
+            >>> for epoch in range(epochs):
+            ...     plan = sampler.plan_epoch(
+            ...         dataset.video_lengths, seed, epoch, shuffle=True
+            ...     )
+            ...     dataset.set_epoch_plan(plan)
+            ...     loader = DataLoader(dataset, sampler=plan.order, num_workers=8)
+
+        DataLoader workers get a copy of the dataset when they start, so the plan
+        must be set before iterating over the loader (and can't be changed for
+        persistent workers).
+
+        Args:
+            epoch_plan: Plan of the epoch, or ``None`` to go back to sampling with
+                ``sampler``.
+
+        Raises:
+            ValueError: If the plan is for a different number of videos than the
+                dataset holds.
+        """
+        if epoch_plan is not None and epoch_plan.n_videos != len(self):
+            raise ValueError(
+                "Epoch plan is for {} videos but the dataset holds {}".format(
+                    epoch_plan.n_videos, len(self)
+                )
+            )
+        self.epoch_plan = epoch_plan
+
+    def _sample_frames(
+        self, index: int, video_length: int, video_file: Optional[Path] = None
+    ) -> Union[IndexPlan, MultiClip]:
+        if self.epoch_plan is not None:
+            return self.epoch_plan.plan(index)
+        if isinstance(self.sampler, KeyframeAwareSampler) and video_file is not None:
+            return self.sampler.sample_plan(
+                video_length, keyframes=self._video_keyframes(video_file)
+            )
+        return self.sampler.sample_plan(video_length)
+
+    def _video_keyframes(self, video_file: Path) -> Optional[np.ndarray]:
+        # Like frame counts, keyframes are read once per video rather than every
+        # time the video is sampled
+        key = str(video_file)
+        try:
+            return self._keyframes[key]
+        except KeyError:
+            video_index = load_video_index(video_file)
+            keyframes = None if video_index is None else video_index.keyframes
+            self._keyframes[key] = keyframes
+            return keyframes
+
     def _load_frames(
+        self,
         video_file: Path,
-        frame_idx: Union[slice, List[slice], List[int]],
-    ) -> Iterator[Image]:
+        frame_idx: Union[IndexPlan, slice, List[slice], List[int]],
+    ) -> Union[Iterator[Image], np.ndarray]:
         from torchvideo.internal.readers import default_loader
 
-        return default_loader(video_file, frame_idx)
+        return default_loader(
+            video_file,
+            frame_idx,
+            backend=self.backend,
+            as_ndarray=self.as_ndarray,
+            size=self.frame_size,
+            cache=self.frame_cache,
+            grayscale=self.grayscale,
+            fast_decode=self.fast_decode,
+        )
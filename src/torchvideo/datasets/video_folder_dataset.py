@@ -1,16 +1,29 @@
 import os
+from functools import partial
+from itertools import repeat
+
+import numpy as np
 import torch
 from pathlib import Path
-from typing import Any, Callable, Iterator, List, Optional, Tuple, Union
-
-from PIL.Image import Image
-
-from torchvideo.internal.readers import _get_videofile_frame_count, _is_video_file
-from torchvideo.samplers import FrameSampler, _default_sampler
-from torchvideo.transforms import PILVideoToTensor
-
-from .helpers import invoke_transform
+from typing import Any, Callable, Iterator, Optional, Tuple, Union
+from typing import Dict, List  # noqa
+
+from torchvideo.internal.probing import count_frames, probe_videos
+from torchvideo.internal.readers import (
+    FrameCache,
+    FrameSize,
+    VideoInfo,
+    _get_videofile_frame_count,
+    _is_video_file,
+    _probe_videofile,
+)
+from torchvideo.samplers import FrameSampler, MultiClip, _default_sampler
+from torchvideo.samplers import EpochPlan  # noqa
+from torchvideo.transforms import NDArrayVideoToTensor, PILVideoToTensor
+
+from .helpers import invoke_sample_transform, stack_clips
 from .label_sets import LabelSet, RecordSet
+from .manifest import DatasetManifest, ManifestEntry, load_manifest, stat_entry
 from .types import Label, PILVideoTransform, empty_label
 from .video_dataset import VideoDataset
 
@@ -25,39 +38,64 @@ class VideoRecordDataset(VideoDataset):
         transform: Optional[Callable] = None,
         target_transform: Optional[Callable] = None,
         frame_counter: Optional[Callable[[Path], int]] = None,
+        backend: Optional[str] = None,
+        manifest: Optional[Union[str, Path, DatasetManifest]] = None,
+        as_ndarray: bool = False,
+        frame_size: Optional[FrameSize] = None,
+        frame_cache: Optional[FrameCache] = None,
+        grayscale: bool = False,
+        fast_decode: bool = False,
     ) -> None:
 
         self.root = root
         self.sampler = sampler
+        self.epoch_plan = None  # type: Optional[EpochPlan]
+        self._keyframes = {}  # type: Dict[str, Optional[np.ndarray]]
         self.record_set = record_set
-
+        self.backend = backend
+        self.as_ndarray = as_ndarray
+        self.frame_size = frame_size
+        self.frame_cache = frame_cache
+        self.grayscale = grayscale
+        self.fast_decode = fast_decode
+
+        # Without a frame counter videos are probed, which gives the resolution and
+        # frame rate recorded by manifests as well as the frame count
+        self._probe_frame_counts = frame_counter is None
+        self._video_infos = {}  # type: Dict[int, Optional[VideoInfo]]
         if frame_counter is None:
             frame_counter = _get_videofile_frame_count
         self.frame_counter = frame_counter
 
         if transform is None:
-            transform = PILVideoToTensor()
+            transform = NDArrayVideoToTensor() if as_ndarray else PILVideoToTensor()
         self.transform = transform
 
         if target_transform is None:
             target_transform = int
         self.target_transform = target_transform
         self.video_lens = {}
+        if manifest is not None:
+            manifest = load_manifest(manifest, self.root, frame_counter)
+            frame_counts = dict(zip(manifest.paths.tolist(), manifest.frame_counts))
+            for index, record in enumerate(self.record_set.records):
+                if record.path in frame_counts:
+                    self.video_lens[index] = int(frame_counts[record.path])
+        self.manifest = manifest
 
     def __getitem__(self, index: int) -> Union[torch.Tensor, Tuple[torch.Tensor, int]]:
         record = self.record_set[index]
         video_path = os.path.join(self.root, record.path)
-        try:
-            video_length = self.video_lens[index]
-        except KeyError:
-            self.video_lens[index] = self.frame_counter(video_path)
-            video_length = self.video_lens[index]
-        frame_inds = self.sampler.sample(video_length)
+        video_length = self._video_length(index, video_path)
+        frame_inds = self._sample_frames(index, video_length, video_path)
         frames = self._load_frames(video_path, frame_inds)
         label = record.label
 
         if self.transform is not None:
-            frames = self.transform(frames)
+            if isinstance(frame_inds, MultiClip):
+                frames = stack_clips([self.transform(clip) for clip in frames])
+            else:
+                frames = self.transform(frames)
         if self.target_transform is not None:
             label = self.target_transform(label)
 
@@ -66,14 +104,39 @@ class VideoRecordDataset(VideoDataset):
     def __len__(self):
         return len(self.record_set)
 
-    @staticmethod
-    def _load_frames(
-        video_file: Path,
-        frame_idx: Union[slice, List[slice], List[int]],
-    ) -> Iterator[Image]:
-        from torchvideo.internal.readers import default_loader
-
-        return default_loader(video_file, frame_idx)
+    def _video_length(self, index: int, video_path: str) -> int:
+        if index not in self.video_lens:
+            if self._probe_frame_counts:
+                info = _probe_counted_videofile(Path(video_path))
+                self._video_infos[index] = info
+                self.video_lens[index] = info.n_frames
+            else:
+                self.video_lens[index] = self.frame_counter(video_path)
+        return self.video_lens[index]
+
+    def _manifest_entries(self, workers: int = 0) -> Iterator[ManifestEntry]:
+        video_paths = [
+            Path(self.root) / record.path for record in self.record_set.records
+        ]
+        # Videos probed to count their frames aren't probed again
+        infos = dict(self._video_infos)
+        to_probe = [i for i in range(len(video_paths)) if i not in infos]
+        probed = probe_videos(
+            [video_paths[i] for i in to_probe], _probe_videofile, workers=workers
+        )
+        infos.update(zip(to_probe, probed))
+        for index, (record, video_path) in enumerate(
+            zip(self.record_set.records, video_paths)
+        ):
+            info = infos[index]
+            if index not in self.video_lens:
+                if self._probe_frame_counts and info is not None and info.n_frames >= 0:
+                    self.video_lens[index] = info.n_frames
+                else:
+                    self.video_lens[index] = self.frame_counter(str(video_path))
+            yield _video_manifest_entry(
+                video_path, record.path, self.video_lens[index], record.label, info
+            )
 
 
 class VideoFolderDataset(VideoDataset):
@@ -95,6 +158,16 @@ class VideoFolderDataset(VideoDataset):
         sampler: FrameSampler = _default_sampler(),
         transform: Optional[PILVideoTransform] = None,
         frame_counter: Optional[Callable[[Path], int]] = None,
+        backend: Optional[str] = None,
+        frame_counter_workers: int = 0,
+        frame_counter_processes: bool = False,
+        manifest: Optional[Union[str, Path, DatasetManifest]] = None,
+        update_manifest: bool = False,
+        as_ndarray: bool = False,
+        frame_size: Optional[FrameSize] = None,
+        frame_cache: Optional[FrameCache] = None,
+        grayscale: bool = False,
+        fast_decode: bool = False,
     ) -> None:
         """
         Args:
@@ -110,17 +183,114 @@ class VideoFolderDataset(VideoDataset):
                 should return a positive integer representing the number of frames.
                 This tends to be useful if you've precomputed the number of frames in a
                 dataset.
+            backend: Optional name of the decoder backend used to load videos,
+                defaults to :func:`torchvideo.get_video_backend`.
+            frame_counter_workers: Number of threads used to count the frames of the
+                videos, ``0`` counts them serially. Progress is logged at ``INFO``
+                level and videos that can't be counted are reported together in a
+                :class:`~torchvideo.internal.probing.FrameCountError`.
+            frame_counter_processes: Count frames with a pool of
+                ``frame_counter_workers`` processes instead of threads, in which case
+                ``frame_counter`` must be picklable.
+            manifest: Optional :class:`DatasetManifest`, or path to a saved manifest,
+                listing the videos in ``root_path`` and their frame counts. The folder
+                is not scanned and videos are only probed if they've changed since
+                the manifest was built. Labels are taken from the manifest unless
+                ``label_set`` is given.
+            update_manifest: Whether to pick up videos added to ``root_path`` since
+                the manifest was built, see :meth:`DatasetManifest.update`. The folder
+                is only listed if its modification time has changed and only new
+                videos are probed. A manifest loaded from a path is saved back.
+            as_ndarray: Whether to load frames as a contiguous ``(T, H, W, 3)`` uint8
+                :class:`numpy.ndarray` rather than as PIL images. The array is handed
+                to ``transform`` (by default :class:`NDArrayVideoToTensor`), avoiding
+                wrapping each decoded frame in an image and converting it back.
+            frame_size: Optional size to decode frames at, either the maximum
+                length of the shorter side of each frame (frames are never upscaled)
+                or an exact ``(height, width)``. Backends that support it scale
+                frames whilst decoding, so full resolution frames are never
+                materialised.
+            frame_cache: Optional :class:`~torchvideo.internal.readers.FrameCache`
+                of decoded frames. Only frames missing from the cache are decoded,
+                which avoids decoding the same video repeatedly when it is sampled
+                several times, e.g. over multiple epochs or at test time.
+            grayscale: Whether to load single channel luma frames, as mode ``"L"``
+                images or a ``(T, H, W, 1)`` array. Backends that support it (e.g.
+                ``"pyav"``) only convert the luma plane of decoded frames, cutting
+                the memory and transfer cost of each clip to a third.
+            fast_decode: Whether to let the decoder trade accuracy for speed by
+                skipping the loop filter and using inexact shortcuts. Decoding is
+                noticeably cheaper and frames are only slightly degraded, which is
+                usually a good trade when training with augmentation. Leave it off
+                for evaluation. Backends that don't support it (e.g. ``"lintel"``)
+                decode exactly.
         """
         if transform is None:
-            transform = PILVideoToTensor()
+            transform = NDArrayVideoToTensor() if as_ndarray else PILVideoToTensor()
         super().__init__(
-            root_path, label_set=label_set, sampler=sampler, transform=transform
-        )
-        self._video_paths = self._get_video_paths(self.root_path, filter)
-        self.labels = self._label_examples(self._video_paths, label_set)
-        self.video_lengths = self._measure_video_lengths(
-            self._video_paths, frame_counter
+            root_path,
+            label_set=label_set,
+            sampler=sampler,
+            transform=transform,
+            backend=backend,
+            as_ndarray=as_ndarray,
+            frame_size=frame_size,
+            frame_cache=frame_cache,
+            grayscale=grayscale,
+            fast_decode=fast_decode,
         )
+        self._video_infos = None  # type: Optional[List[Optional[VideoInfo]]]
+        if manifest is not None:
+            update = None
+            if update_manifest:
+                update = partial(
+                    DatasetManifest.update,
+                    root=self.root_path,
+                    is_video=lambda path: _is_video_file(path)
+                    and (filter is None or filter(path)),
+                    probe=partial(self._probe_manifest_entry, frame_counter),
+                    workers=frame_counter_workers,
+                )
+            manifest = load_manifest(
+                manifest,
+                self.root_path,
+                _get_videofile_frame_count if frame_counter is None else frame_counter,
+                update,
+            )
+            if filter is not None:
+                manifest = manifest.subset(
+                    np.array(
+                        [filter(self.root_path / path) for path in manifest.paths],
+                        dtype=np.bool_,
+                    )
+                )
+            self._video_paths = [self.root_path / path for path in manifest.paths]
+            if label_set is None:
+                self.labels = manifest.labels
+            else:
+                self.labels = self._label_examples(self._video_paths, label_set)
+            self.video_lengths = manifest.frame_counts.tolist()
+        else:
+            self._video_paths = self._get_video_paths(self.root_path, filter)
+            self.labels = self._label_examples(self._video_paths, label_set)
+            if frame_counter is None:
+                # Probing gives the resolution and frame rate recorded by manifests
+                # as well as the frame count, so keep the results for building one
+                self._video_infos = count_frames(
+                    self._video_paths,
+                    _probe_counted_videofile,
+                    workers=frame_counter_workers,
+                    use_processes=frame_counter_processes,
+                )
+                self.video_lengths = [info.n_frames for info in self._video_infos]
+            else:
+                self.video_lengths = self._measure_video_lengths(
+                    self._video_paths,
+                    frame_counter,
+                    workers=frame_counter_workers,
+                    use_processes=frame_counter_processes,
+                )
+        self.manifest = manifest
 
     @property
     def video_ids(self):
@@ -131,7 +301,7 @@ class VideoFolderDataset(VideoDataset):
     def __getitem__(self, index: int) -> Union[Any, Tuple[Any, Label]]:
         video_file = self._video_paths[index]
         video_length = self.video_lengths[index]
-        frames_idx = self.sampler.sample(video_length)
+        frames_idx = self._sample_frames(index, video_length, video_file)
         frames = self._load_frames(video_file, frames_idx)
 
         if self.labels is not None:
@@ -139,7 +309,9 @@ class VideoFolderDataset(VideoDataset):
         else:
             label = empty_label
 
-        frames, label = invoke_transform(self.transform, frames, label)
+        frames, label = invoke_sample_transform(
+            self.transform, frames, label, frames_idx
+        )
 
         if label is empty_label:
             return frames
@@ -149,10 +321,14 @@ class VideoFolderDataset(VideoDataset):
         return len(self._video_paths)
 
     @staticmethod
-    def _measure_video_lengths(video_paths, frame_counter):
+    def _measure_video_lengths(
+        video_paths, frame_counter, workers: int = 0, use_processes: bool = False
+    ):
         if frame_counter is None:
             frame_counter = _get_videofile_frame_count
-        return [frame_counter(vid_path) for vid_path in video_paths]
+        return count_frames(
+            video_paths, frame_counter, workers=workers, use_processes=use_processes
+        )
 
     @staticmethod
     def _label_examples(video_paths, label_set: Optional[LabelSet]):
@@ -161,6 +337,41 @@ class VideoFolderDataset(VideoDataset):
         else:
             return [label_set[video_path.name] for video_path in video_paths]
 
+    def _manifest_entries(self, workers: int = 0) -> Iterator[ManifestEntry]:
+        infos = self._video_infos
+        if infos is None:
+            infos = probe_videos(self._video_paths, _probe_videofile, workers=workers)
+        labels = self.labels if self.labels is not None else repeat(None)
+        for video_path, video_length, label, info in zip(
+            self._video_paths, self.video_lengths, labels, infos
+        ):
+            yield _video_manifest_entry(
+                video_path,
+                str(video_path.relative_to(self.root_path)),
+                video_length,
+                label,
+                info,
+            )
+
+    def _probe_manifest_entry(
+        self,
+        frame_counter: Optional[Callable[[Path], int]],
+        video_path: Path,
+        relative_path: str,
+    ) -> ManifestEntry:
+        label = None
+        if self.label_set is not None:
+            label = self.label_set[video_path.name]
+        if frame_counter is None:
+            info = _probe_counted_videofile(video_path)
+            frame_count = info.n_frames
+        else:
+            info = _probe_videofile(video_path)
+            frame_count = frame_counter(video_path)
+        return _video_manifest_entry(
+            video_path, relative_path, frame_count, label, info
+        )
+
     @staticmethod
     def _get_video_paths(root_path, filter):
         return sorted(
@@ -171,14 +382,35 @@ class VideoFolderDataset(VideoDataset):
             ]
         )
 
-    @staticmethod
-    def _load_frames(
-        video_file: Path,
-        frame_idx: Union[slice, List[slice], List[int]],
-    ) -> Iterator[Image]:
-        from torchvideo.internal.readers import default_loader
 
-        return default_loader(video_file, frame_idx)
+def _video_manifest_entry(
+    video_path: Path,
+    relative_path: str,
+    video_length: int,
+    label: Any,
+    info: Optional[VideoInfo],
+) -> ManifestEntry:
+    if info is None:
+        return stat_entry(video_path, relative_path, relative_path, video_length, label)
+    return stat_entry(
+        video_path,
+        relative_path,
+        relative_path,
+        video_length,
+        label,
+        height=info.height,
+        width=info.width,
+        fps=info.fps,
+    )
+
+
+def _probe_counted_videofile(video_path: Path) -> VideoInfo:
+    """Probe a video, failing like :func:`_get_videofile_frame_count` when its frame
+    count can't be determined rather than returning a negative count."""
+    info = _probe_videofile(video_path)
+    if info.n_frames < 0:
+        raise ValueError("Couldn't determine the frame count of {}".format(video_path))
+    return info
 
 
 class StaticFrameCounter:
@@ -0,0 +1,87 @@
+import mmap
+import os
+import threading
+from contextlib import contextmanager
+from pathlib import Path
+from typing import IO, Iterator, Union
+
+#: Read the whole file into a new ``bytes`` object.
+BUFFER_READ = "read"
+#: Memory map the file, pages are only read as the decoder touches them.
+BUFFER_MMAP = "mmap"
+#: Read the file into a per-thread ``bytearray`` that is reused between videos.
+BUFFER_POOLED = "pooled"
+
+BufferLike = Union[bytes, bytearray, memoryview, mmap.mmap]
+
+
+class _BufferPool(threading.local):
+    """A reusable read buffer per thread.
+
+    The buffer grows to fit the largest file read so far and is then reused, so
+    loading a video doesn't allocate a new object the size of the file. Growth is
+    geometric to avoid repeatedly reallocating when file sizes slowly increase.
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    @contextmanager
+    def read(self, path: Path) -> Iterator[memoryview]:
+        with path.open("rb", buffering=0) as f:
+            size = os.fstat(f.fileno()).st_size
+            if len(self.buffer) < size:
+                self.buffer = bytearray(max(size, 2 * len(self.buffer)))
+            view = memoryview(self.buffer)[:size]
+            try:
+                bytes_read = 0
+                while bytes_read < size:
+                    n = f.readinto(view[bytes_read:])
+                    if not n:
+                        break
+                    bytes_read += n
+                with view[:bytes_read] as data:
+                    yield data
+            finally:
+                view.release()
+
+
+_buffer_pool = _BufferPool()
+
+
+@contextmanager
+def open_video_buffer(
+    file: Union[Path, IO[bytes]], buffer: str = BUFFER_POOLED
+) -> Iterator[BufferLike]:
+    """Expose the contents of ``file`` as a bytes-like object.
+
+    The object is only valid within the context, pooled buffers are reused by the next
+    call and memory maps are closed on exit.
+
+    Args:
+        file: Path to the file, or a file-like object which is read in its entirety.
+        buffer: One of ``BUFFER_READ``, ``BUFFER_MMAP`` or ``BUFFER_POOLED``, only
+            used when ``file`` is a path.
+    """
+    if not isinstance(file, Path):
+        yield file.read()
+    elif buffer == BUFFER_READ:
+        with file.open("rb") as f:
+            yield f.read()
+    elif buffer == BUFFER_MMAP:
+        with file.open("rb") as f:
+            if os.fstat(f.fileno()).st_size == 0:
+                # Empty files can't be memory mapped
+                yield b""
+            else:
+                with mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) as mapped:
+                    yield mapped
+    elif buffer == BUFFER_POOLED:
+        with _buffer_pool.read(file) as data:
+            yield data
+    else:
+        raise ValueError(
+            "Unknown buffer '{}', expected one of {!r}".format(
+                buffer, [BUFFER_READ, BUFFER_MMAP, BUFFER_POOLED]
+            )
+        )
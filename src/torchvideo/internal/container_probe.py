@@ -0,0 +1,497 @@
+"""In-process parsing of video container headers.
+
+Reads the frame count, resolution and frame rate of a video's first video track
+straight from its container metadata, which is much cheaper than spawning ``ffprobe``
+for every video of a dataset of short clips. MP4/MOV (ISO base media) and
+Matroska/WebM containers are supported.
+"""
+
+import io
+import os
+import struct
+from collections import namedtuple
+from pathlib import Path
+from typing import IO, Dict, Iterator, List, Optional, Tuple, Union
+
+import numpy as np
+
+VideoInfo = namedtuple("VideoInfo", ("height", "width", "n_frames", "fps"))
+
+
+class ContainerProbeError(ValueError):
+    """Raised when a container's metadata can't be parsed, either because its format
+    isn't supported or because the information isn't stored in the header."""
+
+
+def probe_container(video_path: Union[str, Path]) -> VideoInfo:
+    """Read the resolution, frame count and frame rate of the first video track of
+    the MP4/MOV or Matroska/WebM file at ``video_path``.
+
+    MP4 frame counts come from the sample tables in the ``moov`` box, or from the
+    ``trun`` boxes of fragmented files. Matroska frame counts come from the track
+    statistics tags written by ``mkvmerge`` when present, otherwise the blocks of the
+    video track are counted by walking the cluster headers (without reading the frame
+    data).
+
+    Returns:
+        The video's metadata, the frame rate is ``nan`` if it can't be determined.
+
+    Raises:
+        ContainerProbeError: If the container isn't supported or its metadata can't be
+            parsed.
+    """
+    with open(str(video_path), "rb") as f:
+        file_size = os.fstat(f.fileno()).st_size
+        magic = f.read(12)
+        if magic[:4] == _EBML_MAGIC:
+            return _probe_matroska(f, file_size)
+        if magic[4:8] in _MP4_TOP_LEVEL_BOXES:
+            return _probe_mp4(f, file_size)
+    raise ContainerProbeError("Unsupported container format: {}".format(video_path))
+
+
+def _read_exact(f: IO[bytes], size: int) -> bytes:
+    data = f.read(size)
+    if len(data) != size:
+        raise ContainerProbeError("Unexpected end of file")
+    return data
+
+
+# MP4/MOV ---------------------------------------------------------------------
+
+_MP4_TOP_LEVEL_BOXES = {b"ftyp", b"moov", b"mdat", b"free", b"skip", b"wide", b"pnot"}
+
+
+def _iter_boxes(f: IO[bytes], start: int, end: int) -> Iterator[Tuple[bytes, int, int]]:
+    """Iterate over the boxes between ``start`` and ``end``, yielding the type of each
+    box and the offsets of the start and end of its payload."""
+    offset = start
+    while offset + 8 <= end:
+        f.seek(offset)
+        size, box_type = struct.unpack(">I4s", _read_exact(f, 8))
+        header_size = 8
+        if size == 1:
+            size = struct.unpack(">Q", _read_exact(f, 8))[0]
+            header_size = 16
+        elif size == 0:
+            # The box extends to the end of its parent
+            size = end - offset
+        if size < header_size:
+            raise ContainerProbeError("Invalid size of '{}' box".format(box_type))
+        yield box_type, offset + header_size, min(offset + size, end)
+        offset += size
+
+
+def _find_box(
+    f: IO[bytes], start: int, end: int, box_type: bytes
+) -> Optional[Tuple[int, int]]:
+    for child_type, child_start, child_end in _iter_boxes(f, start, end):
+        if child_type == box_type:
+            return child_start, child_end
+    return None
+
+
+def _find_box_path(
+    f: IO[bytes], start: int, end: int, path: List[bytes]
+) -> Optional[Tuple[int, int]]:
+    box = (start, end)  # type: Optional[Tuple[int, int]]
+    for box_type in path:
+        if box is None:
+            return None
+        box = _find_box(f, box[0], box[1], box_type)
+    return box
+
+
+def _read_box(f: IO[bytes], box: Tuple[int, int]) -> bytes:
+    f.seek(box[0])
+    return _read_exact(f, box[1] - box[0])
+
+
+def _probe_mp4(f: IO[bytes], file_size: int) -> VideoInfo:
+    moov = _find_box(f, 0, file_size, b"moov")
+    if moov is None:
+        raise ContainerProbeError("MP4 file has no 'moov' box")
+    for box_type, trak_start, trak_end in _iter_boxes(f, *moov):
+        if box_type == b"trak":
+            info = _probe_mp4_track(f, file_size, trak_start, trak_end)
+            if info is not None:
+                return info
+    raise ContainerProbeError("MP4 file has no video track")
+
+
+def _probe_mp4_track(
+    f: IO[bytes], file_size: int, start: int, end: int
+) -> Optional[VideoInfo]:
+    hdlr = _find_box_path(f, start, end, [b"mdia", b"hdlr"])
+    if hdlr is None or _read_box(f, hdlr)[8:12] != b"vide":
+        return None
+    stbl = _find_box_path(f, start, end, [b"mdia", b"minf", b"stbl"])
+    mdhd = _find_box_path(f, start, end, [b"mdia", b"mdhd"])
+    if stbl is None or mdhd is None:
+        raise ContainerProbeError("MP4 video track has no sample table")
+
+    mdhd_data = _read_box(f, mdhd)
+    if mdhd_data[0] == 1:
+        timescale = struct.unpack(">I", mdhd_data[20:24])[0]
+    else:
+        timescale = struct.unpack(">I", mdhd_data[12:16])[0]
+
+    stsd = _find_box(f, *stbl, b"stsd")
+    if stsd is None:
+        raise ContainerProbeError("MP4 video track has no sample description")
+    # The first sample entry follows the version, flags and entry count, its width
+    # and height are at a fixed offset within the visual sample entry.
+    width, height = struct.unpack(">HH", _read_box(f, stsd)[8 + 32 : 8 + 36])
+
+    n_frames = _mp4_sample_count(f, *stbl)
+    fps = float("nan")
+    stts = _find_box(f, *stbl, b"stts")
+    if stts is not None:
+        stts_data = _read_box(f, stts)
+        entry_count = struct.unpack(">I", stts_data[4:8])[0]
+        entries = np.frombuffer(
+            stts_data, dtype=">u4", count=2 * entry_count, offset=8
+        ).reshape(-1, 2)
+        total_duration = int((entries[:, 0].astype(np.int64) * entries[:, 1]).sum())
+        if total_duration > 0 and timescale > 0:
+            fps = float(entries[:, 0].sum()) * timescale / total_duration
+
+    if n_frames == 0:
+        # Fragmented files store their samples in 'moof' boxes after the 'moov' box
+        tkhd = _find_box(f, start, end, b"tkhd")
+        if tkhd is None:
+            raise ContainerProbeError("MP4 video track has no track header")
+        tkhd_data = _read_box(f, tkhd)
+        track_id_offset = 20 if tkhd_data[0] == 1 else 12
+        track_id = struct.unpack(
+            ">I", tkhd_data[track_id_offset : track_id_offset + 4]
+        )[0]
+        n_frames = _mp4_fragment_sample_count(f, file_size, track_id)
+    if n_frames == 0:
+        raise ContainerProbeError("MP4 video track has no samples")
+    return VideoInfo(height=height, width=width, n_frames=n_frames, fps=fps)
+
+
+def _mp4_sample_count(f: IO[bytes], stbl_start: int, stbl_end: int) -> int:
+    for box_type, box_start, _ in _iter_boxes(f, stbl_start, stbl_end):
+        if box_type in (b"stsz", b"stz2"):
+            # The sample count follows the version, flags and the sample size (stsz)
+            # or field size (stz2)
+            f.seek(box_start + 8)
+            return struct.unpack(">I", _read_exact(f, 4))[0]
+    raise ContainerProbeError("MP4 video track has no sample size table")
+
+
+def _mp4_fragment_sample_count(f: IO[bytes], file_size: int, track_id: int) -> int:
+    n_samples = 0
+    for box_type, moof_start, moof_end in _iter_boxes(f, 0, file_size):
+        if box_type != b"moof":
+            continue
+        for traf_type, traf_start, traf_end in _iter_boxes(f, moof_start, moof_end):
+            if traf_type != b"traf":
+                continue
+            tfhd = _find_box(f, traf_start, traf_end, b"tfhd")
+            if tfhd is None:
+                continue
+            f.seek(tfhd[0] + 4)
+            if struct.unpack(">I", _read_exact(f, 4))[0] != track_id:
+                continue
+            for trun_type, trun_start, _ in _iter_boxes(f, traf_start, traf_end):
+                if trun_type == b"trun":
+                    f.seek(trun_start + 4)
+                    n_samples += struct.unpack(">I", _read_exact(f, 4))[0]
+    return n_samples
+
+
+# Matroska/WebM ---------------------------------------------------------------
+
+_EBML_MAGIC = b"\x1a\x45\xdf\xa3"
+
+_EBML = 0x1A45DFA3
+_SEGMENT = 0x18538067
+_SEEK_HEAD = 0x114D9B74
+_SEEK = 0x4DBB
+_SEEK_ID = 0x53AB
+_SEEK_POSITION = 0x53AC
+_INFO = 0x1549A966
+_TIMECODE_SCALE = 0x2AD7B1
+_DURATION = 0x4489
+_TRACKS = 0x1654AE6B
+_TRACK_ENTRY = 0xAE
+_TRACK_NUMBER = 0xD7
+_TRACK_UID = 0x73C5
+_TRACK_TYPE = 0x83
+_DEFAULT_DURATION = 0x23E383
+_VIDEO = 0xE0
+_PIXEL_WIDTH = 0xB0
+_PIXEL_HEIGHT = 0xBA
+_TAGS = 0x1254C367
+_TAG = 0x7373
+_TARGETS = 0x63C0
+_TAG_TRACK_UID = 0x63C5
+_SIMPLE_TAG = 0x67C8
+_TAG_NAME = 0x45A3
+_TAG_STRING = 0x4487
+_CLUSTER = 0x1F43B675
+_BLOCK_GROUP = 0xA0
+_BLOCK = 0xA1
+_SIMPLE_BLOCK = 0xA3
+
+_VIDEO_TRACK_TYPE = 1
+
+_MatroskaTrack = namedtuple(
+    "_MatroskaTrack", ("number", "uid", "width", "height", "default_duration")
+)
+
+
+def _vint_length(first_byte: int) -> int:
+    for length in range(1, 9):
+        if first_byte & (0x80 >> (length - 1)):
+            return length
+    raise ContainerProbeError("Invalid EBML variable length integer")
+
+
+def _read_element_header(f: IO[bytes]) -> Optional[Tuple[int, Optional[int], int]]:
+    """Read the header of the EBML element at the current position of ``f``.
+
+    Returns:
+        The element's ID, the size of its payload (``None`` if unknown) and the size of
+        the header, or ``None`` at the end of the file.
+    """
+    first = f.read(1)
+    if not first:
+        return None
+    id_length = _vint_length(first[0])
+    element_id = int.from_bytes(first + _read_exact(f, id_length - 1), "big")
+    first = _read_exact(f, 1)
+    size_length = _vint_length(first[0])
+    size_bytes = bytes([first[0] & (0xFF >> size_length)]) + _read_exact(
+        f, size_length - 1
+    )
+    size = int.from_bytes(size_bytes, "big")  # type: Optional[int]
+    if size == (1 << (7 * size_length)) - 1:
+        size = None
+    return element_id, size, id_length + size_length
+
+
+def _iter_elements(
+    f: IO[bytes], start: int, end: int
+) -> Iterator[Tuple[int, int, int, int]]:
+    """Iterate over the EBML elements between ``start`` and ``end``, yielding the ID
+    of each element, the offset of its header and the offsets of the start and end of
+    its payload."""
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        header = _read_element_header(f)
+        if header is None:
+            return
+        element_id, size, header_size = header
+        data_start = offset + header_size
+        data_end = end if size is None else min(data_start + size, end)
+        yield element_id, offset, data_start, data_end
+        offset = data_end
+
+
+def _read_children(data: bytes) -> Iterator[Tuple[int, bytes]]:
+    f = io.BytesIO(data)
+    for element_id, _, start, end in _iter_elements(f, 0, len(data)):
+        yield element_id, data[start:end]
+
+
+def _read_uint(data: bytes) -> int:
+    return int.from_bytes(data, "big")
+
+
+def _read_float(data: bytes) -> float:
+    if len(data) == 4:
+        return struct.unpack(">f", data)[0]
+    if len(data) == 8:
+        return struct.unpack(">d", data)[0]
+    return 0.0
+
+
+def _probe_matroska(f: IO[bytes], file_size: int) -> VideoInfo:
+    segment = None
+    for element_id, _, start, end in _iter_elements(f, 0, file_size):
+        if element_id == _SEGMENT:
+            segment = (start, end)
+            break
+    if segment is None:
+        raise ContainerProbeError("Matroska file has no segment")
+    segment_start, segment_end = segment
+
+    elements = {}  # type: Dict[int, bytes]
+    seek_positions = {}  # type: Dict[int, int]
+    first_cluster = None
+    for element_id, offset, start, end in _iter_elements(f, segment_start, segment_end):
+        if element_id == _CLUSTER:
+            first_cluster = offset
+            break
+        if element_id in (_SEEK_HEAD, _INFO, _TRACKS, _TAGS):
+            f.seek(start)
+            data = _read_exact(f, end - start)
+            if element_id == _SEEK_HEAD:
+                seek_positions.update(_parse_seek_head(data, segment_start))
+            else:
+                elements[element_id] = data
+    # Elements after the clusters (typically tags) are found through the seek head
+    for element_id in (_INFO, _TRACKS, _TAGS):
+        if element_id not in elements and element_id in seek_positions:
+            f.seek(seek_positions[element_id])
+            header = _read_element_header(f)
+            if header is not None and header[0] == element_id and header[1]:
+                elements[element_id] = _read_exact(f, header[1])
+    if _TRACKS not in elements:
+        raise ContainerProbeError("Matroska file has no tracks")
+
+    track = _matroska_video_track(elements[_TRACKS])
+    duration_s = None
+    if _INFO in elements:
+        timecode_scale = 1000000
+        duration = None
+        for element_id, data in _read_children(elements[_INFO]):
+            if element_id == _TIMECODE_SCALE:
+                timecode_scale = _read_uint(data)
+            elif element_id == _DURATION:
+                duration = _read_float(data)
+        if duration:
+            duration_s = duration * timecode_scale / 1e9
+
+    n_frames = None
+    if _TAGS in elements:
+        n_frames = _matroska_tagged_frame_count(elements[_TAGS], track.uid)
+    if n_frames is None:
+        if first_cluster is None:
+            raise ContainerProbeError("Matroska file has no clusters")
+        n_frames = _count_matroska_blocks(f, first_cluster, segment_end, track.number)
+    if n_frames == 0:
+        raise ContainerProbeError("Matroska video track has no frames")
+
+    if track.default_duration:
+        fps = 1e9 / track.default_duration
+    elif duration_s:
+        fps = n_frames / duration_s
+    else:
+        fps = float("nan")
+    return VideoInfo(height=track.height, width=track.width, n_frames=n_frames, fps=fps)
+
+
+def _parse_seek_head(data: bytes, segment_start: int) -> Dict[int, int]:
+    positions = {}
+    for element_id, seek in _read_children(data):
+        if element_id != _SEEK:
+            continue
+        seek_id = None
+        seek_position = None
+        for child_id, child in _read_children(seek):
+            if child_id == _SEEK_ID:
+                seek_id = _read_uint(child)
+            elif child_id == _SEEK_POSITION:
+                seek_position = _read_uint(child)
+        if seek_id is not None and seek_position is not None:
+            positions[seek_id] = segment_start + seek_position
+    return positions
+
+
+def _matroska_video_track(tracks: bytes) -> _MatroskaTrack:
+    for element_id, entry in _read_children(tracks):
+        if element_id != _TRACK_ENTRY:
+            continue
+        fields = {}  # type: Dict[int, int]
+        for child_id, child in _read_children(entry):
+            if child_id == _VIDEO:
+                for video_id, video_child in _read_children(child):
+                    if video_id in (_PIXEL_WIDTH, _PIXEL_HEIGHT):
+                        fields[video_id] = _read_uint(video_child)
+            elif child_id in (
+                _TRACK_NUMBER,
+                _TRACK_UID,
+                _TRACK_TYPE,
+                _DEFAULT_DURATION,
+            ):
+                fields[child_id] = _read_uint(child)
+        if fields.get(_TRACK_TYPE) == _VIDEO_TRACK_TYPE:
+            return _MatroskaTrack(
+                number=fields.get(_TRACK_NUMBER),
+                uid=fields.get(_TRACK_UID),
+                width=fields.get(_PIXEL_WIDTH, -1),
+                height=fields.get(_PIXEL_HEIGHT, -1),
+                default_duration=fields.get(_DEFAULT_DURATION),
+            )
+    raise ContainerProbeError("Matroska file has no video track")
+
+
+def _matroska_tagged_frame_count(
+    tags: bytes, track_uid: Optional[int]
+) -> Optional[int]:
+    for element_id, tag in _read_children(tags):
+        if element_id != _TAG:
+            continue
+        target_uids = []
+        simple_tags = {}
+        for child_id, child in _read_children(tag):
+            if child_id == _TARGETS:
+                target_uids.extend(
+                    _read_uint(target)
+                    for target_id, target in _read_children(child)
+                    if target_id == _TAG_TRACK_UID
+                )
+            elif child_id == _SIMPLE_TAG:
+                name = value = None
+                for simple_id, simple in _read_children(child):
+                    if simple_id == _TAG_NAME:
+                        name = simple.decode("utf-8", "replace")
+                    elif simple_id == _TAG_STRING:
+                        value = simple.decode("utf-8", "replace")
+                if name is not None:
+                    simple_tags[name] = value
+        if track_uid in target_uids and "NUMBER_OF_FRAMES" in simple_tags:
+            try:
+                return int(simple_tags["NUMBER_OF_FRAMES"])
+            except (TypeError, ValueError):
+                return None
+    return None
+
+
+def _count_matroska_blocks(
+    f: IO[bytes], start: int, end: int, track_number: Optional[int]
+) -> int:
+    """Count the frames of ``track_number`` stored in the clusters from ``start``
+    onwards, only reading the block headers."""
+    n_frames = 0
+    offset = start
+    while offset < end:
+        f.seek(offset)
+        header = _read_element_header(f)
+        if header is None:
+            break
+        element_id, size, header_size = header
+        data_start = offset + header_size
+        if element_id in (_CLUSTER, _BLOCK_GROUP):
+            # Step into the element so its blocks are visited, this also copes with
+            # clusters of unknown size written by live encoders.
+            offset = data_start
+            continue
+        if size is None:
+            raise ContainerProbeError("Matroska element of unknown size")
+        if element_id in (_SIMPLE_BLOCK, _BLOCK):
+            block_header = f.read(min(size, 13))
+            n_frames += _block_frame_count(block_header, track_number)
+        offset = data_start + size
+    return n_frames
+
+
+def _block_frame_count(block_header: bytes, track_number: Optional[int]) -> int:
+    track_length = _vint_length(block_header[0])
+    track = _read_uint(
+        bytes([block_header[0] & (0xFF >> track_length)]) + block_header[1:track_length]
+    )
+    if track_number is not None and track != track_number:
+        return 0
+    # The track number is followed by a 2 byte timecode and a flags byte
+    flags = block_header[track_length + 2]
+    if flags & 0x06:
+        # Laced blocks store the number of frames minus one after the flags
+        return block_header[track_length + 3] + 1
+    return 1
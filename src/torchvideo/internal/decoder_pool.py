@@ -0,0 +1,465 @@
+"""Decoding in long-lived subprocesses, isolating the process loading the videos from
+crashes in decoder libraries.
+
+Each decoder process reads pickled decode jobs from its stdin, decodes the frames
+with one of the in-process backends and writes them into a memory mapped buffer
+file shared with the parent, replying over its stdout with the shape of the
+frames. Run as a script (``python -m torchvideo.internal.decoder_pool BUFFER
+BACKEND DECODER_THREADS``) to start a decoder process.
+"""
+
+import io
+import logging
+import mmap
+import os
+import pickle
+import select
+import subprocess
+import sys
+import tempfile
+import threading
+import traceback
+import weakref
+from pathlib import Path
+from typing import IO, Any, Dict, List, Optional, Union  # noqa
+
+import numpy as np
+
+_LOG = logging.getLogger(__name__)
+
+_READY = "ready"
+_OK = "ok"
+_ERROR = "error"
+
+
+class DecoderCrashedError(RuntimeError):
+    """Raised when a decoder process exits whilst decoding a video."""
+
+
+class DecoderTimeoutError(DecoderCrashedError):
+    """Raised when a decoder process takes longer than the pool's ``timeout`` to
+    decode a video, after which the process is killed."""
+
+
+class _RemoteTraceback(Exception):
+    """Traceback of an exception raised in a decoder process, chained to the
+    exception re-raised in the parent."""
+
+    def __init__(self, tb: str) -> None:
+        super().__init__(tb)
+        self.tb = tb
+
+    def __str__(self) -> str:
+        return self.tb
+
+
+class DecoderPool:
+    """Pool of long-lived decoder processes.
+
+    Decoding in a separate process means a decoder bug that segfaults or aborts only
+    takes down that decoder process: the job raises :class:`DecoderCrashedError`
+    and the process is replaced by a fresh one, rather than the whole
+    :class:`~torch.utils.data.DataLoader` worker dying. Likewise a decoder that
+    hangs is killed and replaced once a job has run for longer than ``timeout``,
+    raising :class:`DecoderTimeoutError`. The processes are started
+    on demand and reused for later jobs, so the cost of starting a process is only
+    paid once rather than per clip. A process is started for each thread decoding
+    concurrently, up to ``max_processes``.
+
+    Decoded frames are written into a buffer file (in ``/dev/shm`` where available)
+    that is memory mapped by both processes, so frames aren't pickled through the
+    pipe. The buffer file is unlinked as soon as the decoder process has opened
+    it, so it is freed even if the parent process is killed. Decoder processes
+    inherit the CPU affinity of the process starting them, and use the number of
+    decoder threads set (see :func:`torchvideo.set_decoder_threads`) when they
+    were started.
+
+    A pool belongs to the process that created it. A forked copy of a pool (e.g. in
+    a :class:`~torch.utils.data.DataLoader` worker) doesn't use the parent's
+    decoder processes but starts its own.
+    """
+
+    def __init__(
+        self,
+        backend: str = "pyav",
+        max_processes: Optional[int] = None,
+        dir: Optional[str] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        """
+        Args:
+            backend: Name of the in-process backend the decoder processes decode
+                videos with.
+            max_processes: Maximum number of decoder processes, defaults to the
+                number of CPUs.
+            dir: Optional directory to create the buffer files in, defaults to
+                ``/dev/shm`` if it exists, otherwise the temporary directory.
+            timeout: Optional number of seconds to wait for the frames of each
+                job before killing the decoder process, defaults to waiting
+                indefinitely.
+        """
+        if max_processes is None:
+            max_processes = os.cpu_count() or 1
+        if max_processes < 1:
+            raise ValueError(
+                "max_processes must be at least 1, got {}".format(max_processes)
+            )
+        if timeout is not None and timeout <= 0:
+            raise ValueError("timeout must be positive, got {}".format(timeout))
+        if dir is None and os.path.isdir("/dev/shm"):
+            dir = "/dev/shm"
+        self.backend = backend
+        self.max_processes = max_processes
+        self.dir = dir
+        self.timeout = timeout
+        self._reset()
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in ("_pid", "_processes", "_idle", "_condition", "_finalizer"):
+            del state[attribute]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._reset()
+
+    @property
+    def n_processes(self) -> int:
+        """Number of running decoder processes."""
+        self._check_pid()
+        return len(self._processes)
+
+    def decode(
+        self,
+        file: Union[str, Path, IO[bytes]],
+        frames_idx: Union[slice, List[slice], List[int]],
+        **kwargs: Any
+    ) -> np.ndarray:
+        """Decode the frames ``frames_idx`` of ``file`` in a decoder process.
+
+        Args:
+            file: Path to the video, or a file-like object holding the video data,
+                which is read and sent to the decoder process.
+            frames_idx: Frame indices as a slice, list of slices, or list of ints.
+            kwargs: Options passed on to
+                :func:`~torchvideo.internal.readers.default_loader`, e.g. ``size``.
+
+        Returns:
+            The frames as a ``(T, H, W, C)`` array.
+
+        Raises:
+            DecoderCrashedError: If the decoder process exited before returning the
+                frames.
+            DecoderTimeoutError: If the decoder process didn't return the frames
+                within ``timeout``.
+        """
+        if isinstance(file, Path):
+            file = str(file)
+        elif not isinstance(file, str):
+            file = file.read()
+        process = self._acquire()
+        crashed = False
+        try:
+            return process.decode(file, frames_idx, kwargs, self.timeout)
+        except DecoderCrashedError:
+            crashed = True
+            self._respawn(process)
+            raise
+        finally:
+            # Errors raised by the decoder leave the process ready for another job
+            if not crashed:
+                self._release(process)
+
+    def close(self) -> None:
+        """Stop the decoder processes."""
+        self._check_pid()
+        with self._condition:
+            processes = list(self._processes)
+            self._processes.clear()
+            self._idle.clear()
+            self._condition.notify_all()
+        for process in processes:
+            if process is not None:
+                process.close()
+
+    def _reset(self) -> None:
+        self._pid = os.getpid()
+        self._processes = []  # type: List[_DecoderProcess]
+        self._idle = []  # type: List[_DecoderProcess]
+        self._condition = threading.Condition()
+        self._finalizer = weakref.finalize(
+            self, _close_processes, self._processes, self._pid
+        )
+
+    def _check_pid(self) -> None:
+        if self._pid != os.getpid():
+            # The pipes of the decoder processes are shared with the process the
+            # pool was forked from, so leave them to it
+            self._reset()
+
+    def _acquire(self) -> "_DecoderProcess":
+        self._check_pid()
+        with self._condition:
+            while not self._idle and len(self._processes) >= self.max_processes:
+                self._condition.wait()
+            if self._idle:
+                return self._idle.pop()
+            # Reserve the slot whilst the process starts
+            self._processes.append(None)  # type: ignore
+        try:
+            process = _DecoderProcess(self.backend, self.dir)
+        except BaseException:
+            with self._condition:
+                self._processes.remove(None)  # type: ignore
+                self._condition.notify()
+            raise
+        with self._condition:
+            self._processes[self._processes.index(None)] = process  # type: ignore
+        return process
+
+    def _release(self, process: "_DecoderProcess") -> None:
+        with self._condition:
+            if process in self._processes:
+                self._idle.append(process)
+            self._condition.notify()
+
+    def _respawn(self, process: "_DecoderProcess") -> None:
+        process.close()
+        replacement = None  # type: Optional[_DecoderProcess]
+        try:
+            replacement = _DecoderProcess(self.backend, self.dir)
+        except Exception:
+            _LOG.warning("Failed to restart a decoder process", exc_info=True)
+        with self._condition:
+            if process in self._processes:
+                if replacement is None:
+                    self._processes.remove(process)
+                else:
+                    self._processes[self._processes.index(process)] = replacement
+                    self._idle.append(replacement)
+            elif replacement is not None:
+                # The pool was closed in the meantime
+                replacement.close()
+            self._condition.notify()
+
+
+class _DecoderProcess:
+    def __init__(self, backend: str, dir: Optional[str]) -> None:
+        from torchvideo import get_decoder_threads
+
+        fd, path = tempfile.mkstemp(prefix="torchvideo-decoder-", dir=dir)
+        self._buffer_file = os.fdopen(fd, "r+b")
+        self._buffer = None  # type: Optional[mmap.mmap]
+        try:
+            self._process = subprocess.Popen(
+                [
+                    sys.executable,
+                    "-m",
+                    __name__,
+                    path,
+                    backend,
+                    str(get_decoder_threads()),
+                ],
+                stdin=subprocess.PIPE,
+                stdout=subprocess.PIPE,
+                env=_child_env(),
+            )
+            self._receive("starting the decoder process")
+        except BaseException:
+            self.close()
+            raise
+        finally:
+            os.remove(path)
+        _LOG.debug("Started decoder process {}".format(self._process.pid))
+
+    def decode(
+        self,
+        file: Union[str, bytes],
+        frames_idx: Union[slice, List[slice], List[int]],
+        kwargs: Dict[str, Any],
+        timeout: Optional[float] = None,
+    ) -> np.ndarray:
+        description = "decoding {}".format(
+            file if isinstance(file, str) else "a video buffer"
+        )
+        try:
+            pickle.dump(
+                (file, frames_idx, kwargs),
+                self._process.stdin,
+                protocol=pickle.HIGHEST_PROTOCOL,
+            )
+            self._process.stdin.flush()
+        except (BrokenPipeError, OSError):
+            self._crashed(description)
+        reply = self._receive(description, timeout)
+        if reply[0] == _ERROR:
+            _, exception, tb = reply
+            raise exception from _RemoteTraceback(tb)
+        _, shape, dtype = reply
+        return self._read_frames(shape, np.dtype(dtype))
+
+    def close(self) -> None:
+        process = getattr(self, "_process", None)
+        if process is not None:
+            _stop_process(process)
+        if self._buffer is not None:
+            self._buffer.close()
+            self._buffer = None
+        self._buffer_file.close()
+
+    def _receive(self, description: str, timeout: Optional[float] = None) -> Any:
+        # Each reply is read in full, so nothing is left buffered between replies
+        # and waiting on the pipe itself is enough
+        if timeout is not None:
+            ready, _, _ = select.select([self._process.stdout], [], [], timeout)
+            if not ready:
+                self._process.kill()
+                self._process.wait()
+                raise DecoderTimeoutError(
+                    "Decoder process {} was killed after {}s whilst {}".format(
+                        self._process.pid, timeout, description
+                    )
+                )
+        try:
+            return pickle.load(self._process.stdout)
+        except (EOFError, pickle.UnpicklingError, OSError):
+            self._crashed(description)
+
+    def _crashed(self, description: str) -> None:
+        if self._process.poll() is None:
+            # The process can't be trusted once its replies are cut short, even
+            # if it is still running
+            self._process.kill()
+        returncode = self._process.wait()
+        raise DecoderCrashedError(
+            "Decoder process {} exited with code {} whilst {}".format(
+                self._process.pid, returncode, description
+            )
+        )
+
+    def _read_frames(self, shape: tuple, dtype: np.dtype) -> np.ndarray:
+        count = int(np.prod(shape))
+        if count == 0:
+            return np.empty(shape, dtype=dtype)
+        # The decoder process grows the buffer file when frames don't fit
+        size = os.fstat(self._buffer_file.fileno()).st_size
+        if self._buffer is None or len(self._buffer) != size:
+            if self._buffer is not None:
+                self._buffer.close()
+            self._buffer = mmap.mmap(
+                self._buffer_file.fileno(), size, access=mmap.ACCESS_READ
+            )
+        # The buffer is reused by the next job, so the frames are copied out
+        return (
+            np.frombuffer(self._buffer, dtype=dtype, count=count).reshape(shape).copy()
+        )
+
+
+def _child_env() -> Dict[str, str]:
+    # The decoder process has to import torchvideo from the same place as we did,
+    # which might not be on the default path (e.g. a source checkout)
+    package_root = str(Path(__file__).resolve().parents[2])
+    env = dict(os.environ)
+    env["PYTHONPATH"] = os.pathsep.join(
+        [package_root] + ([env["PYTHONPATH"]] if env.get("PYTHONPATH") else [])
+    )
+    return env
+
+
+def _stop_process(process: subprocess.Popen) -> None:
+    # Decoder processes exit when their stdin is closed
+    for pipe in (process.stdin, process.stdout):
+        try:
+            pipe.close()
+        except OSError:
+            pass
+    try:
+        process.wait(timeout=5)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+
+def _close_processes(processes: List[_DecoderProcess], pid: int) -> None:
+    if os.getpid() != pid:
+        return
+    for process in processes:
+        if process is not None:
+            process.close()
+
+
+def _picklable_exception(exception: BaseException) -> BaseException:
+    try:
+        pickle.loads(pickle.dumps(exception))
+        return exception
+    except Exception:
+        return RuntimeError(repr(exception))
+
+
+def _serve(buffer_path: str, backend: str, decoder_threads: str) -> None:
+    from torchvideo import set_decoder_threads
+    from torchvideo.internal.readers import default_loader
+
+    set_decoder_threads(int(decoder_threads))
+
+    # Replies are written to the original stdout, anything decoders print goes to
+    # stderr instead so it can't corrupt them
+    replies = os.fdopen(os.dup(sys.stdout.fileno()), "wb")
+    os.dup2(sys.stderr.fileno(), sys.stdout.fileno())
+    jobs = sys.stdin.buffer
+    buffer_file = open(buffer_path, "r+b")
+    buffer = None  # type: Optional[mmap.mmap]
+
+    def reply(message: Any) -> None:
+        pickle.dump(message, replies, protocol=pickle.HIGHEST_PROTOCOL)
+        replies.flush()
+
+    reply((_READY,))
+    while True:
+        try:
+            file, frames_idx, kwargs = pickle.load(jobs)
+        except EOFError:
+            return
+        if isinstance(file, bytes):
+            file = io.BytesIO(file)
+        try:
+            frames = np.ascontiguousarray(
+                default_loader(
+                    file, frames_idx, backend=backend, as_ndarray=True, **kwargs
+                )
+            )
+            if frames.nbytes:
+                if buffer is None or len(buffer) < frames.nbytes:
+                    size = frames.nbytes
+                    if buffer is not None:
+                        size = max(size, 2 * len(buffer))
+                        buffer.close()
+                    os.ftruncate(buffer_file.fileno(), size)
+                    buffer = mmap.mmap(buffer_file.fileno(), size)
+                np.frombuffer(buffer, dtype=np.uint8, count=frames.nbytes)[:] = (
+                    frames.reshape(-1).view(np.uint8)
+                )
+        except Exception as e:
+            reply((_ERROR, _picklable_exception(e), traceback.format_exc()))
+        else:
+            reply((_OK, frames.shape, frames.dtype.str))
+
+
+_POOLS = {}  # type: Dict[str, DecoderPool]
+_POOLS_LOCK = threading.Lock()
+
+
+def get_decoder_pool(backend: str) -> DecoderPool:
+    """The decoder pool of this process decoding with ``backend``, used by the
+    ``*-subprocess`` backends."""
+    with _POOLS_LOCK:
+        try:
+            return _POOLS[backend]
+        except KeyError:
+            pool = _POOLS[backend] = DecoderPool(backend)
+            return pool
+
+
+if __name__ == "__main__":
+    _serve(*sys.argv[1:])
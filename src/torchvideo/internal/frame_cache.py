@@ -0,0 +1,453 @@
+import hashlib
+import mmap
+import os
+import tempfile
+import threading
+import weakref
+from collections import OrderedDict, namedtuple
+from contextlib import contextmanager
+from typing import Callable, Dict, Hashable, Iterator, List, Optional, Tuple  # noqa
+
+import numpy as np
+
+try:
+    import fcntl
+except ImportError:  # pragma: no cover
+    fcntl = None  # type: ignore
+
+
+class FrameCacheStats(
+    namedtuple("FrameCacheStats", ("hits", "misses", "evictions", "frames", "nbytes"))
+):
+    """Counters of a :class:`FrameCache`.
+
+    Attributes:
+        hits: Number of frames served from the cache.
+        misses: Number of frames that had to be decoded.
+        evictions: Number of frames evicted to stay within the byte budget.
+        frames: Number of frames currently cached.
+        nbytes: Total size of the frames currently cached.
+    """
+
+    @property
+    def hit_rate(self) -> float:
+        """Fraction of frame lookups served from the cache."""
+        lookups = self.hits + self.misses
+        return self.hits / lookups if lookups else 0.0
+
+
+class FrameCache:
+    """Least recently used cache of decoded frames with a byte budget.
+
+    Frames are keyed by a video key (e.g. the path of the video and the size it was
+    decoded at) and the frame's index within the video. Datasets given a cache look
+    up each requested frame and only decode the frames that are missing, which pays
+    off when the same videos are loaded repeatedly, e.g. when evaluating with a
+    :class:`~torchvideo.samplers.TemporalSegmentSampler` or training for several
+    epochs on a small dataset.
+
+    The cache is local to the process using it. Each
+    :class:`~torch.utils.data.DataLoader` worker holds its own copy of the dataset
+    and so its own cache and counters, so the memory used is up to ``max_bytes``
+    per worker.
+    """
+
+    def __init__(self, max_bytes: int) -> None:
+        """
+        Args:
+            max_bytes: Maximum total size of the cached frames. Frames larger than
+                this are never cached.
+        """
+        if max_bytes < 0:
+            raise ValueError("max_bytes must be non-negative, got {}".format(max_bytes))
+        self.max_bytes = max_bytes
+        self._frames = OrderedDict()  # type: Dict[Tuple[Hashable, int], np.ndarray]
+        self._nbytes = 0
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def __len__(self) -> int:
+        return len(self._frames)
+
+    @property
+    def nbytes(self) -> int:
+        """Total size of the frames currently cached."""
+        return self._nbytes
+
+    def stats(self) -> FrameCacheStats:
+        """Current counters of the cache."""
+        return FrameCacheStats(
+            hits=self._hits,
+            misses=self._misses,
+            evictions=self._evictions,
+            frames=len(self._frames),
+            nbytes=self._nbytes,
+        )
+
+    def reset_stats(self) -> None:
+        """Zero the hit, miss and eviction counters."""
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def clear(self) -> None:
+        """Remove every cached frame."""
+        self._frames.clear()
+        self._nbytes = 0
+
+    def get_frames(
+        self,
+        video_key: Hashable,
+        frame_numbers: np.ndarray,
+        decode: Callable[[List[int]], np.ndarray],
+    ) -> np.ndarray:
+        """Look up frames of a video, decoding those that aren't cached.
+
+        Args:
+            video_key: Hashable key identifying the video and how it was decoded.
+            frame_numbers: Unique frame indices to look up.
+            decode: Callable decoding the frames at the list of indices it is passed,
+                returning them as a ``(T, H, W, C)`` array. Only called with the
+                frames that missed the cache, in the order of ``frame_numbers``.
+
+        Returns:
+            The frames as a ``(len(frame_numbers), H, W, C)`` array.
+        """
+        frame_numbers = [int(n) for n in frame_numbers]
+        keys = [(video_key, frame_number) for frame_number in frame_numbers]
+        cached_frames = self._lookup(keys)
+        missing = [
+            frame_number
+            for frame_number, frame in zip(frame_numbers, cached_frames)
+            if frame is None
+        ]
+        self._count_lookups(len(frame_numbers) - len(missing), len(missing))
+        if not missing:
+            return np.stack(cached_frames)
+        decoded = decode(missing)
+        if len(missing) == len(frame_numbers):
+            frames = np.asarray(decoded)
+        else:
+            frames = np.empty(
+                (len(frame_numbers),) + decoded.shape[1:], dtype=decoded.dtype
+            )
+            decoded_iter = iter(decoded)
+            for i, frame in enumerate(cached_frames):
+                frames[i] = next(decoded_iter) if frame is None else frame
+        self._store([(video_key, frame_number) for frame_number in missing], decoded)
+        return frames
+
+    def _count_lookups(self, hits: int, misses: int) -> None:
+        self._hits += hits
+        self._misses += misses
+
+    def _lookup(self, keys: List[Tuple[Hashable, int]]) -> List[Optional[np.ndarray]]:
+        frames = []  # type: List[Optional[np.ndarray]]
+        for key in keys:
+            frame = self._frames.get(key)
+            if frame is not None:
+                self._frames.move_to_end(key)
+            frames.append(frame)
+        return frames
+
+    def _store(self, keys: List[Tuple[Hashable, int]], frames: np.ndarray) -> None:
+        for key, frame in zip(keys, frames):
+            if frame.nbytes > self.max_bytes:
+                continue
+            # Copy so that cached frames don't keep the rest of the batch alive
+            frame = np.array(frame)
+            self._frames[key] = frame
+            self._nbytes += frame.nbytes
+            while self._nbytes > self.max_bytes:
+                _, evicted = self._frames.popitem(last=False)
+                self._nbytes -= evicted.nbytes
+                self._evictions += 1
+
+
+# Header fields of a SharedFrameCache
+_HAND, _HITS, _MISSES, _EVICTIONS, _FRAMES, _NBYTES = range(6)
+_HEADER_SIZE = 8
+_MAX_FRAME_NDIM = 3
+_ALIGNMENT = 64
+
+
+class SharedFrameCache(FrameCache):
+    """:class:`FrameCache` held in shared memory, so that all
+    :class:`~torch.utils.data.DataLoader` workers of a dataset share one cache.
+
+    A frame decoded by one worker is served from the cache to every other worker,
+    so the working set is held once rather than once per worker. The cache is
+    backed by a memory mapped file (in ``/dev/shm`` where available) that is
+    inherited by forked workers and reopened by spawned workers when the dataset
+    is unpickled. The file is removed when the cache is garbage collected in the
+    process that created it, which must outlive its workers.
+
+    Frames are stored in fixed size slots of ``max_frame_bytes``, and only
+    ``uint8`` frames that fit in a slot are cached. Set ``max_frame_bytes`` to the
+    size of the frames of the dataset, e.g. by decoding at a fixed ``frame_size``,
+    to avoid wasting memory. Frames are found through an open addressing hash
+    table held in the same file, and when the cache is full a slot is reused with
+    the clock algorithm: a hand sweeps the slots, sparing (once) those hit since it
+    last passed, which approximates least recently used eviction without scanning
+    every slot. Lookups and updates are serialised by an ``flock`` on the backing
+    file, frames are copied out of the cache whilst holding it.
+    """
+
+    def __init__(
+        self, max_bytes: int, max_frame_bytes: int, dir: Optional[str] = None
+    ) -> None:
+        """
+        Args:
+            max_bytes: Maximum total size of the cache, shared by all processes.
+            max_frame_bytes: Size of each slot of the cache, the size of the largest
+                frame that can be cached.
+            dir: Optional directory to create the backing file in, defaults to
+                ``/dev/shm`` if it exists, otherwise the temporary directory.
+        """
+        super().__init__(max_bytes)
+        if fcntl is None:  # pragma: no cover
+            raise RuntimeError("SharedFrameCache requires a POSIX platform")
+        if max_frame_bytes <= 0:
+            raise ValueError(
+                "max_frame_bytes must be positive, got {}".format(max_frame_bytes)
+            )
+        self.max_frame_bytes = max_frame_bytes
+        self.n_slots = max_bytes // max_frame_bytes
+        if self.n_slots == 0:
+            raise ValueError(
+                "max_bytes ({}) must be at least max_frame_bytes ({})".format(
+                    max_bytes, max_frame_bytes
+                )
+            )
+        if dir is None and os.path.isdir("/dev/shm"):
+            dir = "/dev/shm"
+        fd, self.path = tempfile.mkstemp(prefix="torchvideo-frames-", dir=dir)
+        try:
+            os.ftruncate(fd, self._file_size())
+        finally:
+            os.close(fd)
+        self._open()
+        self._finalizer = weakref.finalize(self, _remove_file, self.path)
+
+    def __getstate__(self):
+        state = self.__dict__.copy()
+        for attribute in (
+            "_mmap",
+            "_header",
+            "_index",
+            "_keys",
+            "_referenced",
+            "_shapes",
+            "_data",
+            "_lock_file",
+            "_thread_lock",
+        ):
+            del state[attribute]
+        # Only the process that created the cache removes its file
+        del state["_finalizer"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._open()
+
+    def __len__(self) -> int:
+        return int(self._header[_FRAMES])
+
+    @property
+    def nbytes(self) -> int:
+        return int(self._header[_NBYTES])
+
+    def stats(self) -> FrameCacheStats:
+        with self._lock():
+            header = self._header.copy()
+        return FrameCacheStats(
+            hits=int(header[_HITS]),
+            misses=int(header[_MISSES]),
+            evictions=int(header[_EVICTIONS]),
+            frames=int(header[_FRAMES]),
+            nbytes=int(header[_NBYTES]),
+        )
+
+    def reset_stats(self) -> None:
+        with self._lock():
+            self._header[[_HITS, _MISSES, _EVICTIONS]] = 0
+
+    def clear(self) -> None:
+        with self._lock():
+            self._index[:] = 0
+            self._keys[:] = 0
+            self._referenced[:] = 0
+            self._header[[_HAND, _FRAMES, _NBYTES]] = 0
+
+    def _file_size(self) -> int:
+        return self._data_offset() + self.n_slots * self.max_frame_bytes
+
+    def _index_size(self) -> int:
+        # Power of two at least twice the number of slots, so the table is at most
+        # half full and probe sequences stay short
+        return 1 << (2 * self.n_slots - 1).bit_length()
+
+    def _metadata_count(self) -> int:
+        return (
+            _HEADER_SIZE + self._index_size() + self.n_slots * (2 + _MAX_FRAME_NDIM + 1)
+        )
+
+    def _data_offset(self) -> int:
+        metadata_size = 8 * self._metadata_count()
+        return -(-metadata_size // _ALIGNMENT) * _ALIGNMENT
+
+    @contextmanager
+    def _lock(self) -> Iterator[None]:
+        if self._lock_pid != os.getpid():
+            # flock is held by an open file description, which forked processes
+            # share, so each process needs its own
+            self._open_lock()
+        with self._thread_lock:
+            fcntl.flock(self._lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(self._lock_file, fcntl.LOCK_UN)
+
+    def _open_lock(self) -> None:
+        self._lock_file = open(self.path, "rb")
+        self._lock_pid = os.getpid()
+        self._thread_lock = threading.Lock()
+
+    def _open(self) -> None:
+        self._open_lock()
+        with open(self.path, "r+b") as f:
+            self._mmap = mmap.mmap(f.fileno(), self._file_size())
+        n = self.n_slots
+        metadata = np.frombuffer(
+            self._mmap, dtype=np.int64, count=self._metadata_count()
+        )
+        self._header = metadata[:_HEADER_SIZE]
+        offset = _HEADER_SIZE + self._index_size()
+        # Open addressing hash table of key hashes, holding 1 + the slot of each
+        # cached frame and 0 in empty entries
+        self._index = metadata[_HEADER_SIZE:offset]
+        # Hash of the key of the frame in each slot, 0 for empty slots
+        self._keys = metadata[offset : offset + n]
+        # Whether each slot has been hit since the clock hand last passed it
+        self._referenced = metadata[offset + n : offset + 2 * n]
+        # Number of dimensions followed by the shape of the frame in each slot
+        self._shapes = metadata[offset + 2 * n :].reshape(n, _MAX_FRAME_NDIM + 1)
+        self._data = np.frombuffer(
+            self._mmap, dtype=np.uint8, offset=self._data_offset()
+        ).reshape(n, self.max_frame_bytes)
+
+    def _probe(self, key_hash: int) -> int:
+        """Position of ``key_hash`` in the index, or of the empty entry ending its
+        probe sequence if it isn't there."""
+        mask = len(self._index) - 1
+        position = key_hash & mask
+        while True:
+            entry = int(self._index[position])
+            if entry == 0 or self._keys[entry - 1] == key_hash:
+                return position
+            position = (position + 1) & mask
+
+    def _find(self, key_hash: int) -> Optional[int]:
+        entry = int(self._index[self._probe(key_hash)])
+        return entry - 1 if entry else None
+
+    def _unindex(self, key_hash: int) -> None:
+        """Remove ``key_hash`` from the index, shifting back the entries after it
+        so that probe sequences never cross an empty entry."""
+        mask = len(self._index) - 1
+        hole = self._probe(key_hash)
+        position = hole
+        while True:
+            position = (position + 1) & mask
+            entry = int(self._index[position])
+            if entry == 0:
+                break
+            home = int(self._keys[entry - 1]) & mask
+            # Move the entry into the hole unless its home lies cyclically in
+            # (hole, position], in which case it would no longer be found
+            if (position - home) & mask >= (position - hole) & mask:
+                self._index[hole] = entry
+                hole = position
+        self._index[hole] = 0
+
+    def _victim(self) -> int:
+        """Advance the clock hand to a slot to reuse, clearing the referenced flag of
+        each slot it passes over."""
+        while True:
+            slot = int(self._header[_HAND])
+            self._header[_HAND] = (slot + 1) % self.n_slots
+            if self._keys[slot] == 0 or not self._referenced[slot]:
+                return slot
+            self._referenced[slot] = 0
+
+    def _count_lookups(self, hits: int, misses: int) -> None:
+        with self._lock():
+            self._header[_HITS] += hits
+            self._header[_MISSES] += misses
+
+    def _lookup(self, keys: List[Tuple[Hashable, int]]) -> List[Optional[np.ndarray]]:
+        frames = []  # type: List[Optional[np.ndarray]]
+        with self._lock():
+            for key in keys:
+                slot = self._find(_hash_key(key))
+                if slot is None:
+                    frames.append(None)
+                    continue
+                self._referenced[slot] = 1
+                ndim = self._shapes[slot, 0]
+                shape = tuple(self._shapes[slot, 1 : ndim + 1])
+                # Copy the frame out as the slot can be reused once unlocked
+                frames.append(
+                    self._data[slot, : int(np.prod(shape))].reshape(shape).copy()
+                )
+        return frames
+
+    def _store(self, keys: List[Tuple[Hashable, int]], frames: np.ndarray) -> None:
+        with self._lock():
+            for key, frame in zip(keys, frames):
+                if (
+                    frame.dtype != np.uint8
+                    or frame.ndim > _MAX_FRAME_NDIM
+                    or frame.nbytes > self.max_frame_bytes
+                ):
+                    continue
+                key_hash = _hash_key(key)
+                slot = self._find(key_hash)
+                if slot is not None:
+                    # Another worker cached the frame in the meantime
+                    self._referenced[slot] = 1
+                    continue
+                slot = self._victim()
+                if self._keys[slot] != 0:
+                    self._unindex(int(self._keys[slot]))
+                    self._header[_EVICTIONS] += 1
+                    self._header[_NBYTES] -= np.prod(
+                        self._shapes[slot, 1 : self._shapes[slot, 0] + 1]
+                    )
+                else:
+                    self._header[_FRAMES] += 1
+                self._keys[slot] = key_hash
+                self._index[self._probe(key_hash)] = slot + 1
+                self._referenced[slot] = 0
+                self._shapes[slot] = 0
+                self._shapes[slot, 0] = frame.ndim
+                self._shapes[slot, 1 : frame.ndim + 1] = frame.shape
+                self._data[slot, : frame.nbytes] = frame.reshape(-1)
+                self._header[_NBYTES] += frame.nbytes
+
+
+def _hash_key(key: Tuple[Hashable, int]) -> int:
+    """Hash of ``key`` that is stable across processes (unlike :func:`hash`), and
+    never 0, which marks empty slots."""
+    digest = hashlib.sha1(repr(key).encode("utf-8")).digest()
+    return int.from_bytes(digest[:8], "little", signed=True) or 1
+
+
+def _remove_file(path: str) -> None:
+    try:
+        os.remove(path)
+    except OSError:
+        pass
@@ -0,0 +1,140 @@
+import logging
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from functools import partial
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+_LOG = logging.getLogger(__name__)
+
+#: Called with ``(videos_done, videos_total)`` as frame counting progresses.
+ProgressCallback = Callable[[int, int], None]
+
+
+class FrameCountError(Exception):
+    """Raised when the frame count of one or more videos can't be determined.
+
+    Attributes:
+        failures: Dictionary mapping each video that failed to the exception raised
+            whilst counting its frames.
+    """
+
+    _max_listed_failures = 20
+
+    def __init__(self, failures: Dict[Path, Exception]) -> None:
+        self.failures = failures
+        listed = [
+            "  {}: {!r}".format(path, error)
+            for path, error in list(failures.items())[: self._max_listed_failures]
+        ]
+        if len(failures) > len(listed):
+            listed.append("  ... and {} more".format(len(failures) - len(listed)))
+        super().__init__(
+            "Failed to count the frames of {} videos:\n{}".format(
+                len(failures), "\n".join(listed)
+            )
+        )
+
+
+def count_frames(
+    video_paths: Sequence[Path],
+    frame_counter: Callable[[Path], int],
+    workers: int = 0,
+    use_processes: bool = False,
+    progress: Optional[ProgressCallback] = None,
+    progress_interval: float = 5,
+) -> List[int]:
+    """Count the frames of every video in ``video_paths``.
+
+    Args:
+        video_paths: Paths of the videos to count.
+        frame_counter: Callable returning the number of frames of the video at the
+            path it is passed. It must be picklable if ``use_processes`` is set.
+        workers: Number of threads (or processes) to count frames with, ``0`` counts
+            them serially in the calling thread.
+        use_processes: Whether to use a process pool rather than a thread pool. A
+            thread pool suits frame counters that spawn subprocesses or read from
+            disk, a process pool suits frame counters that parse files in python.
+        progress: Optional callback for reporting progress, by default progress is
+            logged at ``INFO`` level.
+        progress_interval: Minimum number of seconds between progress reports.
+
+    Returns:
+        The frame count of each video, in the same order as ``video_paths``.
+
+    Raises:
+        FrameCountError: If any of the videos couldn't be counted, after attempting to
+            count all of them.
+    """
+    if progress is None:
+        progress = _log_progress
+    count = partial(_try_count_frames, frame_counter)
+    total = len(video_paths)
+    if workers == 0:
+        return _collect_counts(
+            map(count, video_paths), total, progress, progress_interval
+        )
+    executor_cls = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+    with executor_cls(max_workers=workers) as executor:
+        if use_processes:
+            chunksize = max(1, total // (workers * 16))
+            results = executor.map(count, video_paths, chunksize=chunksize)
+        else:
+            results = executor.map(count, video_paths)
+        return _collect_counts(results, total, progress, progress_interval)
+
+
+def _try_count_frames(
+    frame_counter: Callable[[Path], int], video_path: Path
+) -> Tuple[Path, Optional[int], Optional[Exception]]:
+    try:
+        return video_path, frame_counter(video_path), None
+    except Exception as e:
+        return video_path, None, e
+
+
+def _collect_counts(results, total, progress, progress_interval) -> List[int]:
+    counts = []  # type: List[int]
+    failures = {}  # type: Dict[Path, Exception]
+    last_report_time = time.monotonic()
+    for path, frame_count, error in results:
+        if error is not None:
+            _LOG.debug("Failed to count frames of {}: {!r}".format(path, error))
+            failures[path] = error
+        counts.append(frame_count)
+        now = time.monotonic()
+        if now - last_report_time >= progress_interval:
+            progress(len(counts), total)
+            last_report_time = now
+    progress(len(counts), total)
+    if failures:
+        raise FrameCountError(failures)
+    return counts
+
+
+def _log_progress(done: int, total: int) -> None:
+    _LOG.info("Counted frames of {}/{} videos".format(done, total))
+
+
+def probe_videos(
+    video_paths: Sequence[Path], probe: Callable[[Path], Any], workers: int = 0
+) -> List[Optional[Any]]:
+    """Apply ``probe`` to every video in ``video_paths`` on a pool of ``workers``
+    threads, for gathering optional metadata like resolution.
+
+    Returns:
+        The result of ``probe`` for each video, ``None`` for videos where ``probe``
+        raised an exception.
+    """
+
+    def try_probe(video_path: Path) -> Optional[Any]:
+        try:
+            return probe(video_path)
+        except Exception as e:
+            _LOG.warning("Failed to probe {}: {!r}".format(video_path, e))
+            return None
+
+    if workers == 0:
+        return list(map(try_probe, video_paths))
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        return list(executor.map(try_probe, video_paths))
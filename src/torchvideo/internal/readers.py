@@ -1,19 +1,60 @@
+import importlib.util
 import logging
 import subprocess
 from collections import namedtuple
+from fractions import Fraction
+from functools import partial
 
 import numpy as np
 
 from pathlib import Path
-from typing import Union, List, Iterator, IO
+from typing import (
+    Any,
+    Union,
+    List,
+    Iterator,
+    IO,
+    Callable,
+    Dict,
+    Iterable,
+    Optional,
+    Tuple,
+)
 
 from PIL import Image
 
-from torchvideo.samplers import frame_idx_to_list
+from torchvideo.samplers import IndexPlan, MultiClip, frame_idx_to_list
+from .buffers import BUFFER_READ, BufferLike, open_video_buffer
+from .container_probe import ContainerProbeError, VideoInfo, probe_container
+from .decoder_pool import DecoderCrashedError, DecoderPool, get_decoder_pool  # noqa
+from .frame_cache import FrameCache, FrameCacheStats, SharedFrameCache  # noqa
+from .video_index import VideoIndex, build_video_index, load_video_index
 
 _LOG = logging.getLogger(__name__)
 
-VideoInfo = namedtuple("VideoInfo", ("height", "width", "n_frames"))
+VideoBackend = namedtuple("VideoBackend", ("name", "loader", "module", "capabilities"))
+"""A decoder backend. ``loader`` has the same signature as :func:`default_loader`,
+``module`` is the python module the backend needs to be importable and
+``capabilities`` is a ``frozenset`` of the ``CAP_*`` flags the backend supports."""
+
+#: The backend can seek to a frame without decoding every frame before it.
+CAP_SEEK = "seek"
+#: The backend decodes straight into a contiguous ``(T, H, W, C)`` ndarray.
+CAP_NDARRAY = "ndarray"
+#: The backend can scale frames during decoding.
+CAP_RESIZE = "resize"
+#: The backend can load single channel (luma) frames.
+CAP_GRAYSCALE = "grayscale"
+#: The backend can trade decoding accuracy for speed.
+CAP_FAST_DECODE = "fast_decode"
+#: The backend takes frame indices as a :class:`~torchvideo.samplers.IndexPlan`.
+CAP_INDEX_PLAN = "index_plan"
+
+#: Size to decode frames at, either the maximum length of the shorter side of the
+#: frame or an exact ``(height, width)``.
+FrameSize = Union[int, Tuple[int, int]]
+
+_VIDEO_BACKENDS = {}  # type: Dict[str, VideoBackend]
 _VIDEO_FILE_EXTENSIONS = {
     "mp4",
     "webm",
@@ -28,65 +69,746 @@ _VIDEO_FILE_EXTENSIONS = {
 
 
 def lintel_loader(
-    file: Union[str, Path, IO[bytes]], frames_idx: Union[slice, List[slice], List[int]]
-) -> Iterator[Image.Image]:
-    import lintel
+    file: Union[str, Path, IO[bytes]],
+    frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+    buffer: str = BUFFER_READ,
+    as_ndarray: bool = False,
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+) -> Union[Iterator[Image.Image], np.ndarray]:
+    """Load frames using lintel.
 
+    Args:
+        file: Path to the video, or a file-like object holding the video data.
+        frames_idx: Frame indices as an :class:`~torchvideo.samplers.IndexPlan`,
+            slice, list of slices, or list of ints.
+        buffer: How the video file is handed to lintel, one of ``"read"`` (read
+            into a new ``bytes`` object), ``"pooled"`` (read into a reused
+            per-thread buffer) or ``"mmap"`` (memory map the file). Only used when
+            ``file`` is a path. ``"pooled"`` and ``"mmap"`` pass the buffer to lintel
+            without copying it, which requires a lintel build that accepts any
+            object supporting the buffer protocol: released lintel builds only
+            accept ``bytes`` and raise :class:`TypeError` for other buffers, so
+            these modes have no effect with them.
+        as_ndarray: Return the frames as a ``(T, H, W, 3)`` uint8 array instead of
+            PIL images, see :func:`default_loader`.
+        size: Optional size to scale frames to whilst decoding, see
+            :func:`default_loader`. Scaling to a maximum short side requires the
+            resolution of the video, so frames from file-like objects and videos
+            whose container can't be probed are decoded at full resolution and
+            resized afterwards.
+        grayscale: Load single channel luma frames, see :func:`default_loader`.
+            lintel only outputs RGB, so frames are converted after decoding.
+    """
     if isinstance(file, str):
         file = Path(file)
     if isinstance(file, Path):
         _LOG.debug("Loading data from {}".format(file))
-        with file.open("rb") as f:
-            video = f.read()
-    else:
-        video = file.read()
-
-    frames_idx = np.array(frame_idx_to_list(frames_idx))
-    assert isinstance(frames_idx, np.ndarray)
-    load_idx, reconstruction_idx = np.unique(frames_idx, return_inverse=True)
-    _LOG.debug("Converted frames_idx {} to load_idx {}".format(frames_idx, load_idx))
-    frames_data, width, height = lintel.loadvid_frame_nums(
-        video, frame_nums=load_idx, should_seek=False
-    )
+
+    decode_size = None  # type: Optional[Tuple[int, int]]
+    if isinstance(size, tuple):
+        decode_size = size
+    elif size is not None and isinstance(file, Path):
+        try:
+            info = probe_container(file)
+            decode_size = _scaled_size(info.height, info.width, size)
+        except ContainerProbeError as e:
+            _LOG.debug("Unable to probe {} for scaling: {}".format(file, e))
+
+    plan = IndexPlan.from_frame_idx(frames_idx)
+    with open_video_buffer(file, buffer=buffer) as video:
+        frames_data, width, height = _lintel_loadvid_frame_nums(
+            video, plan.load_idx, size=decode_size
+        )
     frames = np.frombuffer(frames_data, dtype=np.uint8)
-    # TODO: Support 1 channel grayscale video
-    frames = np.reshape(frames, newshape=(len(load_idx), height, width, 3))
-    frames = frames[reconstruction_idx]
+    frames = np.reshape(frames, newshape=(len(plan.load_idx), height, width, 3))
+    if size is not None and decode_size is None:
+        frames = _resize_frames(frames, size)
+    if grayscale:
+        frames = _rgb_to_luma(frames)
+    return _reconstruct_frames(frames, plan.reconstruction_idx, as_ndarray)
+
+
+def _lintel_loadvid_frame_nums(
+    video: BufferLike, load_idx: np.ndarray, size: Optional[Tuple[int, int]] = None
+) -> Tuple[bytes, int, int]:
+    import lintel
+
+    kwargs = {}  # type: Dict[str, Any]
+    if size is not None:
+        # lintel scales frames with swscale as they are decoded
+        kwargs = {"height": size[0], "width": size[1]}
+    result = lintel.loadvid_frame_nums(
+        video, frame_nums=load_idx, should_seek=False, **kwargs
+    )
+    if isinstance(result, tuple):
+        return result
+    # lintel only returns the frame size when it isn't given one
+    assert size is not None
+    return result, size[1], size[0]
+
+
+def pyav_loader(
+    file: Union[str, Path, IO[bytes]],
+    frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+    seek: bool = True,
+    as_ndarray: bool = False,
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+) -> Union[Iterator[Image.Image], np.ndarray]:
+    """Load frames using PyAV.
+
+    Args:
+        file: Path to the video, or a file-like object holding the video data.
+        frames_idx: Frame indices as an :class:`~torchvideo.samplers.IndexPlan`,
+            slice, list of slices, or list of ints.
+        seek: Whether to seek to the keyframe before the first requested frame rather
+            than decoding every frame from the start of the video. Seeking is frame
+            accurate, frames are identified by their presentation timestamp. The
+            keyframes are read from the video's index sidecar if one exists (see
+            :func:`~torchvideo.internal.video_index.index_video_folder`), otherwise
+            the video is demuxed to find them. When seeking, sparse frames (e.g.
+            from a sampler with a ``frame_step``) are also cheaper to load: the
+            decoder skips non-reference frames that weren't requested and seeks
+            past whole GOPs without requested frames.
+        as_ndarray: Return the frames as a ``(T, H, W, 3)`` uint8 array instead of
+            PIL images, see :func:`default_loader`.
+        size: Optional size to scale frames to, see :func:`default_loader`. Frames
+            are scaled by swscale in the same pass that converts them to RGB.
+        grayscale: Load single channel luma frames, see :func:`default_loader`.
+            Only the luma plane of the decoded frames is converted, skipping chroma
+            upsampling and the conversion to RGB.
+        fast_decode: Trade accuracy for speed, see :func:`default_loader`. The
+            decoder skips the loop (deblocking) filter and enables codec shortcuts
+            that aren't bit exact (``flags2=+fast``), and frames are converted to
+            RGB with swscale's fast bilinear filter.
+    """
+    import av
+    from torchvideo import get_decoder_threads
+
+    if isinstance(file, Path):
+        file = str(file)
+    index = None
+    if isinstance(file, str):
+        _LOG.debug("Loading data from {}".format(file))
+        if seek:
+            index = load_video_index(file)
+
+    plan = IndexPlan.from_frame_idx(frames_idx)
+    with av.open(file) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.thread_count = get_decoder_threads()
+        if fast_decode:
+            stream.codec_context.options = {
+                "skip_loop_filter": "all",
+                "flags2": "+fast",
+            }
+        if seek:
+            numbered_frames = _seek_pyav_frames(
+                container, stream, plan.load_idx, index=index
+            )
+        else:
+            numbered_frames = enumerate(container.decode(stream))
+        frames = _decode_pyav_frames(
+            numbered_frames,
+            plan.load_idx,
+            size=size,
+            grayscale=grayscale,
+            fast_decode=fast_decode,
+        )
+    return _reconstruct_frames(frames, plan.reconstruction_idx, as_ndarray)
+
+
+def subprocess_loader(
+    file: Union[str, Path, IO[bytes]],
+    frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+    backend: str = "pyav",
+    as_ndarray: bool = False,
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+) -> Union[Iterator[Image.Image], np.ndarray]:
+    """Load frames in a long-lived decoder process, see :class:`DecoderPool`.
+
+    A crash in the decoder (e.g. a segfault in a codec) kills the decoder process
+    rather than the process loading the video, and raises
+    :class:`DecoderCrashedError`. This is registered as the ``"pyav-subprocess"``
+    and ``"lintel-subprocess"`` backends.
+
+    Args:
+        file: Path to the video, or a file-like object holding the video data.
+        frames_idx: Frame indices as an :class:`~torchvideo.samplers.IndexPlan`,
+            slice, list of slices, or list of ints.
+        backend: Name of the backend the decoder process decodes the video with.
+        as_ndarray: Return the frames as a ``(T, H, W, 3)`` uint8 array instead of
+            PIL images, see :func:`default_loader`.
+        size: Optional size to scale frames to, see :func:`default_loader`.
+        grayscale: Load single channel luma frames, see :func:`default_loader`.
+        fast_decode: Trade accuracy for speed, see :func:`default_loader`.
+    """
+    frames = get_decoder_pool(backend).decode(
+        file, frames_idx, size=size, grayscale=grayscale, fast_decode=fast_decode
+    )
+    if as_ndarray:
+        return frames
+    return _to_pil_frames(frames)
+
+
+def stream_pyav_frames(
+    file: Union[str, Path, IO[bytes]],
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+    frame_filter: Optional[Callable[[int], bool]] = None,
+) -> Iterator[Tuple[int, float, np.ndarray]]:
+    """Decode every frame of a video in a single sequential pass with PyAV.
+
+    Unlike :func:`pyav_loader`, frames are yielded as they are decoded rather than
+    collected, so only one frame is held in memory at a time.
+
+    Args:
+        file: Path to the video, or a file-like object holding the video data.
+        size: Optional size to scale frames to, see :func:`default_loader`.
+        grayscale: Yield single channel luma frames, see :func:`default_loader`.
+        fast_decode: Trade accuracy for speed, see :func:`default_loader`.
+        frame_filter: Optional predicate on frame numbers, frames for which it
+            returns ``False`` are decoded (later frames may depend on them) but not
+            converted or yielded.
+
+    Returns:
+        Iterator of ``(frame_number, timestamp, frame)`` triples in presentation
+        order, where ``timestamp`` is the presentation time of the frame in seconds
+        and ``frame`` is a ``(H, W, C)`` uint8 array.
+    """
+    import av
+    from torchvideo import get_decoder_threads
+
+    if isinstance(file, Path):
+        file = str(file)
+    if isinstance(file, str):
+        _LOG.debug("Streaming frames from {}".format(file))
+    with av.open(file) as container:
+        stream = container.streams.video[0]
+        stream.thread_type = "AUTO"
+        stream.thread_count = get_decoder_threads()
+        if fast_decode:
+            stream.codec_context.options = {
+                "skip_loop_filter": "all",
+                "flags2": "+fast",
+            }
+        frame_rate = stream.average_rate
+        for frame_number, frame in enumerate(container.decode(stream)):
+            if frame_filter is not None and not frame_filter(frame_number):
+                continue
+            if frame.time is not None:
+                timestamp = float(frame.time)
+            elif frame_rate:
+                timestamp = float(frame_number / frame_rate)
+            else:
+                timestamp = float("nan")
+            yield frame_number, timestamp, _pyav_frame_to_ndarray(
+                frame, size, grayscale, fast_decode
+            )
+
+
+def _seek_pyav_frames(
+    container, stream, load_idx: np.ndarray, index: Optional[VideoIndex] = None
+) -> Iterator[Tuple[int, Any]]:
+    """Seek ``container`` to the keyframe before the first frame of ``load_idx`` and
+    decode the frames ``load_idx`` (sorted and unique) from there.
+
+    Frames that aren't requested are only decoded when other frames depend on them:
+    the decoder skips unrequested non-reference frames, and when the next requested
+    frame lies beyond the next keyframe the container is seeked to that keyframe
+    rather than decoding the frames in between.
+
+    Args:
+        container: PyAV input container.
+        stream: Video stream of ``container`` to decode.
+        load_idx: Frames to decode.
+        index: Optional precomputed index of ``stream``, built by demuxing the
+            container if not given.
+
+    Returns:
+        Iterator of ``(frame_number, frame)`` pairs in presentation order, including
+        every frame of ``load_idx`` that exists and possibly others.
+    """
+    if index is None:
+        index = build_video_index(container, stream)
+    if index is None or len(index.frame_pts) == 0:
+        _LOG.debug("Unable to index {}, decoding from the start".format(stream))
+        container.seek(0)
+        return enumerate(container.decode(stream))
+    return _decode_requested_pyav_frames(container, stream, load_idx, index)
+
+
+def _decode_requested_pyav_frames(
+    container, stream, load_idx: np.ndarray, index: VideoIndex
+) -> Iterator[Tuple[int, Any]]:
+    frame_pts = index.frame_pts.tolist()
+    frame_numbers = {pts: n for n, pts in enumerate(frame_pts)}
+    # Frames beyond the end of the video are filled with the final frame
+    load_idx = np.minimum(load_idx, len(frame_pts) - 1)
+    requested_pts = {frame_pts[n] for n in load_idx.tolist()}
+    codec_context = stream.codec_context
+    last_decoded = -1
+    position = 0
+    while position < len(load_idx):
+        keyframe = index.keyframe_before(int(load_idx[position]))
+        if keyframe > last_decoded:
+            _LOG.debug(
+                "Seeking to keyframe {} for frame {}".format(
+                    keyframe, load_idx[position]
+                )
+            )
+            container.seek(frame_pts[keyframe], stream=stream, backward=True)
+        for packet in container.demux(stream):
+            # Non-reference frames can always be skipped without affecting the
+            # frames decoded after them
+            if packet.pts is None or packet.pts in requested_pts:
+                codec_context.skip_frame = "DEFAULT"
+            else:
+                codec_context.skip_frame = "NONREF"
+            for frame in packet.decode():
+                frame_number = frame_numbers.get(frame.pts)
+                if frame_number is None:
+                    continue
+                last_decoded = frame_number
+                yield frame_number, frame
+            if last_decoded >= load_idx[position]:
+                break
+        else:
+            return
+        position = int(np.searchsorted(load_idx, last_decoded, side="right"))
+
+
+def _decode_pyav_frames(
+    numbered_frames: Iterable[Tuple[int, Any]],
+    load_idx: np.ndarray,
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+) -> np.ndarray:
+    """Decode the frames in ``load_idx`` (sorted and unique) from ``numbered_frames``,
+    an iterable of ``(frame_number, frame)`` pairs in presentation order, scaling
+    them to ``size`` if given and converting them to luma if ``grayscale`` is set.
+    Frames are converted with the fast bilinear filter if ``fast_decode`` is set.
+
+    Indices beyond the end of the video are filled with the final frame of the video,
+    matching the behaviour of lintel.
+    """
+    frames = []  # type: List[np.ndarray]
+    last_frame = None
+    for frame_number, frame in numbered_frames:
+        if len(frames) == len(load_idx):
+            break
+        frame_array = None
+        while len(frames) < len(load_idx) and load_idx[len(frames)] <= frame_number:
+            if frame_array is None:
+                frame_array = _pyav_frame_to_ndarray(
+                    frame, size, grayscale, fast_decode
+                )
+            frames.append(frame_array)
+        last_frame = frame
+    if len(frames) < len(load_idx):
+        if last_frame is None:
+            raise ValueError("Could not decode any frames from video")
+        final_frame = _pyav_frame_to_ndarray(last_frame, size, grayscale, fast_decode)
+        frames.extend([final_frame] * (len(load_idx) - len(frames)))
+    return np.stack(frames)
+
+
+def _pyav_frame_to_ndarray(
+    frame,
+    size: Optional[FrameSize] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+) -> np.ndarray:
+    kwargs = {}  # type: Dict[str, Any]
+    if size is not None:
+        height, width = _scaled_size(frame.height, frame.width, size)
+        kwargs = {"width": width, "height": height}
+    if fast_decode:
+        kwargs["interpolation"] = "FAST_BILINEAR"
+    if grayscale:
+        return frame.to_ndarray(format="gray", **kwargs)[..., np.newaxis]
+    return frame.to_ndarray(format="rgb24", **kwargs)
+
+
+def _to_pil_frames(frames: np.ndarray) -> Iterator[Image.Image]:
+    if frames.ndim == 4 and frames.shape[-1] == 1:
+        # Single channel frames become mode "L" images
+        frames = frames[..., 0]
     return (Image.fromarray(frame) for frame in frames)
 
 
+def _reconstruct_frames(
+    frames: np.ndarray, reconstruction_idx: np.ndarray, as_ndarray: bool
+) -> Union[Iterator[Image.Image], np.ndarray]:
+    """Arrange the decoded ``frames`` in the requested order, as PIL images or as an
+    array."""
+    if not as_ndarray:
+        return _to_pil_frames(frames[reconstruction_idx])
+    if len(reconstruction_idx) == len(frames) and np.array_equal(
+        reconstruction_idx, np.arange(len(frames))
+    ):
+        # Requested frames were sorted and unique, so the decoded array is already in
+        # the right order and doesn't need copying
+        return frames
+    return frames[reconstruction_idx]
+
+
+def _split_clips(
+    frames: np.ndarray, clips: MultiClip, as_ndarray: bool
+) -> Union[List[List[Image.Image]], List[np.ndarray], np.ndarray]:
+    """Split the concatenated ``frames`` of the clips of a
+    :class:`~torchvideo.samplers.MultiClip` into the frames of each clip."""
+    clip_lengths = [len(frame_idx_to_list(clip_idx)) for clip_idx in clips]
+    if as_ndarray and len(set(clip_lengths)) == 1:
+        return frames.reshape((len(clips), clip_lengths[0]) + frames.shape[1:])
+    offsets = np.cumsum([0] + clip_lengths)
+    clip_frames = [frames[start:stop] for start, stop in zip(offsets, offsets[1:])]
+    if as_ndarray:
+        return clip_frames
+    return [list(_to_pil_frames(frames)) for frames in clip_frames]
+
+
+def _frames_to_ndarray(
+    frames: Iterable[Image.Image], grayscale: bool = False
+) -> np.ndarray:
+    mode = "L" if grayscale else "RGB"
+    array = np.stack([np.asarray(frame.convert(mode)) for frame in frames])
+    return array[..., np.newaxis] if grayscale else array
+
+
+def _rgb_to_luma(frames: np.ndarray) -> np.ndarray:
+    """Convert ``(..., 3)`` RGB uint8 frames to ``(..., 1)`` luma frames, using the
+    same ITU-R 601-2 weights and fixed point rounding as PIL's ``convert("L")``."""
+    weights = np.array([19595, 38470, 7471], dtype=np.uint32)
+    luma = (frames.astype(np.uint32) @ weights + 0x8000) >> 16
+    return luma.astype(np.uint8)[..., np.newaxis]
+
+
+def _scaled_size(height: int, width: int, size: FrameSize) -> Tuple[int, int]:
+    """The ``(height, width)`` to scale a ``height`` by ``width`` frame to.
+
+    An ``int`` ``size`` is the maximum length of the shorter side, frames already
+    within it keep their size and the aspect ratio is preserved.
+    """
+    if isinstance(size, tuple):
+        return size
+    short_side = min(height, width)
+    if short_side <= size:
+        return height, width
+    if height <= width:
+        return size, max(1, int(round(width * size / height)))
+    return max(1, int(round(height * size / width))), size
+
+
+def _resize_frame(frame: Image.Image, size: FrameSize) -> Image.Image:
+    height, width = _scaled_size(frame.height, frame.width, size)
+    if (height, width) == (frame.height, frame.width):
+        return frame
+    return frame.resize((width, height), Image.BILINEAR)
+
+
+def _resize_frames(frames: np.ndarray, size: FrameSize) -> np.ndarray:
+    """Resize decoded frames for backends that can't scale whilst decoding."""
+    height, width = _scaled_size(frames.shape[1], frames.shape[2], size)
+    if (height, width) == frames.shape[1:3]:
+        return frames
+    resized = np.stack(
+        [np.asarray(_resize_frame(image, size)) for image in _to_pil_frames(frames)]
+    )
+    return resized.reshape(resized.shape[:3] + frames.shape[3:])
+
+
+def register_video_backend(
+    name: str,
+    loader: Callable[..., Iterator[Image.Image]],
+    module: Optional[str] = None,
+    capabilities: Iterable[str] = (),
+) -> None:
+    """Register a decoder backend so it can be selected with
+    :func:`torchvideo.set_video_backend` or the ``backend`` argument of the video
+    datasets.
+
+    Args:
+        name: Name of the backend, e.g. ``"lintel"``.
+        loader: Callable taking a video file and frame indices and returning an
+            iterator of frames, see :func:`default_loader`.
+        module: Optional module the backend depends on, used to check whether the
+            backend is available.
+        capabilities: ``CAP_*`` flags describing what the backend can do.
+    """
+    _VIDEO_BACKENDS[name] = VideoBackend(
+        name=name, loader=loader, module=module, capabilities=frozenset(capabilities)
+    )
+
+
+def get_video_backend_info(name: str) -> VideoBackend:
+    """Look up the registered backend ``name``.
+
+    Raises:
+        ValueError: If no backend is registered under ``name``.
+    """
+    try:
+        return _VIDEO_BACKENDS[name]
+    except KeyError:
+        raise ValueError(
+            "Unknown backend '{}', expected one of {}".format(
+                name, sorted(_VIDEO_BACKENDS.keys())
+            )
+        )
+
+
+def available_video_backends() -> List[str]:
+    """Names of the registered backends whose dependencies are installed."""
+    return sorted(
+        name
+        for name, backend in _VIDEO_BACKENDS.items()
+        if backend.module is None or importlib.util.find_spec(backend.module)
+    )
+
+
 def default_loader(
-    file: Union[str, Path, IO[bytes]], frames_idx: Union[slice, List[slice], List[int]]
-) -> Iterator[Image.Image]:
-    from torchvideo import get_video_backend
+    file: Union[str, Path, IO[bytes]],
+    frames_idx: Union[IndexPlan, slice, List[slice], List[int]],
+    backend: Optional[str] = None,
+    as_ndarray: bool = False,
+    size: Optional[FrameSize] = None,
+    cache: Optional[FrameCache] = None,
+    grayscale: bool = False,
+    fast_decode: bool = False,
+) -> Union[Iterator[Image.Image], np.ndarray]:
+    """Load the frames ``frames_idx`` from ``file`` using the decoder ``backend``.
+
+    Args:
+        file: Path to the video, or a file-like object holding the video data.
+        frames_idx: Frame indices as an :class:`~torchvideo.samplers.IndexPlan`,
+            slice, list of slices, or list of ints.
+        backend: Name of the decoder backend to use, defaults to the global backend
+            set by :func:`torchvideo.set_video_backend`.
+        as_ndarray: Return the frames as a contiguous ``(T, H, W, 3)`` uint8 array
+            rather than as PIL images. Backends with the ``CAP_NDARRAY`` capability
+            hand over their decode buffer without wrapping each frame in an image,
+            the array may be read-only. Frames from other backends are stacked into
+            an array.
+        size: Optional size to scale the frames to, either the maximum length of the
+            shorter side (preserving the aspect ratio, frames are never upscaled) or
+            an exact ``(height, width)``. Backends with the ``CAP_RESIZE``
+            capability scale frames as they are decoded, so full resolution frames
+            are never materialised. Frames from other backends are resized after
+            decoding.
+        cache: Optional :class:`FrameCache` of decoded frames. Only the frames
+            missing from the cache are decoded. Frames are cached per path and
+            ``size``, so frames of file-like objects aren't cached.
+        grayscale: Load single channel luma frames, as mode ``"L"`` images or a
+            ``(T, H, W, 1)`` array. Backends with the ``CAP_GRAYSCALE`` capability
+            produce these directly, frames from other backends are converted after
+            decoding.
+        fast_decode: Let the decoder trade accuracy for speed, e.g. by skipping the
+            loop filter. Frames are slightly degraded but the frame count and
+            geometry are unchanged, which is fine for training but not for
+            evaluation. Only backends with the ``CAP_FAST_DECODE`` capability speed
+            up, other backends decode exactly.
+
+    ``frames_idx`` may also be an :class:`~torchvideo.samplers.IndexPlan` (see
+    :meth:`~torchvideo.samplers.FrameSampler.sample_plan`), which backends with the
+    ``CAP_INDEX_PLAN`` capability load from directly rather than planning again.
+
+    If ``frames_idx`` is a :class:`~torchvideo.samplers.MultiClip` the union of the
+    clips' frames is decoded in a single pass, each frame only once, and a list of
+    the frames of each clip is returned. The clips are stacked into a single
+    ``(K, T, H, W, C)`` array when loading ndarrays and all clips are the same
+    length.
+
+    Returns:
+        Iterator of the frames as RGB :class:`PIL.Image.Image`, or an array of the
+        frames if ``as_ndarray`` is set.
+    """
+    if backend is None:
+        from torchvideo import get_video_backend
 
-    backend = get_video_backend()
-    if backend == "lintel":
-        loader = lintel_loader
-    else:
-        raise ValueError("Unknown backend '{}'".format(backend))
-    return loader(file, frames_idx)
+        backend = get_video_backend()
+    if isinstance(frames_idx, MultiClip):
+        plan = IndexPlan.from_frame_idx(frames_idx)
+        frames = default_loader(
+            file,
+            plan.unique(),
+            backend=backend,
+            as_ndarray=True,
+            size=size,
+            cache=cache,
+            grayscale=grayscale,
+            fast_decode=fast_decode,
+        )
+        frames = frames[plan.reconstruction_idx]
+        return _split_clips(frames, frames_idx, as_ndarray)
+    if cache is not None and isinstance(file, (str, Path)):
+        plan = IndexPlan.from_frame_idx(frames_idx)
+        frames = cache.get_frames(
+            (str(file), size, grayscale, fast_decode),
+            plan.load_idx,
+            lambda frame_numbers: default_loader(
+                file,
+                frame_numbers,
+                backend=backend,
+                as_ndarray=True,
+                size=size,
+                grayscale=grayscale,
+                fast_decode=fast_decode,
+            ),
+        )
+        return _reconstruct_frames(frames, plan.reconstruction_idx, as_ndarray)
+    backend_info = get_video_backend_info(backend)
+    if (
+        isinstance(frames_idx, IndexPlan)
+        and CAP_INDEX_PLAN not in backend_info.capabilities
+    ):
+        frames_idx = frames_idx.frame_idx.tolist()
+    kwargs = {}  # type: Dict[str, Any]
+    if as_ndarray and CAP_NDARRAY in backend_info.capabilities:
+        kwargs["as_ndarray"] = True
+    if size is not None and CAP_RESIZE in backend_info.capabilities:
+        kwargs["size"] = size
+    if grayscale and CAP_GRAYSCALE in backend_info.capabilities:
+        kwargs["grayscale"] = True
+    if fast_decode and CAP_FAST_DECODE in backend_info.capabilities:
+        kwargs["fast_decode"] = True
+    frames = backend_info.loader(file, frames_idx, **kwargs)
+    if size is not None and "size" not in kwargs:
+        frames = (_resize_frame(frame, size) for frame in frames)
+    if grayscale and "grayscale" not in kwargs:
+        frames = (frame.convert("L") for frame in frames)
+    if as_ndarray and "as_ndarray" not in kwargs:
+        frames = _frames_to_ndarray(frames, grayscale=grayscale)
+    return frames
+
+
+register_video_backend(
+    "lintel",
+    lintel_loader,
+    module="lintel",
+    capabilities=(CAP_NDARRAY, CAP_RESIZE, CAP_GRAYSCALE, CAP_INDEX_PLAN),
+)
+register_video_backend(
+    "pyav",
+    pyav_loader,
+    module="av",
+    capabilities=(
+        CAP_SEEK,
+        CAP_NDARRAY,
+        CAP_RESIZE,
+        CAP_GRAYSCALE,
+        CAP_FAST_DECODE,
+        CAP_INDEX_PLAN,
+    ),
+)
+register_video_backend(
+    "lintel-subprocess",
+    partial(subprocess_loader, backend="lintel"),
+    module="lintel",
+    capabilities=(CAP_NDARRAY, CAP_RESIZE, CAP_GRAYSCALE, CAP_INDEX_PLAN),
+)
+register_video_backend(
+    "pyav-subprocess",
+    partial(subprocess_loader, backend="pyav"),
+    module="av",
+    capabilities=(
+        CAP_SEEK,
+        CAP_NDARRAY,
+        CAP_RESIZE,
+        CAP_GRAYSCALE,
+        CAP_FAST_DECODE,
+        CAP_INDEX_PLAN,
+    ),
+)
 
 
 def _get_videofile_frame_count(video_file_path: Path) -> int:
-    command = [
-        "ffprobe",
-        "-v",
-        "error",
+    n_frames = _probe_videofile(video_file_path).n_frames
+    if n_frames < 0:
+        raise ValueError(
+            "Couldn't determine the frame count of {}".format(video_file_path)
+        )
+    return n_frames
+
+
+def _probe_videofile(video_file_path: Path) -> VideoInfo:
+    """Probe the resolution, frame count and frame rate of a video.
+
+    MP4/MOV and Matroska/WebM headers are parsed in-process, other containers (or
+    files whose headers can't be parsed) are probed with ``ffprobe``.
+    """
+    try:
+        return probe_container(video_file_path)
+    except ContainerProbeError as e:
+        _LOG.debug("Falling back to ffprobe for {}: {}".format(video_file_path, e))
+    return _ffprobe_videofile(video_file_path)
+
+
+def _ffprobe_videofile(video_file_path: Path) -> VideoInfo:
+    """Probe the resolution, frame count and frame rate of a video with ``ffprobe``.
+
+    Packets are only counted, which reads the whole file, when the container doesn't
+    report the number of frames (e.g. ``nb_frames`` is ``N/A`` for many webm/mkv
+    files). Fields that ``ffprobe`` can't determine are set to ``-1`` (or ``nan`` for
+    the frame rate).
+    """
+    fields = _ffprobe_stream_fields(
+        video_file_path, ["width", "height", "nb_frames", "avg_frame_rate"]
+    )
+
+    def parse_int(value: Optional[str]) -> int:
+        try:
+            return int(value)  # type: ignore
+        except (TypeError, ValueError):
+            return -1
+
+    try:
+        fps = float(Fraction(fields["avg_frame_rate"]))
+    except (KeyError, ValueError, ZeroDivisionError):
+        fps = float("nan")
+    n_frames = parse_int(fields.get("nb_frames"))
+    if n_frames < 0:
+        counted_fields = _ffprobe_stream_fields(
+            video_file_path, ["nb_read_packets"], count_packets=True
+        )
+        n_frames = parse_int(counted_fields.get("nb_read_packets"))
+    return VideoInfo(
+        height=parse_int(fields.get("height")),
+        width=parse_int(fields.get("width")),
+        n_frames=n_frames,
+        fps=fps,
+    )
+
+
+def _ffprobe_stream_fields(
+    video_file_path: Path, entries: List[str], count_packets: bool = False
+) -> Dict[str, str]:
+    command = ["ffprobe", "-v", "error"]
+    if count_packets:
+        command.append("-count_packets")
+    command += [
         "-select_streams",
         "v:0",
         "-show_entries",
-        "stream=nb_frames",
+        "stream=" + ",".join(entries),
         "-of",
-        "default=nokey=1:noprint_wrappers=1",
+        "default=noprint_wrappers=1",
         str(video_file_path),
     ]
     result = subprocess.run(
         command, stdout=subprocess.PIPE, stderr=subprocess.PIPE, check=True
     )
-    # Final character of output is a newline so we drop it
-    n_frames = int(result.stdout.decode("utf-8").split("\n")[0])
-    return n_frames
+    return dict(
+        line.split("=", 1)
+        for line in result.stdout.decode("utf-8").splitlines()
+        if "=" in line
+    )
 
 
 def _is_video_file(path: Path) -> bool:
@@ -0,0 +1,187 @@
+import logging
+import os
+from collections import namedtuple
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+from typing import Callable, Dict, Optional, Union
+
+import numpy as np
+
+_LOG = logging.getLogger(__name__)
+
+#: Suffix appended to a video's filename to give the path of its index sidecar.
+VIDEO_INDEX_SUFFIX = ".index.npz"
+_VIDEO_INDEX_VERSION = 1
+
+
+class VideoIndex(
+    namedtuple("VideoIndex", ("frame_pts", "keyframes", "keyframe_offsets"))
+):
+    """Timing information of the frames in a video stream used for seeking.
+
+    Attributes:
+        frame_pts: Sorted presentation timestamps of every frame in the stream, frame
+            ``n`` of the video has the timestamp ``frame_pts[n]``.
+        keyframes: Sorted frame numbers of the keyframes in the stream.
+        keyframe_offsets: Byte offset within the file of the packet of each keyframe
+            in ``keyframes``, ``-1`` where the container doesn't report it.
+    """
+
+    def keyframe_before(self, frame_number: int) -> int:
+        """Frame number of the last keyframe at or before ``frame_number``, decoding
+        from this keyframe onwards will reproduce ``frame_number`` exactly."""
+        position = np.searchsorted(self.keyframes, frame_number, side="right") - 1
+        if position < 0:
+            return 0
+        return int(self.keyframes[position])
+
+
+def build_video_index(container, stream) -> Optional[VideoIndex]:
+    """Build a :class:`VideoIndex` for ``stream`` by demuxing the packets of
+    ``container`` without decoding them.
+
+    The container is left at the end of the stream, so callers need to seek before
+    decoding from it.
+
+    Args:
+        container: PyAV input container.
+        stream: Video stream of ``container`` to index.
+
+    Returns:
+        The index of the stream, or ``None`` if the stream has packets without
+        timestamps and can't be seeked accurately.
+    """
+    pts = []
+    keyframe_pts = []
+    keyframe_offsets = []
+    for packet in container.demux(stream):
+        if packet.size == 0:
+            # Flushing packets at the end of the stream don't hold frames
+            continue
+        if packet.pts is None:
+            return None
+        pts.append(packet.pts)
+        if packet.is_keyframe:
+            keyframe_pts.append(packet.pts)
+            keyframe_offsets.append(-1 if packet.pos is None else packet.pos)
+    frame_pts = np.sort(np.array(pts, dtype=np.int64))
+    keyframes = np.searchsorted(frame_pts, np.array(keyframe_pts, dtype=np.int64))
+    order = np.argsort(keyframes, kind="stable")
+    return VideoIndex(
+        frame_pts=frame_pts,
+        keyframes=keyframes[order],
+        keyframe_offsets=np.array(keyframe_offsets, dtype=np.int64)[order],
+    )
+
+
+def video_index_path(video_path: Union[str, Path]) -> Path:
+    """Path of the index sidecar of the video at ``video_path``."""
+    video_path = Path(video_path)
+    return video_path.with_name(video_path.name + VIDEO_INDEX_SUFFIX)
+
+
+def save_video_index(index: VideoIndex, video_path: Union[str, Path]) -> Path:
+    """Save ``index`` as the sidecar of the video at ``video_path``.
+
+    The size and modification time of the video are stored alongside the index so
+    that the sidecar is ignored if the video changes.
+
+    Returns:
+        Path of the sidecar.
+    """
+    stat = os.stat(str(video_path))
+    index_path = video_index_path(video_path)
+    with index_path.open("wb") as f:
+        np.savez(
+            f,
+            version=_VIDEO_INDEX_VERSION,
+            video_size=stat.st_size,
+            video_mtime_ns=stat.st_mtime_ns,
+            frame_pts=index.frame_pts,
+            keyframes=index.keyframes,
+            keyframe_offsets=index.keyframe_offsets,
+        )
+    return index_path
+
+
+def load_video_index(video_path: Union[str, Path]) -> Optional[VideoIndex]:
+    """Load the index sidecar of the video at ``video_path``.
+
+    Returns:
+        The index, or ``None`` if there is no sidecar, or it is out of date with
+        respect to the video.
+    """
+    index_path = video_index_path(video_path)
+    try:
+        stat = os.stat(str(video_path))
+        with np.load(str(index_path), allow_pickle=False) as data:
+            if (
+                int(data["version"]) != _VIDEO_INDEX_VERSION
+                or int(data["video_size"]) != stat.st_size
+                or int(data["video_mtime_ns"]) != stat.st_mtime_ns
+            ):
+                _LOG.debug("Ignoring stale video index {}".format(index_path))
+                return None
+            return VideoIndex(
+                frame_pts=data["frame_pts"],
+                keyframes=data["keyframes"],
+                keyframe_offsets=data["keyframe_offsets"],
+            )
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+def index_video_file(video_path: Union[str, Path]) -> Optional[Path]:
+    """Build and save the index sidecar of the video at ``video_path``.
+
+    Returns:
+        Path of the sidecar, or ``None`` if the video couldn't be indexed.
+    """
+    import av
+
+    with av.open(str(video_path)) as container:
+        index = build_video_index(container, container.streams.video[0])
+    if index is None:
+        return None
+    return save_video_index(index, video_path)
+
+
+def index_video_folder(
+    root_path: Union[str, Path],
+    filter: Optional[Callable[[Path], bool]] = None,
+    workers: Optional[int] = None,
+    overwrite: bool = False,
+) -> Dict[Path, Optional[Exception]]:
+    """Build index sidecars for every video in a
+    :class:`~torchvideo.datasets.VideoFolderDataset` root in parallel.
+
+    Args:
+        root_path: Path to the folder of videos.
+        filter: Optional filter callable that decides whether a video is indexed.
+        workers: Number of worker processes, defaults to the number of CPUs.
+        overwrite: Whether to rebuild sidecars that are already up to date.
+
+    Returns:
+        A dictionary mapping each indexed video to ``None`` on success, or to the
+        exception raised whilst indexing it.
+    """
+    from .readers import _is_video_file
+
+    video_paths = sorted(
+        path
+        for path in Path(root_path).iterdir()
+        if _is_video_file(path)
+        and (filter is None or filter(path))
+        and (overwrite or load_video_index(path) is None)
+    )
+    results = {}  # type: Dict[Path, Optional[Exception]]
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(index_video_file, path) for path in video_paths]
+        for path, future in zip(video_paths, futures):
+            error = future.exception()
+            if error is None and future.result() is None:
+                error = ValueError("{} has packets without timestamps".format(path))
+            if error is not None:
+                _LOG.warning("Failed to index {}: {}".format(path, error))
+            results[path] = error
+    return results
@@ -1,12 +1,216 @@
 import itertools
+import os
 from abc import ABC
-from typing import Union, List, Callable, Tuple, cast, Optional
+from collections import namedtuple
+from pathlib import Path
+from typing import Union, List, Callable, Tuple, cast, Optional, Iterator, Sequence
 import numpy as np
 from numpy.random import randint
+from torch.utils.data import Sampler
 
 from torchvideo.internal.utils import _is_int
 
 
+class IndexPlan:
+    """Frame indices of a sample, planned for loading.
+
+    Samples are deduplicated, sorted and coalesced into contiguous runs once, when
+    the plan is made, and loaders read the frames straight from the plan rather
+    than each expanding the indices and working this out again. A plan can stand in
+    for a list of the requested frame indices: its length is the number of frames
+    requested and iterating over it yields their indices in order.
+
+    Attributes:
+        load_idx: Sorted array of the unique frames to load.
+        reconstruction_idx: Index into ``load_idx`` of each requested frame, in the
+            requested order.
+        runs: ``(n_runs, 2)`` array of the ``[start, stop)`` bounds of the runs of
+            consecutive frames in ``load_idx``.
+    """
+
+    def __init__(
+        self,
+        load_idx: np.ndarray,
+        reconstruction_idx: np.ndarray,
+        runs: Optional[np.ndarray] = None,
+    ) -> None:
+        self.load_idx = load_idx
+        self.reconstruction_idx = reconstruction_idx
+        self.runs = _contiguous_runs(load_idx) if runs is None else runs
+
+    @classmethod
+    def from_frame_idx(
+        cls, frames_idx: Union["IndexPlan", slice, List[slice], List[int], np.ndarray]
+    ) -> "IndexPlan":
+        """Plan loading the frames ``frames_idx``, a ``slice``, list of slices, list
+        or array of ints, or a :class:`MultiClip` (whose clips are concatenated).
+        Plans are returned as is."""
+        if isinstance(frames_idx, IndexPlan):
+            return frames_idx
+        if isinstance(frames_idx, slice) and (frames_idx.step or 1) > 0:
+            load_idx = np.array(_slice_to_list(frames_idx), dtype=np.int64)
+            return cls(load_idx, np.arange(len(load_idx)))
+        if not isinstance(frames_idx, np.ndarray):
+            frames_idx = frame_idx_to_list(frames_idx)
+        load_idx, reconstruction_idx = np.unique(
+            np.asarray(frames_idx, dtype=np.int64), return_inverse=True
+        )
+        return cls(load_idx, reconstruction_idx.reshape(-1))
+
+    @property
+    def frame_idx(self) -> np.ndarray:
+        """The requested frame indices, in order."""
+        return self.load_idx[self.reconstruction_idx]
+
+    def unique(self) -> "IndexPlan":
+        """Plan loading each frame of ``load_idx`` once, in order."""
+        return IndexPlan(self.load_idx, np.arange(len(self.load_idx)), self.runs)
+
+    def __len__(self) -> int:
+        return len(self.reconstruction_idx)
+
+    def __iter__(self):
+        return iter(self.frame_idx.tolist())
+
+    def __repr__(self) -> str:
+        return self.__class__.__name__ + "(frame_idx={})".format(
+            self.frame_idx.tolist()
+        )
+
+
+class FrameIndexBatch(namedtuple("FrameIndexBatch", ("indices", "offsets"))):
+    """Frame indices sampled from many videos at once, as returned by
+    :meth:`FrameSampler.sample_batch`.
+
+    The indices of all the videos are held in one flat array rather than a Python
+    object per video, so that the samples of a whole epoch are cheap to compute, store
+    and hand over.
+
+    Attributes:
+        indices: ``int32`` array of the frame indices sampled from all the videos,
+            concatenated.
+        offsets: ``int64`` array of ``n_videos + 1`` offsets into ``indices``, the
+            frame indices of video ``i`` are ``indices[offsets[i]:offsets[i + 1]]``.
+    """
+
+    @property
+    def n_videos(self) -> int:
+        """Number of videos sampled from."""
+        return len(self.offsets) - 1
+
+    @property
+    def counts(self) -> np.ndarray:
+        """Number of frame indices sampled from each video."""
+        return np.diff(self.offsets)
+
+    def frame_idx(self, video: int) -> np.ndarray:
+        """Frame indices sampled from the ``video``-th video."""
+        return self.indices[self.offsets[video] : self.offsets[video + 1]]
+
+    def plan(self, video: int) -> IndexPlan:
+        """:class:`IndexPlan` of the frames sampled from the ``video``-th video."""
+        return IndexPlan.from_frame_idx(self.frame_idx(video))
+
+    def as_array(self) -> np.ndarray:
+        """The frame indices as an ``(n_videos, n_frames)`` array.
+
+        Raises:
+            ValueError: If a different number of frames were sampled from each
+                video.
+        """
+        counts = self.counts
+        if len(counts) == 0:
+            return self.indices.reshape(0, 0)
+        if np.any(counts != counts[0]):
+            raise ValueError(
+                "Can't make an array of samples with different numbers of frames"
+            )
+        return self.indices.reshape(self.n_videos, counts[0])
+
+    @classmethod
+    def from_array(cls, frame_idx: np.ndarray) -> "FrameIndexBatch":
+        """Batch of the samples of an ``(n_videos, n_frames)`` array."""
+        n_videos, n_frames = frame_idx.shape
+        return cls(
+            indices=np.ascontiguousarray(frame_idx, dtype=np.int32).reshape(-1),
+            offsets=np.arange(n_videos + 1, dtype=np.int64) * n_frames,
+        )
+
+    @classmethod
+    def from_frame_idx(
+        cls, frame_idx: List[Union[slice, List[int], List[slice]]]
+    ) -> "FrameIndexBatch":
+        """Batch of the samples of each video as returned by
+        :meth:`FrameSampler.sample`."""
+        lists = [frame_idx_to_list(idx) for idx in frame_idx]
+        offsets = np.zeros(len(lists) + 1, dtype=np.int64)
+        np.cumsum([len(list_) for list_ in lists], out=offsets[1:])
+        return cls(
+            indices=np.fromiter(
+                itertools.chain.from_iterable(lists), dtype=np.int32, count=offsets[-1]
+            ),
+            offsets=offsets,
+        )
+
+
+class EpochPlan(namedtuple("EpochPlan", ("seed", "epoch", "order", "frame_idx"))):
+    """The frames sampled from every video of a dataset for an epoch, as made by
+    :meth:`FrameSampler.plan_epoch`.
+
+    Plans are plain arrays, so they are cheap to hand to DataLoader workers, and can
+    be saved to disk to reproduce a run or to let prefetchers and caches see which
+    frames will be read, and when, ahead of time.
+
+    Attributes:
+        seed: Seed the plan was drawn with.
+        epoch: Number of the epoch planned.
+        order: Indices of the videos in the order they are visited, which can be
+            passed to a :class:`~torch.utils.data.DataLoader` as its ``sampler``.
+        frame_idx: :class:`FrameIndexBatch` of the frames sampled from each video,
+            indexed by the video's index in the dataset.
+    """
+
+    @property
+    def n_videos(self) -> int:
+        """Number of videos planned."""
+        return self.frame_idx.n_videos
+
+    def plan(self, video: int) -> IndexPlan:
+        """:class:`IndexPlan` of the frames sampled from the ``video``-th video."""
+        return self.frame_idx.plan(video)
+
+    def schedule(self) -> Iterator[Tuple[int, np.ndarray]]:
+        """Iterate over the videos in the order they are visited, yielding each
+        video's index and the frame indices sampled from it."""
+        for video in self.order:
+            yield int(video), self.frame_idx.frame_idx(video)
+
+    def save(self, path: Union[str, Path]) -> None:
+        """Save the plan to ``path`` as a ``.npz`` archive, see :meth:`load`."""
+        with open(str(path), "wb") as f:
+            np.savez(
+                f,
+                seed=self.seed,
+                epoch=self.epoch,
+                order=self.order,
+                indices=self.frame_idx.indices,
+                offsets=self.frame_idx.offsets,
+            )
+
+    @classmethod
+    def load(cls, path: Union[str, Path]) -> "EpochPlan":
+        """Load a plan saved by :meth:`save`."""
+        with np.load(str(path)) as archive:
+            return cls(
+                seed=int(archive["seed"]),
+                epoch=int(archive["epoch"]),
+                order=archive["order"],
+                frame_idx=FrameIndexBatch(
+                    indices=archive["indices"], offsets=archive["offsets"]
+                ),
+            )
+
+
 class FrameSampler(ABC):  # pragma: no cover
     """Abstract base class that all frame samplers implement.
 
@@ -23,6 +227,100 @@ class FrameSampler(ABC):  # pragma: no cover
         """
         raise NotImplementedError()
 
+    def sample_plan(self, video_length: int) -> Union[IndexPlan, "MultiClip"]:
+        """Generate frame indices to sample from a video of ``video_length`` frames
+        like :meth:`sample`, as an :class:`IndexPlan` ready for loading.
+
+        :class:`MultiClip` samples are returned as is, loaders plan the union of
+        their clips.
+
+        Args:
+            video_length: The duration in frames of the video to be sampled from
+
+        Returns:
+            Planned frame indices
+        """
+        frame_idx = self.sample(video_length)
+        if isinstance(frame_idx, MultiClip):
+            return frame_idx
+        return IndexPlan.from_frame_idx(frame_idx)
+
+    def sample_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator] = None
+    ) -> FrameIndexBatch:
+        """Generate frame indices to sample from many videos at once, e.g. to plan a
+        whole epoch.
+
+        The built in samplers compute the indices of all the videos in a handful of
+        vectorized operations, drawing from the same distribution as :meth:`sample`
+        (but not the same random numbers). The default implementation calls
+        :meth:`sample` for each video.
+
+        Args:
+            video_lengths: The duration in frames of each video to be sampled from.
+            rng: Optional generator to draw random numbers from, rather than the
+                global :mod:`numpy.random` state. The default implementation seeds
+                the global state from ``rng`` while calling :meth:`sample`, and
+                restores it afterwards.
+
+        Returns:
+            The frame indices of all videos.
+        """
+        state = None
+        if rng is not None:
+            state = np.random.get_state()
+            np.random.seed(rng.integers(2 ** 32))
+        try:
+            return FrameIndexBatch.from_frame_idx(
+                [self.sample(int(video_length)) for video_length in video_lengths]
+            )
+        finally:
+            if state is not None:
+                np.random.set_state(state)
+
+    def plan_epoch(
+        self,
+        video_lengths: np.ndarray,
+        seed: int,
+        epoch: int = 0,
+        shuffle: bool = False,
+    ) -> "EpochPlan":
+        """Sample the frames of every video of an epoch up front.
+
+        The plan is drawn from a counter-based generator keyed by ``seed`` and
+        ``epoch`` (see :func:`epoch_rng`) rather than the global :mod:`numpy.random`
+        state, so the same plan is made in any process and every epoch is
+        independent of the others. Once given to a dataset (see
+        :meth:`~torchvideo.datasets.VideoDataset.set_epoch_plan`) the frames loaded
+        for each video no longer depend on which DataLoader worker loads it, or how
+        many workers there are.
+
+        :class:`MultiClip` samples are flattened into a single clip, so samplers
+        producing them shouldn't be planned.
+
+        Args:
+            video_lengths: The duration in frames of each video of the dataset.
+            seed: Seed of the run.
+            epoch: Number of the epoch to plan.
+            shuffle: Whether to visit the videos in a random order rather than in
+                order, see :attr:`EpochPlan.order`.
+
+        Returns:
+            The plan of the epoch.
+        """
+        rng = epoch_rng(seed, epoch)
+        order = (
+            rng.permutation(len(video_lengths))
+            if shuffle
+            else np.arange(len(video_lengths))
+        )
+        return EpochPlan(
+            seed=seed,
+            epoch=epoch,
+            order=order.astype(np.int64),
+            frame_idx=self.sample_batch(video_lengths, rng=rng),
+        )
+
 
 class FullVideoSampler(FrameSampler):
     """Sample all frames in a video.
@@ -53,6 +351,21 @@ class FullVideoSampler(FrameSampler):
             )
         return slice(0, video_length, self.frame_step)
 
+    def sample_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator] = None
+    ) -> FrameIndexBatch:
+        video_lengths = _check_video_lengths(video_lengths)
+        counts = -(-video_lengths // self.frame_step)
+        offsets = np.zeros(len(counts) + 1, dtype=np.int64)
+        np.cumsum(counts, out=offsets[1:])
+        # Position of each index within its video's sample
+        positions = np.arange(offsets[-1], dtype=np.int64) - np.repeat(
+            offsets[:-1], counts
+        )
+        return FrameIndexBatch(
+            indices=(positions * self.frame_step).astype(np.int32), offsets=offsets
+        )
+
     def __str__(self):
         return repr(self)
 
@@ -95,12 +408,105 @@ class ClipSampler(FrameSampler):
             start_index = 0 if max_offset == 0 else randint(0, max_offset)
         return slice(start_index, start_index + sample_length, self.frame_step)
 
+    def sample_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator] = None
+    ) -> FrameIndexBatch:
+        video_lengths = _check_video_lengths(video_lengths)
+        sample_length = compute_sample_length(self.clip_length, self.frame_step)
+        max_offsets = video_lengths - sample_length
+        if self.test_mode:
+            start_idx = max_offsets // 2
+        elif rng is None:
+            start_idx = np.random.randint(0, np.maximum(max_offsets, 1))
+        else:
+            start_idx = rng.integers(0, np.maximum(max_offsets, 1))
+        # Clips of videos shorter than a clip start before the beginning of the
+        # video, the missing frames are filled with the first frame like _oversample
+        start_idx = np.where(max_offsets < 0, max_offsets, start_idx)
+        frame_idx = start_idx[:, np.newaxis] + np.arange(
+            0, sample_length, self.frame_step
+        )
+        return FrameIndexBatch.from_array(np.maximum(frame_idx, 0))
+
     def __repr__(self):
         return self.__class__.__name__ + "(clip_length={!r}, frame_step={!r})".format(
             self.clip_length, self.frame_step
         )
 
 
+class MultiClip(list):
+    """Frame indices of several clips sampled from the same video, as returned by
+    :class:`MultiClipSampler`.
+
+    Each element holds the indices of one clip as a ``slice``, list of slices or list
+    of ints. Loaders decode the union of the clips' frames once and return the frames
+    of each clip separately, and datasets transform each clip and stack them into a
+    :math:`(K, C, T, H, W)` tensor.
+    """
+
+    def __repr__(self):
+        return self.__class__.__name__ + "({})".format(super().__repr__())
+
+
+class MultiClipSampler(FrameSampler):
+    """Sample ``clip_count`` clips spaced evenly through a video, as used for
+    multi-view testing.
+
+    The frames of all clips are decoded in a single pass over the video rather than
+    once per clip.
+    """
+
+    def __init__(self, clip_length: int, clip_count: int = 10, frame_step: int = 1):
+        """
+        Args:
+            clip_length: Duration of each clip in frames.
+            clip_count: Number of clips to sample from each video.
+            frame_step: The step size between frames, this controls FPS reduction, a
+                step size of 2 will halve FPS, step size of 3 will reduce FPS to 1/3.
+        """
+        if clip_count < 1:
+            raise ValueError("clip_count must be greater than 0")
+        self.clip_length = clip_length
+        self.clip_count = clip_count
+        self.frame_step = frame_step
+
+    def sample(self, video_length: int) -> MultiClip:
+        """
+
+        Args:
+            video_length: The duration in frames of the video to be sampled from.
+
+        Returns:
+            A :class:`MultiClip` of ``clip_count`` clips, clips of videos shorter than
+            a clip are oversampled in the same way as :class:`ClipSampler`.
+        """
+        if video_length <= 0:
+            raise ValueError(
+                "Video must be at least 1 frame long but was {} frames long".format(
+                    video_length
+                )
+            )
+        sample_length = compute_sample_length(self.clip_length, self.frame_step)
+        if video_length < sample_length:
+            clip = _oversample(video_length, sample_length)[::self.frame_step]
+            return MultiClip([list(clip) for _ in range(self.clip_count)])
+        start_idx = np.linspace(0, video_length - sample_length, self.clip_count)
+        return MultiClip(
+            [
+                slice(int(start), int(start) + sample_length, self.frame_step)
+                for start in np.round(start_idx)
+            ]
+        )
+
+    def __repr__(self):
+        return (
+            self.__class__.__name__
+            + "(clip_length={!r}, clip_count={!r}, frame_step={!r})".format(
+                self.clip_length, self.clip_count, self.frame_step
+            )
+        )
+
+
 class TemporalSegmentSampler(FrameSampler):
     """[TSN]_ style sampling.
 
@@ -199,6 +605,77 @@ class TemporalSegmentSampler(FrameSampler):
         # snippet from each of them, this is the happy path
         return self._sample(video_length)
 
+    def sample_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator] = None
+    ) -> FrameIndexBatch:
+        video_lengths = _check_video_lengths(video_lengths)
+        snippet_start_idx = np.zeros(
+            (len(video_lengths), self.segment_count), dtype=np.int64
+        )
+        # The same three cases as sample, each vectorized over the videos in it
+        oversampled_snippet = video_lengths <= self.snippet_length
+        oversampled_segments = ~oversampled_snippet & (
+            video_lengths < self.segment_count * self.snippet_length
+        )
+        happy_path = ~oversampled_snippet & ~oversampled_segments
+        if np.any(oversampled_segments):
+            snippet_start_idx[oversampled_segments] = self._oversample_segments_batch(
+                video_lengths[oversampled_segments], rng
+            )
+        if np.any(happy_path):
+            snippet_start_idx[happy_path] = self._sample_batch(
+                video_lengths[happy_path], rng
+            )
+        frame_idx = (
+            snippet_start_idx[:, :, np.newaxis] + np.arange(self.snippet_length)
+        ).reshape(len(video_lengths), -1)
+        if np.any(oversampled_snippet):
+            frame_idx[oversampled_snippet] = np.tile(
+                self._oversample_snippet_batch(video_lengths[oversampled_snippet]),
+                self.segment_count,
+            )
+        return FrameIndexBatch.from_array(frame_idx)
+
+    def _sample_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator]
+    ) -> np.ndarray:
+        segment_lengths = video_lengths[:, np.newaxis] / self.segment_count
+        segment_start_idx = np.arange(self.segment_count) * segment_lengths
+        max_offsets = np.maximum(segment_lengths - self.snippet_length, 0)
+        if self.test_mode:
+            segment_offsets = max_offsets / 2
+        else:
+            segment_offsets = (
+                _random(rng, (len(video_lengths), self.segment_count)) * max_offsets
+            )
+        return np.round(segment_start_idx + segment_offsets).astype(np.int64)
+
+    def _oversample_segments_batch(
+        self, video_lengths: np.ndarray, rng: Optional[np.random.Generator]
+    ) -> np.ndarray:
+        max_start_idx = video_lengths[:, np.newaxis] - self.snippet_length
+        if self.test_mode:
+            return _linspace_batch(max_start_idx, self.segment_count)
+        n_positions = max_start_idx + 1
+        shape = (len(video_lengths), self.segment_count)
+        # Positions are drawn with replacement when there are fewer positions than
+        # segments
+        start_idx = (_random(rng, shape) * n_positions).astype(np.int64)
+        without_replacement = n_positions[:, 0] >= self.segment_count
+        if np.any(without_replacement):
+            # Sampling without replacement: the positions with the smallest random
+            # keys, padding positions beyond the end of each video with infinite keys
+            n_positions = n_positions[without_replacement]
+            keys = _random(rng, (len(n_positions), n_positions.max()))
+            keys[np.arange(keys.shape[1]) >= n_positions] = np.inf
+            start_idx[without_replacement] = np.argsort(keys, axis=1)[
+                :, : self.segment_count
+            ]
+        return np.sort(start_idx, axis=1)
+
+    def _oversample_snippet_batch(self, video_lengths: np.ndarray) -> np.ndarray:
+        return _linspace_batch(video_lengths[:, np.newaxis] - 1, self.snippet_length)
+
     def _sample(self, video_length):
         segment_start_idx, segment_length = self.segment_video(video_length)
         segment_offsets = self._get_segment_offsets(segment_length)
@@ -294,8 +771,242 @@ class TemporalSegmentFrameSampler(TemporalSegmentSampler):
         return frame_idx_to_list(super().sample(video_length))
 
 
+class KeyframeAwareSampler(FrameSampler):
+    """Abstract base class of samplers that take the keyframes of the video into
+    account to reduce the cost of decoding the frames they sample.
+
+    Decoding a frame of a compressed video means decoding every frame from the
+    keyframe before it, so a clip starting just before a keyframe on a video with
+    long GOPs costs many times more frames to decode than it holds. Keyframe aware
+    samplers trade some randomness for cheaper samples by moving samples towards
+    keyframes.
+
+    Video datasets pass the keyframes of each video from its index sidecar (see
+    :func:`~torchvideo.internal.video_index.index_video_folder`), videos without a
+    sidecar are sampled as if the sampler didn't know about keyframes.
+    """
+
+    def sample(
+        self, video_length: int, keyframes: Optional[np.ndarray] = None
+    ) -> Union[slice, List[int], List[slice]]:
+        """Generate frame indices to sample from a video of ``video_length`` frames.
+
+        Args:
+            video_length: The duration in frames of the video to be sampled from
+            keyframes: Optional sorted frame numbers of the keyframes of the video.
+
+        Returns:
+            Frame indices
+        """
+        raise NotImplementedError()
+
+    def sample_plan(
+        self, video_length: int, keyframes: Optional[np.ndarray] = None
+    ) -> Union[IndexPlan, "MultiClip"]:
+        return IndexPlan.from_frame_idx(self.sample(video_length, keyframes))
+
+    def expected_decode_amplification(
+        self, video_length: int, keyframes: np.ndarray
+    ) -> float:
+        """Expected number of frames decoded per frame sampled from a video of
+        ``video_length`` frames with the keyframes ``keyframes``, see
+        :func:`decode_amplification`.
+
+        Averaging this over the videos of a dataset shows how much decoding the
+        sampler's ``keyframe_bias`` saves, and how much is left.
+        """
+        raise NotImplementedError()
+
+
+class KeyframeClipSampler(ClipSampler, KeyframeAwareSampler):
+    """Sample clips of a fixed duration from a video like :class:`ClipSampler`,
+    moving clip starts to keyframes to reduce the number of frames decoded.
+
+    With probability ``keyframe_bias`` a clip's uniformly drawn start is moved to the
+    first keyframe at or after it (or the last keyframe before it, if the clip
+    wouldn't fit), so clip starts are uniform at the granularity of GOPs rather than
+    of frames. A bias of 0 samples exactly like :class:`ClipSampler`, a bias of 1
+    starts every clip at a keyframe. Clips are sampled centrally in test mode.
+    """
+
+    def __init__(
+        self,
+        clip_length: int,
+        frame_step: int = 1,
+        test: bool = False,
+        keyframe_bias: float = 0.5,
+    ):
+        """
+        Args:
+            clip_length: Duration of clip in frames
+            frame_step: The step size between frames, this controls FPS reduction, a
+                step size of 2 will halve FPS, step size of 3 will reduce FPS to 1/3.
+            test: Whether or not to sample in test mode (in test mode the central
+                clip is sampled from the video)
+            keyframe_bias: Probability of moving each clip to start at a keyframe,
+                between 0 and 1.
+        """
+        super().__init__(clip_length, frame_step=frame_step, test=test)
+        self.keyframe_bias = _check_keyframe_bias(keyframe_bias)
+
+    def sample(
+        self, video_length: int, keyframes: Optional[np.ndarray] = None
+    ) -> Union[slice, List[int], List[slice]]:
+        frame_idx = super().sample(video_length)
+        if (
+            keyframes is None
+            or self.test_mode
+            or self.keyframe_bias == 0
+            or not isinstance(frame_idx, slice)
+            or np.random.random() >= self.keyframe_bias
+        ):
+            return frame_idx
+        max_offset = video_length - frame_idx.stop + frame_idx.start
+        start = int(
+            _snap_to_keyframes(np.array([frame_idx.start]), 0, max_offset, keyframes)[0]
+        )
+        return slice(start, start + frame_idx.stop - frame_idx.start, self.frame_step)
+
+    def expected_decode_amplification(
+        self, video_length: int, keyframes: np.ndarray
+    ) -> float:
+        sample_length = compute_sample_length(self.clip_length, self.frame_step)
+        max_offset = video_length - sample_length
+        if max_offset < 0 or self.test_mode:
+            return decode_amplification(super().sample(video_length), keyframes)
+        # Clip starts are drawn uniformly from [0, max_offset), and a fraction of
+        # them moved to keyframes
+        starts = np.arange(max(max_offset, 1))
+        clip_offsets = np.arange(0, sample_length, self.frame_step)
+        n_frames = len(clip_offsets)
+        uniform_cost = _decoded_frame_counts(
+            starts[:, np.newaxis] + clip_offsets, keyframes
+        ).mean()
+        snapped_starts = _snap_to_keyframes(starts, 0, max_offset, keyframes)
+        snapped_cost = _decoded_frame_counts(
+            snapped_starts[:, np.newaxis] + clip_offsets, keyframes
+        ).mean()
+        expected_cost = (
+            1 - self.keyframe_bias
+        ) * uniform_cost + self.keyframe_bias * snapped_cost
+        return float(expected_cost / n_frames)
+
+    def __repr__(self):
+        return (
+            self.__class__.__name__
+            + "(clip_length={!r}, frame_step={!r}, keyframe_bias={!r})".format(
+                self.clip_length, self.frame_step, self.keyframe_bias
+            )
+        )
+
+
+class KeyframeTemporalSegmentSampler(TemporalSegmentSampler, KeyframeAwareSampler):
+    """[TSN]_ style sampling like :class:`TemporalSegmentSampler`, moving snippets to
+    keyframes within their segment to reduce the number of frames decoded.
+
+    During training, with probability ``keyframe_bias`` each snippet's uniformly
+    drawn start is moved to the first keyframe at or after it that leaves the snippet
+    within its segment (or otherwise the last keyframe before it within the segment).
+    Snippets of segments without a keyframe stay where they are. A bias of 0 samples
+    exactly like :class:`TemporalSegmentSampler`.
+    """
+
+    def __init__(
+        self,
+        segment_count: int = 16,
+        snippet_length: int = 1,
+        sample_count: Optional[int] = None,
+        test: bool = True,
+        keyframe_bias: float = 0.5,
+    ):
+        """
+        Args:
+            segment_count: Number of segments to split the video into, from which a
+                snippet is sampled.
+            snippet_length: The number of frames in each snippet
+            sample_count: Override the number of samples to be drawn from the
+                segments, see :class:`TemporalSegmentSampler`.
+            test: Whether to sample in test mode or not, snippets are only moved to
+                keyframes during training.
+            keyframe_bias: Probability of moving each snippet to start at a keyframe,
+                between 0 and 1.
+        """
+        super().__init__(
+            segment_count=segment_count,
+            snippet_length=snippet_length,
+            sample_count=sample_count,
+            test=test,
+        )
+        self.keyframe_bias = _check_keyframe_bias(keyframe_bias)
+
+    def sample(
+        self, video_length: int, keyframes: Optional[np.ndarray] = None
+    ) -> Union[List[slice], List[int]]:
+        frame_idx = super().sample(video_length)
+        if (
+            keyframes is None
+            or self.test_mode
+            or self.keyframe_bias == 0
+            or video_length <= self.snippet_length
+            or video_length < self.segment_count * self.snippet_length
+        ):
+            return frame_idx
+        # Only snippets sampled from their own segment (the happy path) are moved
+        starts = np.array([snippet.start for snippet in frame_idx])
+        segment_start_idx, segment_length = self.segment_video(video_length)
+        lows = np.ceil(segment_start_idx).astype(np.int64)
+        highs = np.floor(
+            segment_start_idx + segment_length - self.snippet_length
+        ).astype(np.int64)
+        snapped_starts = _snap_to_keyframes(starts, lows, highs, keyframes)
+        moved = np.random.random(len(starts)) < self.keyframe_bias
+        starts = np.where(moved, snapped_starts, starts)
+        return [self._make_snippet_slice(start) for start in starts]
+
+    def expected_decode_amplification(
+        self, video_length: int, keyframes: np.ndarray, n_samples: int = 100
+    ) -> float:
+        """Expected number of frames decoded per frame sampled, estimated from
+        ``n_samples`` samples drawn with a fixed seed. The global
+        :mod:`numpy.random` state is restored afterwards."""
+        state = np.random.get_state()
+        np.random.seed(0)
+        try:
+            return float(
+                np.mean(
+                    [
+                        decode_amplification(
+                            self.sample(video_length, keyframes), keyframes
+                        )
+                        for _ in range(n_samples)
+                    ]
+                )
+            )
+        finally:
+            np.random.set_state(state)
+
+    def __repr__(self):
+        return (
+            "{cls_name}("
+            "segment_count={segment_count}, "
+            "snippet_length={snippet_length}, "
+            "test={test}, "
+            "keyframe_bias={keyframe_bias}"
+            ")"
+        ).format(
+            cls_name=self.__class__.__name__,
+            segment_count=self.segment_count,
+            snippet_length=self.snippet_length,
+            test=self.test_mode,
+            keyframe_bias=self.keyframe_bias,
+        )
+
+
 class LambdaSampler(FrameSampler):
-    """Custom sampler constructed from a user provided function."""
+    """Custom sampler constructed from a user provided function.
+
+    :meth:`sample_batch` calls the function for each video, so isn't vectorized.
+    """
 
     def __init__(self, sampler: Callable[[int], Union[slice, List[slice], List[int]]]):
         """
@@ -322,6 +1033,302 @@ class LambdaSampler(FrameSampler):
         return self.__class__.__name__ + "(sampler={!r})".format(self._fn)
 
 
+class BucketBatchSampler(Sampler):
+    """Batch sampler grouping videos of similar length and resolution into the same
+    batches.
+
+    Loading a batch takes as long as its slowest video, so batches mixing short, low
+    resolution videos with long, high resolution ones leave DataLoader workers idle.
+    Videos are split into ``length_buckets`` buckets by frame count and
+    ``resolution_buckets`` buckets by frame area (quantiles of the dataset, so the
+    buckets are similarly sized) and each batch is drawn from a single bucket. The
+    epoch stays random: every epoch the videos of each bucket are shuffled and split
+    into batches, and the batches of all buckets are shuffled together.
+
+    Pass it to a :class:`~torch.utils.data.DataLoader` as its ``batch_sampler``:
+
+    Example:
+        >>> loader = DataLoader(
+        ...     dataset, batch_sampler=BucketBatchSampler.from_dataset(dataset, 16)
+        ... )
+
+    Epochs are drawn from :func:`epoch_rng` with the sampler's ``seed``, and each
+    iteration over the sampler moves on to the next epoch, unless the epoch is set
+    with :meth:`set_epoch`.
+    """
+
+    def __init__(
+        self,
+        video_lengths: Sequence[int],
+        batch_size: int,
+        resolutions: Optional[Tuple[Sequence[int], Sequence[int]]] = None,
+        length_buckets: int = 8,
+        resolution_buckets: int = 4,
+        drop_last: bool = False,
+        shuffle: bool = True,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            video_lengths: The duration in frames of each video of the dataset.
+            batch_size: Number of videos in each batch.
+            resolutions: Optional ``(heights, widths)`` of the videos, ``-1`` where
+                unknown. Videos of unknown resolution form their own buckets.
+            length_buckets: Number of buckets to split the videos into by length.
+            resolution_buckets: Number of buckets to split the videos into by
+                resolution, only used if ``resolutions`` are given.
+            drop_last: Whether to drop the last batch of each bucket if it has fewer
+                than ``batch_size`` videos.
+            shuffle: Whether to shuffle the videos and batches each epoch, otherwise
+                batches hold consecutive videos of each bucket and are ordered by
+                bucket.
+            seed: Seed of the sampler's epochs, drawn from the global
+                :mod:`numpy.random` state if not given.
+        """
+        if batch_size < 1:
+            raise ValueError("batch_size must be at least 1, got {}".format(batch_size))
+        if length_buckets < 1 or resolution_buckets < 1:
+            raise ValueError("There must be at least 1 bucket")
+        self.batch_size = batch_size
+        self.drop_last = drop_last
+        self.shuffle = shuffle
+        self.seed = int(np.random.randint(2 ** 31)) if seed is None else seed
+        self.epoch = 0
+        video_lengths = np.asarray(video_lengths, dtype=np.int64)
+        buckets = _quantile_buckets(video_lengths, length_buckets)
+        if resolutions is not None:
+            heights, widths = (
+                np.asarray(sizes, dtype=np.int64) for sizes in resolutions
+            )
+            areas = heights * widths
+            known = (heights >= 0) & (widths >= 0)
+            resolution_bucket = np.full(len(areas), resolution_buckets)
+            resolution_bucket[known] = _quantile_buckets(
+                areas[known], resolution_buckets
+            )
+            buckets = buckets * (resolution_buckets + 1) + resolution_bucket
+        #: Indices of the videos in each bucket.
+        self.buckets = [
+            np.flatnonzero(buckets == bucket) for bucket in np.unique(buckets)
+        ]
+
+    @classmethod
+    def from_dataset(cls, dataset, batch_size: int, **kwargs) -> "BucketBatchSampler":
+        """Bucket the videos of ``dataset`` using the frame counts and resolutions of
+        its manifest, if it was constructed with one, or otherwise its
+        ``video_lengths``.
+
+        Args:
+            dataset: A :class:`~torchvideo.datasets.VideoFolderDataset`,
+                :class:`~torchvideo.datasets.ImageFolderVideoDataset` or
+                :class:`~torchvideo.datasets.GulpVideoDataset`.
+            batch_size: Number of videos in each batch.
+            kwargs: Other arguments of :class:`BucketBatchSampler`.
+        """
+        manifest = getattr(dataset, "manifest", None)
+        if manifest is not None and len(manifest) == len(dataset):
+            return cls(
+                manifest.frame_counts,
+                batch_size,
+                resolutions=(manifest.heights, manifest.widths),
+                **kwargs
+            )
+        return cls(dataset.video_lengths, batch_size, **kwargs)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch whose batches are sampled by the next iteration."""
+        self.epoch = epoch
+
+    def __iter__(self) -> Iterator[List[int]]:
+        rng = epoch_rng(self.seed, self.epoch)
+        self.epoch += 1
+        batches = []
+        for bucket in self.buckets:
+            if self.shuffle:
+                bucket = rng.permutation(bucket)
+            for start in range(0, len(bucket), self.batch_size):
+                batch = bucket[start : start + self.batch_size]
+                if len(batch) == self.batch_size or not self.drop_last:
+                    batches.append(batch.tolist())
+        if self.shuffle:
+            batches = [batches[i] for i in rng.permutation(len(batches))]
+        return iter(batches)
+
+    def __len__(self) -> int:
+        if self.drop_last:
+            return sum(len(bucket) // self.batch_size for bucket in self.buckets)
+        return sum(-(-len(bucket) // self.batch_size) for bucket in self.buckets)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(batch_size={!r}, n_buckets={!r})".format(
+            self.batch_size, len(self.buckets)
+        )
+
+
+ShuffleQuality = namedtuple(
+    "ShuffleQuality",
+    ("displacement", "sequential", "locality", "full_shuffle_locality"),
+)
+"""How random and how sequential an epoch of a :class:`LocalityShuffleSampler` is.
+
+``displacement`` is the mean distance between the position of each video in the
+epoch and in storage order, relative to that of a uniformly random shuffle: ``0``
+when videos are read in storage order and about ``1`` for a full shuffle, it
+measures how well the epoch is shuffled globally. ``sequential`` is the fraction of
+reads of the video stored straight after the previous one read, which measures
+how much of the epoch is left in storage order locally (about ``0`` for a full
+shuffle). ``locality`` is the fraction of consecutive reads from the same block of
+storage, and ``full_shuffle_locality`` the expected locality of a full shuffle for
+comparison."""
+
+
+class LocalityShuffleSampler(Sampler):
+    """Sampler shuffling the videos of a dataset while keeping reads mostly
+    sequential on storage.
+
+    Reading videos in a uniformly random order jumps across the disk (or gulp
+    chunks) on every read, which defeats readahead on spinning disks and network
+    file systems. Instead videos are put in storage order, split into blocks of at
+    most ``block_size`` consecutive videos within the same group (gulp chunk or
+    directory), the blocks are shuffled, and then the videos are shuffled within
+    windows of ``window`` consecutive videos. The larger the blocks, the more
+    sequential the reads, the larger the window, the more random the order (see
+    :meth:`shuffle_quality`).
+
+    Use :meth:`from_dataset` to order the videos of a
+    :class:`~torchvideo.datasets.GulpVideoDataset` by chunk and offset within the
+    chunk, or those of a :class:`~torchvideo.datasets.VideoFolderDataset` or
+    :class:`~torchvideo.datasets.ImageFolderVideoDataset` by directory and inode.
+
+    Epochs are drawn from :func:`epoch_rng` with the sampler's ``seed``, and each
+    iteration over the sampler moves on to the next epoch, unless the epoch is set
+    with :meth:`set_epoch`.
+    """
+
+    def __init__(
+        self,
+        groups: Sequence[int],
+        positions: Optional[Sequence[int]] = None,
+        block_size: Optional[int] = 64,
+        window: int = 16,
+        seed: Optional[int] = None,
+    ) -> None:
+        """
+        Args:
+            groups: Storage group of each video of the dataset, e.g. the gulp chunk
+                or directory it is stored in.
+            positions: Optional position of each video within its group, e.g. its
+                offset in the chunk. Videos are in index order within their group if
+                not given.
+            block_size: Maximum number of videos in each block, or ``None`` to
+                shuffle whole groups.
+            window: Number of consecutive videos shuffled together after shuffling
+                the blocks, ``1`` keeps blocks in storage order.
+            seed: Seed of the sampler's epochs, drawn from the global
+                :mod:`numpy.random` state if not given.
+        """
+        if block_size is not None and block_size < 1:
+            raise ValueError("block_size must be at least 1, got {}".format(block_size))
+        if window < 1:
+            raise ValueError("window must be at least 1, got {}".format(window))
+        groups = np.asarray(groups, dtype=np.int64)
+        if positions is None:
+            positions = np.arange(len(groups))
+        #: Indices of the videos in storage order.
+        self.storage_order = np.lexsort((np.asarray(positions, dtype=np.int64), groups))
+        sorted_groups = groups[self.storage_order]
+        group_starts = np.flatnonzero(np.diff(sorted_groups)) + 1
+        # Position of each video within its group, in storage order
+        position_in_group = np.arange(len(groups)) - np.repeat(
+            np.concatenate([[0], group_starts]),
+            np.diff(np.concatenate([[0], group_starts, [len(groups)]])),
+        )
+        if block_size is None:
+            block_starts = position_in_group == 0
+        else:
+            block_starts = position_in_group % block_size == 0
+        #: Block of each video in storage order.
+        self.blocks = np.cumsum(block_starts) - 1
+        self.window = window
+        self.seed = int(np.random.randint(2 ** 31)) if seed is None else seed
+        self.epoch = 0
+
+    @classmethod
+    def from_dataset(cls, dataset, **kwargs) -> "LocalityShuffleSampler":
+        """Order the videos of ``dataset`` by where they are stored.
+
+        Videos of a :class:`~torchvideo.datasets.GulpVideoDataset` are grouped by
+        chunk and ordered by their offset within the chunk. Videos of other datasets
+        (whose ``video_ids`` are paths) are grouped by directory and ordered by
+        inode number, which tracks where most file systems place files.
+
+        Args:
+            dataset: Dataset to sample from.
+            kwargs: Other arguments of :class:`LocalityShuffleSampler`.
+        """
+        if hasattr(dataset, "gulp_dir"):
+            groups, positions = _gulp_storage_locations(dataset)
+        else:
+            groups, positions = _file_storage_locations(dataset.video_ids)
+        return cls(groups, positions, **kwargs)
+
+    def set_epoch(self, epoch: int) -> None:
+        """Set the epoch sampled by the next iteration."""
+        self.epoch = epoch
+
+    def epoch_order(self, epoch: int) -> np.ndarray:
+        """Indices of the videos in the order they are visited in ``epoch``."""
+        rng = epoch_rng(self.seed, epoch)
+        n_blocks = self.blocks[-1] + 1 if len(self.blocks) else 0
+        # Shuffle blocks by giving each a random rank, keeping videos within blocks
+        # in storage order
+        block_ranks = rng.permutation(n_blocks)[self.blocks]
+        order = np.lexsort((np.arange(len(self.blocks)), block_ranks))
+        # Shuffle within windows by random keys ordered within each window
+        windows = np.arange(len(order)) // self.window
+        order = order[np.lexsort((rng.random(len(order)), windows))]
+        return self.storage_order[order]
+
+    def shuffle_quality(self, epoch: Optional[int] = None) -> ShuffleQuality:
+        """Measure how random and how sequential the order of ``epoch`` (by default
+        the next epoch) is, see :class:`ShuffleQuality`."""
+        if epoch is None:
+            epoch = self.epoch
+        order = self.epoch_order(epoch)
+        n_videos = len(order)
+        if n_videos < 2:
+            return ShuffleQuality(0.0, 1.0, 1.0, 1.0)
+        storage_rank = np.empty(n_videos, dtype=np.int64)
+        storage_rank[self.storage_order] = np.arange(n_videos)
+        ranks = storage_rank[order]
+        # Mean |i - j| of two positions drawn uniformly at random
+        full_shuffle_displacement = (n_videos ** 2 - 1) / (3 * n_videos)
+        displacement = np.abs(ranks - np.arange(n_videos)).mean()
+        blocks = self.blocks[ranks]
+        block_sizes = np.bincount(self.blocks)
+        return ShuffleQuality(
+            displacement=float(displacement / full_shuffle_displacement),
+            sequential=float(np.mean(np.diff(ranks) == 1)),
+            locality=float(np.mean(blocks[1:] == blocks[:-1])),
+            full_shuffle_locality=float(
+                (block_sizes * (block_sizes - 1)).sum() / (n_videos * (n_videos - 1))
+            ),
+        )
+
+    def __iter__(self) -> Iterator[int]:
+        order = self.epoch_order(self.epoch)
+        self.epoch += 1
+        return iter(order.tolist())
+
+    def __len__(self) -> int:
+        return len(self.storage_order)
+
+    def __repr__(self):
+        return self.__class__.__name__ + "(n_blocks={!r}, window={!r})".format(
+            int(self.blocks[-1] + 1) if len(self.blocks) else 0, self.window
+        )
+
+
 def frame_idx_to_list(frames_idx: Union[slice, List[slice], List[int]]) -> List[int]:
     """
     Converts a frame_idx object to a list of indices. Useful for testing.
@@ -336,6 +1343,14 @@ def frame_idx_to_list(frames_idx: Union[slice, List[slice], List[int]]) -> List[
     """
     # mypy needs type assertions within these conditional blocks to get the correct
     # types
+    if isinstance(frames_idx, IndexPlan):
+        return frames_idx.frame_idx.tolist()
+    if isinstance(frames_idx, MultiClip):
+        return list(
+            itertools.chain.from_iterable(
+                [frame_idx_to_list(clip_idx) for clip_idx in frames_idx]
+            )
+        )
     if isinstance(frames_idx, list):
         if len(frames_idx) == 0:
             return cast(List[int], frames_idx)
@@ -355,6 +1370,32 @@ def frame_idx_to_list(frames_idx: Union[slice, List[slice], List[int]]) -> List[
     )
 
 
+def decode_amplification(
+    frames_idx: Union[slice, List[slice], List[int]], keyframes: np.ndarray
+) -> float:
+    """Number of frames decoded per frame loaded when loading ``frames_idx`` from a
+    video with the keyframes ``keyframes``.
+
+    Decoding is modelled on the seeking ``"pyav"`` backend: the decoder seeks to the
+    keyframe before the next frame to load if that keyframe is beyond the last frame
+    decoded, and otherwise decodes every frame up to the next frame to load.
+
+    Args:
+        frames_idx: Frame indices as a slice, list of slices, or list of ints.
+        keyframes: Sorted frame numbers of the keyframes of the video.
+
+    Returns:
+        Ratio of the frames decoded to the unique frames loaded, ``1`` when every
+        frame is a keyframe.
+    """
+    load_idx = IndexPlan.from_frame_idx(frames_idx).load_idx
+    if len(load_idx) == 0:
+        return 1.0
+    return float(_decoded_frame_counts(load_idx[np.newaxis], keyframes)[0]) / len(
+        load_idx
+    )
+
+
 def compute_sample_length(clip_length, step_size):
     """Computes the number of frames to be sampled for a clip of length
     ``clip_length`` with frame step size of ``step_size`` to be generated.
@@ -380,6 +1421,157 @@ def _slice_to_list(slice_: slice) -> List[int]:
     return list(range(start, stop, step))
 
 
+def epoch_rng(seed: int, epoch: int) -> np.random.Generator:
+    """Counter-based (:class:`numpy.random.Philox`) generator of the random numbers
+    of epoch ``epoch`` of run ``seed``.
+
+    The generator is keyed by ``seed`` and ``epoch``, so it produces the same numbers
+    in any process and the numbers of different epochs are independent.
+    """
+    if seed < 0 or epoch < 0:
+        raise ValueError(
+            "seed and epoch must be non-negative, got seed={} and epoch={}".format(
+                seed, epoch
+            )
+        )
+    return np.random.Generator(np.random.Philox(key=[seed, epoch]))
+
+
+def _random(rng: Optional[np.random.Generator], shape) -> np.ndarray:
+    """Uniform samples in ``[0, 1)`` from ``rng``, or the global :mod:`numpy.random`
+    state if not given."""
+    if rng is None:
+        return np.random.random(shape)
+    return rng.random(shape)
+
+
+def _contiguous_runs(load_idx: np.ndarray) -> np.ndarray:
+    """``[start, stop)`` bounds of the runs of consecutive frames in the sorted,
+    unique ``load_idx``."""
+    if len(load_idx) == 0:
+        return np.empty((0, 2), dtype=np.int64)
+    breaks = np.flatnonzero(np.diff(load_idx) != 1) + 1
+    starts = load_idx[np.concatenate([[0], breaks])]
+    stops = load_idx[np.concatenate([breaks - 1, [len(load_idx) - 1]])] + 1
+    return np.stack([starts, stops], axis=1)
+
+
+def _keyframes_before(keyframes: np.ndarray, frames: np.ndarray) -> np.ndarray:
+    """The last keyframe at or before each of ``frames``, ``0`` if there is none
+    (see :meth:`~torchvideo.internal.video_index.VideoIndex.keyframe_before`)."""
+    keyframes = np.asarray(keyframes, dtype=np.int64)
+    positions = np.searchsorted(keyframes, frames, side="right") - 1
+    if len(keyframes) == 0:
+        return np.zeros_like(frames)
+    return np.where(positions < 0, 0, keyframes[np.maximum(positions, 0)])
+
+
+def _decoded_frame_counts(load_idx: np.ndarray, keyframes: np.ndarray) -> np.ndarray:
+    """Number of frames decoded to load each row of ``load_idx`` (each sorted and
+    unique), see :func:`decode_amplification`."""
+    load_idx = np.asarray(load_idx, dtype=np.int64)
+    # Where the decoder would continue from after the previous frame
+    continue_from = np.concatenate(
+        [np.full((len(load_idx), 1), -1), load_idx[:, :-1] + 1], axis=1
+    )
+    decode_from = np.maximum(continue_from, _keyframes_before(keyframes, load_idx))
+    return (load_idx - decode_from + 1).sum(axis=1)
+
+
+def _snap_to_keyframes(
+    starts: np.ndarray, lows, highs, keyframes: np.ndarray
+) -> np.ndarray:
+    """Move each of ``starts`` to the first keyframe at or after it, or failing that
+    the last keyframe before it, that lies within ``[lows, highs]``. Starts without
+    such a keyframe stay where they are."""
+    keyframes = np.asarray(keyframes, dtype=np.int64)
+    if len(keyframes) == 0:
+        return starts
+    positions = np.searchsorted(keyframes, starts, side="left")
+    next_keyframes = keyframes[np.minimum(positions, len(keyframes) - 1)]
+    previous_keyframes = keyframes[np.maximum(positions - 1, 0)]
+    has_next = (
+        (positions < len(keyframes))
+        & (next_keyframes >= lows)
+        & (next_keyframes <= highs)
+    )
+    has_previous = (
+        (positions > 0) & (previous_keyframes >= lows) & (previous_keyframes <= highs)
+    )
+    return np.where(
+        has_next, next_keyframes, np.where(has_previous, previous_keyframes, starts)
+    )
+
+
+def _check_keyframe_bias(keyframe_bias: float) -> float:
+    if not 0 <= keyframe_bias <= 1:
+        raise ValueError(
+            "keyframe_bias must be between 0 and 1, got {}".format(keyframe_bias)
+        )
+    return keyframe_bias
+
+
+def _quantile_buckets(values: np.ndarray, n_buckets: int) -> np.ndarray:
+    """Split ``values`` into ``n_buckets`` buckets of roughly equal size by their
+    quantiles, returning the bucket of each value."""
+    if len(values) == 0:
+        return np.zeros(0, dtype=np.int64)
+    edges = np.quantile(values, np.linspace(0, 1, n_buckets + 1)[1:-1])
+    return np.searchsorted(edges, values, side="right")
+
+
+def _gulp_storage_locations(dataset) -> Tuple[np.ndarray, np.ndarray]:
+    """Chunk of each video of a gulp dataset and its offset within the chunk."""
+    gulp_dir = dataset.gulp_dir
+    groups = []
+    positions = []
+    for id_ in dataset.video_ids:
+        groups.append(int(gulp_dir.chunk_lookup[id_]))
+        frame_info = gulp_dir.merged_meta_dict[id_]["frame_info"]
+        positions.append(frame_info[0][0] if len(frame_info) else 0)
+    return np.array(groups, dtype=np.int64), np.array(positions, dtype=np.int64)
+
+
+def _file_storage_locations(paths: Sequence[Path]) -> Tuple[np.ndarray, np.ndarray]:
+    """Directory of each of ``paths`` and its inode number."""
+    directories = {}  # type: dict
+    groups = []
+    positions = []
+    for path in paths:
+        path = Path(path)
+        groups.append(directories.setdefault(path.parent, len(directories)))
+        try:
+            positions.append(os.stat(str(path)).st_ino)
+        except OSError:
+            positions.append(0)
+    return np.array(groups, dtype=np.int64), np.array(positions, dtype=np.int64)
+
+
+def _check_video_lengths(video_lengths: np.ndarray) -> np.ndarray:
+    video_lengths = np.asarray(video_lengths, dtype=np.int64)
+    if video_lengths.ndim != 1:
+        raise ValueError(
+            "video_lengths must be 1D but had shape {}".format(video_lengths.shape)
+        )
+    if np.any(video_lengths <= 0):
+        raise ValueError(
+            "Videos must be at least 1 frame long but were {} frames long".format(
+                video_lengths[video_lengths <= 0].tolist()
+            )
+        )
+    return video_lengths
+
+
+def _linspace_batch(stops: np.ndarray, num: int) -> np.ndarray:
+    """``np.linspace(0, stop, num).astype(np.intp)`` of each of the ``(n, 1)``
+    ``stops``, computed in the same way so the results are identical."""
+    if num == 1:
+        return np.zeros((len(stops), 1), dtype=np.int64)
+    samples = np.arange(num) * (stops / (num - 1))
+    samples[:, -1] = stops[:, 0]
+    return samples.astype(np.int64)
+
+
 def _oversample(video_length: int, sample_length: int) -> List[int]:
     assert (
         sample_length > video_length
@@ -0,0 +1,99 @@
+import argparse
+import logging
+from pathlib import Path
+from typing import Optional
+
+from torchvideo.datasets import (
+    DatasetManifest,
+    GulpVideoDataset,
+    ImageFolderVideoDataset,
+    RecordSet,
+    VideoDataset,
+    VideoFolderDataset,
+    VideoRecordDataset,
+    default_manifest_path,
+)
+
+parser = argparse.ArgumentParser(
+    description="Build a manifest of a dataset so it can be constructed without "
+    "scanning and probing its videos",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("dataset_root", type=Path, help="Path to the root of the dataset")
+parser.add_argument(
+    "--dataset-type",
+    type=str,
+    default="video",
+    choices=["gulp", "image", "video", "record"],
+)
+parser.add_argument("--image-filename-template", default="frame_{:05d}.jpg")
+parser.add_argument(
+    "--record-file",
+    type=Path,
+    help="Record file listing the videos of a 'record' dataset, one "
+    "'<path> <label>' pair per line",
+)
+parser.add_argument(
+    "-o",
+    "--output",
+    type=Path,
+    help="Where to write the manifest, defaults to a file in the dataset root",
+)
+parser.add_argument("-j", "--workers", type=int, default=0)
+parser.add_argument(
+    "--update",
+    action="store_true",
+    help="Incrementally update an existing manifest of a 'video' or 'image' dataset, "
+    "only probing videos added or modified since it was built",
+)
+
+
+def make_dataset(args, manifest: Optional[Path] = None) -> VideoDataset:
+    dataset_type = args.dataset_type.lower()
+    if manifest is not None and dataset_type not in ("image", "video"):
+        raise ValueError(
+            "Only 'image' and 'video' dataset manifests can be updated, rebuild the "
+            "manifest of '{}' datasets instead".format(dataset_type)
+        )
+    if dataset_type == "gulp":
+        return GulpVideoDataset(args.dataset_root)
+    elif dataset_type == "image":
+        return ImageFolderVideoDataset(
+            args.dataset_root,
+            args.image_filename_template,
+            frame_counter_workers=args.workers,
+            manifest=manifest,
+            update_manifest=manifest is not None,
+        )
+    elif dataset_type == "video":
+        return VideoFolderDataset(
+            args.dataset_root,
+            frame_counter_workers=args.workers,
+            manifest=manifest,
+            update_manifest=manifest is not None,
+        )
+    elif dataset_type == "record":
+        if args.record_file is None:
+            raise ValueError("--record-file is required for 'record' datasets")
+        return VideoRecordDataset(args.dataset_root, RecordSet(args.record_file))
+    else:
+        raise ValueError("Unknown dataset type '{}'".format(args.dataset_type))
+
+
+def main(args) -> None:
+    output = args.output
+    if output is None:
+        output = default_manifest_path(args.dataset_root)
+    if args.update and output.exists():
+        # Datasets save the updated manifest back to where they loaded it from
+        manifest = make_dataset(args, manifest=output).manifest
+    else:
+        dataset = make_dataset(args)
+        manifest = DatasetManifest.from_dataset(dataset, workers=args.workers)
+        manifest.save(output)
+    print("Wrote manifest of {} videos to {}".format(len(manifest), output))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    main(parser.parse_args())
@@ -0,0 +1,34 @@
+import argparse
+import logging
+from pathlib import Path
+
+from torchvideo.internal.video_index import index_video_folder
+
+parser = argparse.ArgumentParser(
+    description="Build keyframe index sidecars for a folder of videos",
+    formatter_class=argparse.ArgumentDefaultsHelpFormatter,
+)
+parser.add_argument("dataset_root", type=Path, help="Path to the folder of videos")
+parser.add_argument(
+    "-j", "--workers", type=int, default=None, help="Defaults to the number of CPUs"
+)
+parser.add_argument(
+    "--overwrite", action="store_true", help="Rebuild up to date index sidecars"
+)
+
+
+def main(args) -> None:
+    results = index_video_folder(
+        args.dataset_root, workers=args.workers, overwrite=args.overwrite
+    )
+    failures = {path: error for path, error in results.items() if error is not None}
+    print("Indexed {} videos".format(len(results) - len(failures)))
+    if failures:
+        print("Failed to index {} videos:".format(len(failures)))
+        for path, error in sorted(failures.items()):
+            print("  {}: {}".format(path, error))
+
+
+if __name__ == "__main__":
+    logging.basicConfig()
+    main(parser.parse_args())
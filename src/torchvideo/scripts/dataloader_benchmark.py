@@ -1,4 +1,5 @@
 import argparse
+import resource
 from pathlib import Path
 from time import time
 from typing import Optional
@@ -26,6 +27,7 @@ from torchvideo.transforms import (
     CollectFrames,
     CenterCropVideo,
 )
+from torchvideo.workers import WorkerBudget
 
 parser = argparse.ArgumentParser(
     description="Benchmark data loading",
@@ -44,6 +46,18 @@ parser.add_argument(
     "--dataset-type", type=str, default="gulp", choices=["gulp", "image", "video"]
 )
 parser.add_argument("--image-filename-template", default="frame_{:05d}.jpg")
+parser.add_argument(
+    "--backend",
+    type=str,
+    default=None,
+    help="Decoder backend used by the 'video' dataset type, defaults to the global "
+    "backend",
+)
+parser.add_argument(
+    "--fast-decode",
+    action="store_true",
+    help="Let the decoder trade accuracy for speed ('video' dataset type only)",
+)
 parser.add_argument(
     "--sampler", type=str, default="clip", choices=["full", "clip", "tsn"]
 )
@@ -51,6 +65,28 @@ parser.add_argument("--sampler-clip-length", type=int, default=10)
 parser.add_argument("--sampler-tsn-segment-count", type=int, default=3)
 parser.add_argument("--sampler-tsn-segment-length", type=int, default=1)
 parser.add_argument("-j", "--workers", type=int, default=0)
+parser.add_argument(
+    "--worker-cpus",
+    type=int,
+    default=None,
+    help="CPU budget of each worker, see torchvideo.workers.WorkerBudget. Workers "
+    "are left to the default thread pools if none of the budget options are given",
+)
+parser.add_argument(
+    "--torch-threads",
+    type=int,
+    default=None,
+    help="torch threads of each worker, defaults to the worker's CPU budget",
+)
+parser.add_argument(
+    "--decoder-threads",
+    type=int,
+    default=None,
+    help="Decoder threads of each worker, defaults to the worker's CPU budget",
+)
+parser.add_argument(
+    "--no-pin", action="store_true", help="Don't pin workers to their CPUs"
+)
 
 
 def benchmark_dataloader(
@@ -59,9 +95,11 @@ def benchmark_dataloader(
     profile: bool = False,
     profile_callgrind: Path = None,
 ) -> None:
-    dataloader_iter = iter(loader)
+    n_examples = 0
 
     def run_dataloader():
+        nonlocal n_examples
+        dataloader_iter = iter(loader)
         end_of_iter_time = time()
         total_iterations = (
             len(dataloader_iter)
@@ -73,7 +111,12 @@ def benchmark_dataloader(
                 break
             start_of_iter_time = time()
             dataloader_duration_s = start_of_iter_time - end_of_iter_time
-            examples_per_second = loader.batch_size / dataloader_duration_s
+            # Batches are (frames, labels) pairs when the dataset is labelled, and
+            # the final batch may be short
+            batch_size = (
+                len(batch[0]) if isinstance(batch, (list, tuple)) else len(batch)
+            )
+            examples_per_second = batch_size / dataloader_duration_s
 
             print(
                 "batch[{}/{}] {:.2f} examples/s".format(
@@ -81,7 +124,12 @@ def benchmark_dataloader(
                 )
             )
             end_of_iter_time = start_of_iter_time
+            n_examples += batch_size
 
+    # The iterator is dropped when run_dataloader returns, which shuts down the
+    # workers so that their CPU time is included in the children's usage
+    start_time = time()
+    start_cpu_time = _cpu_time()
     if profile:
         prof = pprofile.Profile()
         with prof():
@@ -94,6 +142,28 @@ def benchmark_dataloader(
             prof.print_stats()
     else:
         run_dataloader()
+    duration_s = time() - start_time
+    cpu_time_s = _cpu_time() - start_cpu_time
+    if n_examples > 0:
+        print(
+            "{} examples in {:.2f}s: {:.2f} examples/s, {:.1f}ms CPU time per "
+            "example, {:.2f} CPUs busy on average".format(
+                n_examples,
+                duration_s,
+                n_examples / duration_s,
+                1000 * cpu_time_s / n_examples,
+                cpu_time_s / duration_s,
+            )
+        )
+
+
+def _cpu_time() -> float:
+    """User and system CPU time of this process and its terminated children."""
+    total = 0.0
+    for who in (resource.RUSAGE_SELF, resource.RUSAGE_CHILDREN):
+        usage = resource.getrusage(who)
+        total += usage.ru_utime + usage.ru_stime
+    return total
 
 
 def main(args) -> None:
@@ -103,12 +173,15 @@ def main(args) -> None:
         sampler=sampler,
         transform=Compose([CenterCropVideo(100), CollectFrames(), PILVideoToTensor()]),
     )
+    worker_budget = make_worker_budget(args)
+    print("Worker budget: {}".format(worker_budget))
     loader = DataLoader(
         dataset,
         num_workers=args.workers,
         batch_size=args.batch_size,
         shuffle=args.shuffle,
         pin_memory=args.pin_memory,
+        worker_init_fn=worker_budget,
     )
     benchmark_dataloader(
         loader,
@@ -147,11 +220,28 @@ def make_dataset(
             label_set=DummyLabelSet(),
             sampler=sampler,
             transform=transform,
+            backend=args.backend,
+            fast_decode=args.fast_decode,
         )
     else:
         raise ValueError("Unknown dataset type '{}'".format(args.dataset_type))
 
 
+def make_worker_budget(args) -> Optional[WorkerBudget]:
+    if (
+        args.worker_cpus is None
+        and args.torch_threads is None
+        and args.decoder_threads is None
+    ):
+        return None
+    return WorkerBudget(
+        cpus=args.worker_cpus,
+        torch_threads=args.torch_threads,
+        decoder_threads=args.decoder_threads,
+        pin=not args.no_pin,
+    )
+
+
 def make_sampler(args) -> FrameSampler:
     if args.sampler == "full":
         return FullVideoSampler()
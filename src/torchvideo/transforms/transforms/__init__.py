@@ -7,6 +7,7 @@ __all__ = [
     "IdentityTransform",
     "MultiScaleCropVideo",
     "NDArrayToPILVideo",
+    "NDArrayVideoToTensor",
     "NormalizeVideo",
     "PILVideoToTensor",
     "RandomCropVideo",
@@ -26,6 +27,7 @@ from .compose import Compose
 from .identity_transform import IdentityTransform
 from .multiscale_crop_video import MultiScaleCropVideo
 from .ndarray_to_pil_video import NDArrayToPILVideo
+from .ndarray_video_to_tensor import NDArrayVideoToTensor
 from .normalize_video import NormalizeVideo
 from .pil_video_to_tensor import PILVideoToTensor
 from .random_color_jitter import ColorJitterVideo
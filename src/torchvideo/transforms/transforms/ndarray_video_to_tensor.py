@@ -0,0 +1,58 @@
+import numpy as np
+import torch
+
+from .transform import Transform
+
+
+class NDArrayVideoToTensor(Transform[np.ndarray, torch.Tensor, None]):
+    r"""Convert a :py:class:`numpy.ndarray` video of the format :math:`(T, H, W, C)` to
+    a tensor :math:`(C, T, H, W)` or :math:`(T, C, H, W)`.
+
+    This is the ndarray counterpart of :class:`PILVideoToTensor` for datasets loading
+    frames with ``as_ndarray=True``. The frames are converted in one operation over
+    the whole clip rather than frame by frame, and the returned tensor is a permuted
+    view of the converted array.
+    """
+
+    def __init__(self, rescale: bool = True, ordering: str = "CTHW"):
+        """
+        Args:
+            rescale: Whether or not to rescale video from :math:`[0, 255]` to
+                :math:`[0, 1]`. If ``False`` the tensor will be in range
+                :math:`[0, 255]`.
+            ordering: What channel ordering to convert the tensor to. Either `'CTHW'`
+                or `'TCHW'`
+        """
+        self.rescale = rescale
+        self.ordering = ordering.upper()
+        acceptable_ordering = ["CTHW", "TCHW"]
+        if self.ordering not in acceptable_ordering:
+            raise ValueError(
+                "Ordering must be one of {} but was {}".format(
+                    acceptable_ordering, self.ordering
+                )
+            )
+
+    def _gen_params(self, frames: np.ndarray) -> None:
+        return None
+
+    def _transform(self, frames: np.ndarray, params: None) -> torch.Tensor:
+        if frames.ndim == 3:
+            # Single channel video without a channel dimension
+            frames = frames[..., np.newaxis]
+        # Converting to float copies the frames, so this works for read-only arrays
+        # wrapping decoder output too.
+        tensor = torch.from_numpy(frames.astype(np.float32))
+        if self.rescale:
+            tensor.div_(255)
+        if self.ordering == "CTHW":
+            return tensor.permute(3, 0, 1, 2)
+        return tensor.permute(0, 3, 1, 2)
+
+    def __repr__(self):
+        return (
+            self.__class__.__name__
+            + "(rescale={rescale!r}, ordering={ordering!r})".format(
+                rescale=self.rescale, ordering=self.ordering
+            )
+        )
@@ -6,6 +6,8 @@ import torch
 from .. import functional as VF
 from .transform import Transform
 
+_LUMA_WEIGHTS = (0.299, 0.587, 0.114)
+
 
 class NormalizeVideo(Transform[torch.Tensor, torch.Tensor, None]):
     r"""
@@ -16,6 +18,10 @@ class NormalizeVideo(Transform[torch.Tensor, torch.Tensor, None]):
     :math:`\Sigma = (\sigma_1, \ldots, \sigma_n)`:
     :math:`t'_c = \frac{t_c - M_c}{\Sigma_c}`
 
+    Single channel (grayscale) videos can be normalised with RGB statistics, e.g.
+    those of ImageNet, in which case the statistics are converted to luma using the
+    ITU-R 601-2 weights that grayscale frames are decoded with.
+
     Args:
         mean: Sequence of means for each channel, or a single mean applying to all
             channels.
@@ -58,10 +64,21 @@ class NormalizeVideo(Transform[torch.Tensor, torch.Tensor, None]):
         channel_count = frames.shape[self.channel_dim]
         mean = self._broadcast_to_seq(self.mean, channel_count)
         std = self._broadcast_to_seq(self.std, channel_count)
+        if channel_count == 1 and len(mean) == 3 and len(std) == 3:
+            mean = [self._rgb_to_luma(mean)]
+            std = [self._rgb_to_luma(std)]
         return VF.normalize(
             frames, mean, std, inplace=self.inplace, channel_dim=self.channel_dim
         )
 
+    @staticmethod
+    def _rgb_to_luma(x: Sequence[numbers.Number]) -> float:
+        # The luma standard deviation is approximated by the weighted standard
+        # deviations, which is exact for perfectly correlated channels.
+        return sum(
+            weight * value for weight, value in zip(_LUMA_WEIGHTS, x)  # type: ignore
+        )
+
     @staticmethod
     def _broadcast_to_seq(
         x: Union[numbers.Number, Sequence], channel_count: int
@@ -0,0 +1,120 @@
+import os
+import warnings
+from typing import Callable, Optional, Set
+
+import torch
+
+
+class WorkerBudget:
+    """CPU budget of each :class:`~torch.utils.data.DataLoader` worker, applied by
+    passing the budget as the loader's ``worker_init_fn``.
+
+    By default video decoders start a thread per CPU, so when many workers decode at
+    once the CPUs are badly oversubscribed: on a 64 core machine 16 workers start
+    over a thousand decoder threads, which spend their time contending rather than
+    decoding. A budget of ``cpus`` CPUs per worker limits the threads of the video
+    decoders (see :func:`torchvideo.set_decoder_threads`) and torch's intra-op
+    thread pool to ``cpus``, and pins each worker to its own ``cpus`` CPUs so
+    workers don't migrate between cores and evict each other's caches.
+
+    Example:
+        >>> loader = DataLoader(
+        ...     dataset, num_workers=16, worker_init_fn=WorkerBudget(cpus=4)
+        ... )
+
+    Workers are pinned to consecutive blocks of the CPUs the loading process may run
+    on, worker ``i`` to the ``i``-th block, wrapping around when there are more
+    workers than blocks. Pinning requires :func:`os.sched_setaffinity` (Linux), on
+    other platforms only the thread counts are set.
+    """
+
+    def __init__(
+        self,
+        cpus: Optional[int] = None,
+        torch_threads: Optional[int] = None,
+        decoder_threads: Optional[int] = None,
+        pin: bool = True,
+        worker_init_fn: Optional[Callable[[int], None]] = None,
+    ) -> None:
+        """
+        Args:
+            cpus: Number of CPUs each worker may use. If not given, workers aren't
+                pinned and the thread counts default to 1.
+            torch_threads: Number of threads torch uses for intra-op parallelism in
+                each worker, defaults to ``cpus``.
+            decoder_threads: Number of threads each video decoder uses, defaults to
+                ``cpus``.
+            pin: Whether to pin each worker to its CPUs, only used when ``cpus`` is
+                given.
+            worker_init_fn: Optional function to call with the worker id after
+                applying the budget, e.g. to seed the worker.
+        """
+        if cpus is not None and cpus < 1:
+            raise ValueError("cpus must be at least 1, got {}".format(cpus))
+        default_threads = 1 if cpus is None else cpus
+        self.cpus = cpus
+        self.torch_threads = default_threads if torch_threads is None else torch_threads
+        self.decoder_threads = (
+            default_threads if decoder_threads is None else decoder_threads
+        )
+        self.pin = pin
+        self.worker_init_fn = worker_init_fn
+
+    @classmethod
+    def divide(cls, num_workers: int, **kwargs) -> "WorkerBudget":
+        """Budget dividing the CPUs the process may run on evenly between
+        ``num_workers`` workers.
+
+        Args:
+            num_workers: Number of workers of the loader.
+            kwargs: Other arguments of :class:`WorkerBudget`.
+        """
+        if num_workers < 1:
+            raise ValueError(
+                "num_workers must be at least 1, got {}".format(num_workers)
+            )
+        return cls(cpus=max(1, len(_available_cpus()) // num_workers), **kwargs)
+
+    def worker_cpus(self, worker_id: int, available_cpus: Set[int]) -> Set[int]:
+        """CPUs worker ``worker_id`` is pinned to when the loading process may run on
+        ``available_cpus``."""
+        if self.cpus is None:
+            return set(available_cpus)
+        cpus = sorted(available_cpus)
+        n_blocks = len(cpus) // self.cpus
+        if n_blocks == 0:
+            # The budget is larger than the machine, so share all the CPUs
+            return set(cpus)
+        block = worker_id % n_blocks
+        return set(cpus[block * self.cpus : (block + 1) * self.cpus])
+
+    def __call__(self, worker_id: int) -> None:
+        from torchvideo import set_decoder_threads
+
+        torch.set_num_threads(self.torch_threads)
+        set_decoder_threads(self.decoder_threads)
+        if self.pin and self.cpus is not None:
+            if hasattr(os, "sched_setaffinity"):
+                os.sched_setaffinity(0, self.worker_cpus(worker_id, _available_cpus()))
+            else:  # pragma: no cover
+                warnings.warn(
+                    "CPU affinity can't be set on this platform, DataLoader workers "
+                    "won't be pinned to CPUs",
+                    RuntimeWarning,
+                )
+        if self.worker_init_fn is not None:
+            self.worker_init_fn(worker_id)
+
+    def __repr__(self) -> str:
+        return (
+            self.__class__.__name__ + "(cpus={}, torch_threads={}, "
+            "decoder_threads={}, pin={})".format(
+                self.cpus, self.torch_threads, self.decoder_threads, self.pin
+            )
+        )
+
+
+def _available_cpus() -> Set[int]:
+    if hasattr(os, "sched_getaffinity"):
+        return os.sched_getaffinity(0)
+    return set(range(os.cpu_count() or 1))  # pragma: no cover
@@ -1,5 +1,9 @@
+import numpy as np
+import pytest
+
 from tests import TEST_DATA_ROOT
-from torchvideo.internal.readers import lintel_loader
+from torchvideo.internal.container_probe import probe_container
+from torchvideo.internal.readers import lintel_loader, pyav_loader
 
 
 class TestLintelReader:
@@ -36,3 +40,75 @@ class TestLintelReader:
             assert frame.width == self.width
             assert frame.height == self.height
             assert frame.mode == "RGB"
+
+
+class TestPyAVReader(TestLintelReader):
+    def setup_method(self):
+        pytest.importorskip("av")
+
+    def test_reading_sequential_contiguous_frames(self):
+        frames = self.load_frames([0, 1, 2, 3])
+
+        self.check_frames(frames, 4)
+
+    def test_frames_match_lintel(self):
+        frame_idx = [10, 3, 3, 40]
+
+        pyav_frames = self.load_frames(frame_idx)
+        lintel_frames = list(lintel_loader(self.video_path, frame_idx))
+
+        for pyav_frame, lintel_frame in zip(pyav_frames, lintel_frames):
+            difference = np.asarray(pyav_frame, dtype=np.float32) - np.asarray(
+                lintel_frame, dtype=np.float32
+            )
+            assert np.abs(difference).mean() < 2
+
+    def test_fast_decoding_is_close_to_exact_decoding(self):
+        frame_idx = [0, 100, 101, 500]
+
+        fast_frames = pyav_loader(
+            self.video_path, frame_idx, as_ndarray=True, fast_decode=True
+        )
+        exact_frames = pyav_loader(self.video_path, frame_idx, as_ndarray=True)
+
+        assert fast_frames.shape == exact_frames.shape
+        difference = fast_frames.astype(np.float32) - exact_frames
+        assert np.abs(difference).mean() < 2
+
+    @pytest.mark.parametrize(
+        "frame_idx",
+        [
+            [0, 1],
+            [400, 401, 402],
+            [700, 350, 720],
+            [758],
+            [757, 759],
+            slice(0, 759, 4),
+            slice(5, 759, 97),
+        ],
+    )
+    def test_seeking_matches_sequential_decoding(self, frame_idx):
+        seeked_frames = list(pyav_loader(self.video_path, frame_idx, seek=True))
+        sequential_frames = list(pyav_loader(self.video_path, frame_idx, seek=False))
+
+        assert len(seeked_frames) == len(sequential_frames)
+        for seeked_frame, sequential_frame in zip(seeked_frames, sequential_frames):
+            np.testing.assert_array_equal(
+                np.asarray(seeked_frame), np.asarray(sequential_frame)
+            )
+
+    def load_frames(self, frame_idx):
+        return list(pyav_loader(self.video_path, frame_idx))
+
+
+class TestProbeContainer:
+    video_path = TestLintelReader.video_path
+
+    def test_probe_matches_video(self):
+        info = probe_container(self.video_path)
+
+        assert info.n_frames == TestLintelReader.frame_count
+        assert (info.width, info.height) == (
+            TestLintelReader.width,
+            TestLintelReader.height,
+        )
@@ -2,6 +2,7 @@ import pytest
 from pyfakefs.fake_filesystem import FakeFilesystem
 
 import torchvideo.datasets.video_folder_dataset
+from torchvideo.internal.readers import VideoInfo
 
 
 @pytest.fixture
@@ -9,11 +10,17 @@ def mock_frame_count(monkeypatch):
     def get_videofile_frame_count(path):
         return 10
 
+    def probe_videofile(path):
+        return VideoInfo(height=240, width=320, n_frames=10, fps=25.0)
+
     monkeypatch.setattr(
         torchvideo.datasets.video_folder_dataset,
         "_get_videofile_frame_count",
         get_videofile_frame_count,
     )
+    monkeypatch.setattr(
+        torchvideo.datasets.video_folder_dataset, "_probe_videofile", probe_videofile
+    )
 
 
 @pytest.fixture()
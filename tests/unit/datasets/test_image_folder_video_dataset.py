@@ -1,9 +1,17 @@
 import os
 from pathlib import Path
 
+import numpy as np
+import pytest
+import torch
+from PIL import Image
+
 from torchvideo.datasets import LambdaLabelSet
 from torchvideo.datasets import DummyLabelSet
 from torchvideo.datasets import ImageFolderVideoDataset
+from torchvideo.internal.readers import FrameCache
+from torchvideo.samplers import LambdaSampler, MultiClipSampler
+from torchvideo.transforms import PILVideoToTensor
 from ..mock_transforms import (
     MockFramesOnlyTransform,
     MockFramesAndOptionalTargetTransform,
@@ -46,6 +54,15 @@ class TestImageFolderVideoDatasetUnit:
         assert 10 == len(dataset.labels)
         assert all([label == i for i, label in enumerate(dataset.labels)])
 
+    def test_frame_counting_in_parallel(self, dataset_dir):
+        self.make_video_dirs(dataset_dir, 10, frame_count=7)
+
+        dataset = ImageFolderVideoDataset(
+            dataset_dir, "frame_{:05d}.jpg", frame_counter_workers=4
+        )
+
+        assert dataset.video_lengths == [7] * 10
+
     def test_transform_is_applied(self, dataset_dir):
         self.make_video_dirs(dataset_dir, 1)
         transform = MockFramesOnlyTransform(lambda frames: frames)
@@ -85,6 +102,157 @@ class TestImageFolderVideoDatasetUnit:
             ["video{}".format(i) for i in range(0, video_count)]
         )
 
+    def test_loading_frames_as_ndarray(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(5):
+            frame = np.full((4, 6, 3), i * 10, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            sampler=LambdaSampler(lambda video_length: [3, 1, 1]),
+            transform=lambda frames: frames,
+            as_ndarray=True,
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (3, 4, 6, 3)
+        assert frames.dtype == np.uint8
+        assert frames[:, 0, 0, 0].tolist() == [30, 10, 10]
+
+    def test_ndarray_frames_are_converted_to_tensor_by_default(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(3):
+            frame = np.full((4, 6, 3), 255, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+
+        dataset = ImageFolderVideoDataset(
+            dataset_dir, "frame_{:05d}.png", as_ndarray=True
+        )
+        frames = dataset[0]
+
+        assert isinstance(frames, torch.Tensor)
+        assert frames.shape == (3, 3, 4, 6)
+        assert frames.max().item() == 1
+
+    def test_loading_frames_at_reduced_size(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(2):
+            frame = np.full((64, 96, 3), 128, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            transform=lambda frames: frames,
+            as_ndarray=True,
+            frame_size=16,
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (2, 16, 24, 3)
+
+    def test_loading_grayscale_frames(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(2):
+            frame = np.full((4, 6, 3), 100, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+        dataset = ImageFolderVideoDataset(
+            dataset_dir, "frame_{:05d}.png", as_ndarray=True, grayscale=True
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (1, 2, 4, 6)
+
+    def test_images_are_converted_to_rgb(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        frame = Image.fromarray(np.full((4, 6, 3), 100, dtype=np.uint8))
+        for i, mode in enumerate(["RGBA", "P", "L"]):
+            frame.convert(mode).save(str(video_dir / "frame_{:05d}.png".format(i + 1)))
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            transform=lambda frames: frames,
+            as_ndarray=True,
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (3, 4, 6, 3)
+
+    def test_loading_no_frames_raises_error(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        Image.new("RGB", (6, 4)).save(str(video_dir / "frame_00001.png"))
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            sampler=LambdaSampler(lambda video_length: []),
+            as_ndarray=True,
+        )
+
+        with pytest.raises(ValueError, match="No frames"):
+            dataset[0]
+
+    def test_multi_clip_samples_are_stacked(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(6):
+            frame = np.full((4, 6, 3), i, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            sampler=MultiClipSampler(clip_length=4, clip_count=2),
+            transform=PILVideoToTensor(rescale=False),
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (2, 3, 4, 4, 6)
+        assert frames[:, 0, :, 0, 0].tolist() == [[0, 1, 2, 3], [2, 3, 4, 5]]
+
+    def test_cached_frames_are_not_read_again(self, dataset_dir):
+        video_dir = Path(dataset_dir) / "video0"
+        video_dir.mkdir()
+        for i in range(4):
+            frame = np.full((4, 6, 3), i, dtype=np.uint8)
+            Image.fromarray(frame).save(
+                str(video_dir / "frame_{:05d}.png".format(i + 1))
+            )
+        cache = FrameCache(max_bytes=10 ** 6)
+        dataset = ImageFolderVideoDataset(
+            dataset_dir,
+            "frame_{:05d}.png",
+            sampler=LambdaSampler(lambda video_length: [0, 1]),
+            transform=lambda frames: frames,
+            frame_cache=cache,
+        )
+        dataset[0]
+        os.remove(str(video_dir / "frame_00001.png"))
+
+        frames = list(dataset[0])
+
+        assert [np.asarray(frame)[0, 0, 0] for frame in frames] == [0, 1]
+        assert cache.stats().hits == 2
+
     @staticmethod
     def make_video_dirs(dataset_dir, video_count, frame_count=10):
         for i in range(0, video_count):
@@ -0,0 +1,457 @@
+import os
+
+import numpy as np
+import pytest
+
+import torchvideo.datasets.gulp_video_dataset
+import torchvideo.datasets.video_folder_dataset
+from torchvideo.datasets import (
+    DatasetManifest,
+    GulpVideoDataset,
+    RecordSet,
+    VideoFolderDataset,
+    VideoRecordDataset,
+)
+from torchvideo.datasets.manifest import load_manifest, stat_entry
+from torchvideo.internal.readers import VideoInfo
+from torchvideo.samplers import FullVideoSampler
+
+
+def make_videos(root, count):
+    root.mkdir(parents=True, exist_ok=True)
+    paths = []
+    for i in range(count):
+        path = root / "video{}.mp4".format(i)
+        path.write_bytes(b"\x00" * (i + 1))
+        paths.append(path)
+    return paths
+
+
+def make_manifest(root, count):
+    entries = [
+        stat_entry(path, path.name, path.name, 10 + i, label="class{}".format(i % 2))
+        for i, path in enumerate(make_videos(root, count))
+    ]
+    return DatasetManifest.from_entries(entries, {".": os.stat(str(root)).st_mtime_ns})
+
+
+def make_gulp_chunk(root):
+    root.mkdir(parents=True, exist_ok=True)
+    (root / "data_0.gulp").write_bytes(b"\x00" * 10)
+
+
+def make_gulp_manifest(root):
+    chunk_path = root / "data_0.gulp"
+    return DatasetManifest.from_entries(
+        [
+            stat_entry(chunk_path, "a", "data_0.gulp", 5, label="class0"),
+            stat_entry(chunk_path, "b", "data_0.gulp", 7, label="class1"),
+        ]
+    )
+
+
+def is_video(path):
+    return path.suffix == ".mp4"
+
+
+class RecordingProbe:
+    def __init__(self):
+        self.probed = []
+
+    def __call__(self, path, relative_path):
+        self.probed.append(relative_path)
+        return stat_entry(path, relative_path, relative_path, 100, label="new")
+
+
+class RecordingVideoProbe:
+    def __init__(self, monkeypatch):
+        self.paths = []
+        monkeypatch.setattr(
+            torchvideo.datasets.video_folder_dataset, "_probe_videofile", self
+        )
+
+    def __call__(self, path):
+        self.paths.append(path.name)
+        return VideoInfo(height=240, width=320, n_frames=10, fps=25.0)
+
+
+def touch_dir(path):
+    # Make sure the change is visible on file systems with coarse mtimes
+    stat = os.stat(str(path))
+    os.utime(str(path), ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+
+
+class TestDatasetManifest:
+    def test_save_and_load_roundtrip(self, tmp_path):
+        manifest = make_manifest(tmp_path / "dataset", 5)
+        manifest_path = tmp_path / "manifest.npz"
+
+        manifest.save(manifest_path)
+        loaded = DatasetManifest.load(manifest_path)
+
+        assert len(loaded) == 5
+        assert [loaded[i]._replace(fps=None) for i in range(5)] == [
+            manifest[i]._replace(fps=None) for i in range(5)
+        ]
+        assert np.isnan(loaded.fps).all()
+        assert not (tmp_path / "manifest.npz.tmp").exists()
+
+    def test_labels(self, tmp_path):
+        manifest = make_manifest(tmp_path / "dataset", 4)
+
+        assert manifest.labels == ["class0", "class1", "class0", "class1"]
+
+    def test_manifest_without_labels(self, tmp_path):
+        paths = make_videos(tmp_path / "dataset", 2)
+        manifest = DatasetManifest.from_entries(
+            [stat_entry(path, path.name, path.name, 10) for path in paths]
+        )
+
+        assert manifest.labels is None
+        assert manifest[0].label is None
+
+    def test_unsupported_labels_raise_error(self, tmp_path):
+        path = make_videos(tmp_path / "dataset", 1)[0]
+
+        with pytest.raises(ValueError):
+            DatasetManifest.from_entries(
+                [stat_entry(path, path.name, path.name, 10, label=[1, 2])]
+            )
+
+    def test_subset(self, tmp_path):
+        manifest = make_manifest(tmp_path / "dataset", 5)
+
+        subset = manifest.subset([1, 3])
+
+        assert subset.video_ids.tolist() == ["video1.mp4", "video3.mp4"]
+        assert subset.frame_counts.tolist() == [11, 13]
+        assert subset.labels == ["class1", "class1"]
+
+    def test_empty_subset(self, tmp_path):
+        manifest = make_manifest(tmp_path / "dataset", 3)
+
+        assert len(manifest.subset([])) == 0
+
+    def test_validate_returns_self_when_nothing_changed(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+
+        assert manifest.validate(root) is manifest
+
+    def test_validate_drops_missing_videos(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        os.remove(str(root / "video1.mp4"))
+
+        validated = manifest.validate(root)
+
+        assert validated.video_ids.tolist() == ["video0.mp4", "video2.mp4"]
+
+    def test_validate_recounts_modified_videos(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        (root / "video2.mp4").write_bytes(b"\x00" * 100)
+        counted = []
+
+        def frame_counter(path):
+            counted.append(path.name)
+            return 50
+
+        validated = manifest.validate(root, frame_counter)
+
+        assert counted == ["video2.mp4"]
+        assert validated.frame_counts.tolist() == [10, 11, 50]
+        assert validated.sizes[2] == 100
+
+    def test_validate_stats_files_shared_by_videos_once(self, tmp_path, monkeypatch):
+        root = tmp_path / "dataset"
+        make_gulp_chunk(root)
+        manifest = make_gulp_manifest(root)
+        statted = []
+        stat = os.stat
+
+        def recording_stat(path, *args, **kwargs):
+            statted.append(path)
+            return stat(path, *args, **kwargs)
+
+        monkeypatch.setattr(os, "stat", recording_stat)
+
+        assert manifest.validate(root) is manifest
+        assert [os.path.basename(path) for path in statted] == ["data_0.gulp"]
+
+    def test_validate_recounts_modified_videos_by_id(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_gulp_chunk(root)
+        manifest = make_gulp_manifest(root)
+        (root / "data_0.gulp").write_bytes(b"\x00" * 100)
+
+        validated = manifest.validate(
+            root, video_frame_counter={"a": 6, "b": 8}.__getitem__
+        )
+
+        assert validated.frame_counts.tolist() == [6, 8]
+
+    def test_load_manifest_saves_updated_manifest(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest_path = tmp_path / "manifest.npz"
+        make_manifest(root, 3).save(manifest_path)
+        os.remove(str(root / "video0.mp4"))
+
+        load_manifest(manifest_path, root)
+
+        assert len(DatasetManifest.load(manifest_path)) == 2
+
+
+class TestDatasetManifestUpdate:
+    def test_update_returns_self_when_nothing_changed(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        probe = RecordingProbe()
+
+        assert manifest.update(root, is_video, probe) is manifest
+        assert probe.probed == []
+
+    def test_update_probes_only_new_videos(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        (root / "new.mp4").write_bytes(b"\x00")
+        touch_dir(root)
+        probe = RecordingProbe()
+
+        updated = manifest.update(root, is_video, probe)
+
+        assert probe.probed == ["new.mp4"]
+        assert updated.paths.tolist() == [
+            "new.mp4",
+            "video0.mp4",
+            "video1.mp4",
+            "video2.mp4",
+        ]
+        assert updated.frame_counts.tolist() == [100, 10, 11, 12]
+        assert updated.labels == ["new", "class0", "class1", "class0"]
+
+    def test_update_drops_removed_videos(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        os.remove(str(root / "video1.mp4"))
+        touch_dir(root)
+
+        updated = manifest.update(root, is_video, RecordingProbe())
+
+        assert updated.paths.tolist() == ["video0.mp4", "video2.mp4"]
+
+    def test_update_reprobes_modified_videos_when_checked(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 3)
+        (root / "video1.mp4").write_bytes(b"\x00" * 100)
+        touch_dir(root / "video1.mp4")
+        probe = RecordingProbe()
+
+        updated = manifest.update(root, is_video, probe, check_modified=True)
+
+        assert probe.probed == ["video1.mp4"]
+        assert updated.frame_counts.tolist() == [10, 100, 12]
+
+    def test_update_only_lists_changed_subdirectories(self, tmp_path, monkeypatch):
+        root = tmp_path / "dataset"
+        for class_name in ["a", "b"]:
+            make_videos(root / class_name, 2)
+        probe = RecordingProbe()
+        manifest = DatasetManifest.from_entries([]).update(
+            root, is_video, probe, recursive=True
+        )
+        assert sorted(probe.probed) == [
+            "a/video0.mp4",
+            "a/video1.mp4",
+            "b/video0.mp4",
+            "b/video1.mp4",
+        ]
+        (root / "b" / "video2.mp4").write_bytes(b"\x00")
+        touch_dir(root / "b")
+        make_videos(root / "c", 1)
+        touch_dir(root)
+        probe = RecordingProbe()
+        listed = []
+        iterdir = type(root).iterdir
+
+        def recording_iterdir(path):
+            listed.append(path.relative_to(root).as_posix())
+            return iterdir(path)
+
+        monkeypatch.setattr(type(root), "iterdir", recording_iterdir)
+
+        updated = manifest.update(root, is_video, probe, recursive=True)
+
+        assert sorted(listed) == [".", "b", "c"]
+        assert sorted(probe.probed) == ["b/video2.mp4", "c/video0.mp4"]
+        assert len(updated) == 6
+
+    def test_updated_manifest_roundtrips(self, tmp_path):
+        root = tmp_path / "dataset"
+        manifest = make_manifest(root, 2)
+        (root / "new.mp4").write_bytes(b"\x00")
+        touch_dir(root)
+        manifest_path = tmp_path / "manifest.npz"
+
+        manifest.update(root, is_video, RecordingProbe()).save(manifest_path)
+        loaded = DatasetManifest.load(manifest_path)
+
+        assert loaded.update(root, is_video, RecordingProbe()) is loaded
+
+
+class TestVideoFolderDatasetManifest:
+    @pytest.fixture(autouse=True)
+    def mock_probe(self, monkeypatch):
+        monkeypatch.setattr(
+            torchvideo.datasets.video_folder_dataset,
+            "_probe_videofile",
+            lambda path: VideoInfo(height=240, width=320, n_frames=10, fps=25.0),
+        )
+
+    def test_dataset_from_manifest_does_not_count_frames(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_videos(root, 4)
+        dataset = VideoFolderDataset(
+            root, frame_counter=lambda path: int(path.name[-len("X.mp4")])
+        )
+        manifest = DatasetManifest.from_dataset(dataset)
+
+        def frame_counter(path):
+            raise AssertionError("Frames of {} shouldn't be counted".format(path))
+
+        dataset_from_manifest = VideoFolderDataset(
+            root, frame_counter=frame_counter, manifest=manifest
+        )
+
+        assert dataset_from_manifest.video_lengths == [0, 1, 2, 3]
+        assert dataset_from_manifest._video_paths == dataset._video_paths
+        assert manifest.heights.tolist() == [240] * 4
+        assert np.all(manifest.fps == 25.0)
+
+    def test_building_manifest_probes_each_video_once(self, tmp_path, monkeypatch):
+        root = tmp_path / "dataset"
+        make_videos(root, 3)
+        probed = RecordingVideoProbe(monkeypatch)
+
+        manifest = DatasetManifest.from_dataset(VideoFolderDataset(root))
+
+        assert sorted(probed.paths) == ["video0.mp4", "video1.mp4", "video2.mp4"]
+        assert manifest.frame_counts.tolist() == [10] * 3
+        assert manifest.heights.tolist() == [240] * 3
+
+    def test_building_record_manifest_probes_each_video_once(
+        self, tmp_path, monkeypatch
+    ):
+        root = tmp_path / "dataset"
+        make_videos(root, 3)
+        records_path = tmp_path / "records.txt"
+        records_path.write_text("video0.mp4 0\nvideo1.mp4 1\nvideo2.mp4 0\n")
+        probed = RecordingVideoProbe(monkeypatch)
+        dataset = VideoRecordDataset(str(root), RecordSet(str(records_path)))
+        dataset._video_length(1, str(root / "video1.mp4"))
+
+        manifest = DatasetManifest.from_dataset(dataset)
+
+        assert sorted(probed.paths) == ["video0.mp4", "video1.mp4", "video2.mp4"]
+        assert manifest.frame_counts.tolist() == [10] * 3
+
+    def test_updating_manifest_probes_new_videos_once(self, tmp_path, monkeypatch):
+        root = tmp_path / "dataset"
+        make_videos(root, 2)
+        manifest = DatasetManifest.from_dataset(
+            VideoFolderDataset(root, frame_counter=lambda path: 10)
+        )
+        (root / "video2.mp4").write_bytes(b"\x00")
+        touch_dir(root)
+        probed = RecordingVideoProbe(monkeypatch)
+
+        dataset = VideoFolderDataset(root, manifest=manifest, update_manifest=True)
+
+        assert probed.paths == ["video2.mp4"]
+        assert dataset.video_lengths == [10, 10, 10]
+
+    def test_filtering_dataset_from_manifest(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_videos(root, 4)
+        manifest = DatasetManifest.from_dataset(
+            VideoFolderDataset(root, frame_counter=lambda path: 10)
+        )
+
+        dataset = VideoFolderDataset(
+            root,
+            manifest=manifest,
+            filter=lambda path: path.name in {"video1.mp4", "video3.mp4"},
+        )
+
+        assert [path.name for path in dataset._video_paths] == [
+            "video1.mp4",
+            "video3.mp4",
+        ]
+
+    def test_updating_manifest_picks_up_new_videos(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_videos(root, 2)
+        manifest_path = tmp_path / "manifest.npz"
+        DatasetManifest.from_dataset(
+            VideoFolderDataset(root, frame_counter=lambda path: 10)
+        ).save(manifest_path)
+        (root / "video2.mp4").write_bytes(b"\x00")
+        touch_dir(root)
+
+        dataset = VideoFolderDataset(
+            root,
+            frame_counter=lambda path: 20,
+            manifest=manifest_path,
+            update_manifest=True,
+        )
+
+        assert dataset.video_lengths == [10, 10, 20]
+        assert len(DatasetManifest.load(manifest_path)) == 3
+
+
+class FakeGulpDirectory:
+    instances = 0
+
+    def __init__(self, output_dir):
+        FakeGulpDirectory.instances += 1
+        self.output_dir = output_dir
+        self.merged_meta_dict = {
+            "a": {"frame_info": [None] * 6, "label": "class0"},
+            "b": {"frame_info": [None] * 8, "label": "class1"},
+        }
+
+
+class TestGulpVideoDatasetManifest:
+    @pytest.fixture(autouse=True)
+    def mock_gulp_directory(self, monkeypatch):
+        FakeGulpDirectory.instances = 0
+        monkeypatch.setattr(
+            torchvideo.datasets.gulp_video_dataset, "GulpDirectory", FakeGulpDirectory
+        )
+
+    def test_dataset_from_manifest_does_not_read_metadata(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_gulp_chunk(root)
+
+        dataset = GulpVideoDataset(
+            root, manifest=make_gulp_manifest(root), sampler=FullVideoSampler()
+        )
+        dataset._load_planned_frames = lambda id_, frame_idx: np.zeros(
+            (len(frame_idx), 2, 2, 3), dtype=np.uint8
+        )
+
+        assert dataset.video_lengths == [5, 7]
+        assert dataset.labels == ["class0", "class1"]
+        assert dataset[1][0].shape[1] == 7
+        assert FakeGulpDirectory.instances == 0
+
+    def test_modified_chunk_is_recounted_from_metadata(self, tmp_path):
+        root = tmp_path / "dataset"
+        make_gulp_chunk(root)
+        manifest = make_gulp_manifest(root)
+        (root / "data_0.gulp").write_bytes(b"\x00" * 100)
+
+        dataset = GulpVideoDataset(root, manifest=manifest)
+
+        assert dataset.video_lengths == [6, 8]
+        assert FakeGulpDirectory.instances == 1
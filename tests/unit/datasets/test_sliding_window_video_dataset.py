@@ -0,0 +1,116 @@
+import numpy as np
+import pytest
+from torch.utils.data import DataLoader
+
+import torchvideo.internal.readers
+from torchvideo.datasets import SlidingWindowVideoDataset
+from torchvideo.internal.readers import pyav_loader
+
+av = pytest.importorskip("av")
+
+
+def write_video(path, frame_count):
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mpeg4", rate=25)
+        stream.width, stream.height = 64, 48
+        stream.pix_fmt = "yuv420p"
+        for i in range(frame_count):
+            frame = np.full((48, 64, 3), i * 10, dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(frame)):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return path
+
+
+@pytest.fixture(scope="module")
+def video_path(tmp_path_factory):
+    return write_video(tmp_path_factory.mktemp("videos") / "video.mp4", 20)
+
+
+def identity(frames):
+    return frames
+
+
+class TestSlidingWindowVideoDataset:
+    @pytest.mark.parametrize(
+        "window_length,stride,starts",
+        [
+            (8, 4, [0, 4, 8, 12]),
+            (8, 8, [0, 8, 16]),
+            (6, 10, [0, 10]),
+            (30, 1, [0]),
+        ],
+    )
+    def test_windows_match_loaded_frames(
+        self, video_path, window_length, stride, starts
+    ):
+        dataset = SlidingWindowVideoDataset(
+            [video_path], window_length, stride, transform=identity
+        )
+        all_frames = pyav_loader(video_path, slice(0, 20), as_ndarray=True)
+
+        windows = list(dataset)
+
+        assert [window.start for window in windows] == starts
+        for window in windows:
+            frame_idx = np.minimum(
+                np.arange(window.start, window.start + window_length), 19
+            )
+            np.testing.assert_array_equal(window.frames, all_frames[frame_idx])
+            np.testing.assert_allclose(window.timestamps, frame_idx / 25)
+            assert window.video == 0
+
+    def test_drop_last(self, video_path):
+        dataset = SlidingWindowVideoDataset(
+            [video_path], 8, 8, transform=identity, drop_last=True
+        )
+
+        assert [window.start for window in dataset] == [0, 8]
+
+    def test_each_frame_is_decoded_once(self, video_path, monkeypatch):
+        decoded_frames = []
+        stream_pyav_frames = torchvideo.internal.readers.stream_pyav_frames
+
+        def spy_stream_pyav_frames(*args, **kwargs):
+            for frame_number, timestamp, frame in stream_pyav_frames(*args, **kwargs):
+                decoded_frames.append(frame_number)
+                yield frame_number, timestamp, frame
+
+        monkeypatch.setattr(
+            torchvideo.datasets.sliding_window_video_dataset,
+            "stream_pyav_frames",
+            spy_stream_pyav_frames,
+        )
+        dataset = SlidingWindowVideoDataset([video_path], 8, 1, transform=identity)
+
+        assert len(list(dataset)) == 13
+        assert decoded_frames == list(range(20))
+
+    def test_videos_in_folder(self, tmp_path):
+        write_video(tmp_path / "b.mp4", 4)
+        write_video(tmp_path / "a.mp4", 2)
+        (tmp_path / "labels.csv").touch()
+
+        dataset = SlidingWindowVideoDataset(tmp_path, 4, 4, transform=identity)
+
+        assert dataset.video_paths == [tmp_path / "a.mp4", tmp_path / "b.mp4"]
+        assert [(window.video, window.start) for window in dataset] == [(0, 0), (1, 0)]
+
+    def test_workers_stream_separate_videos(self, video_path):
+        dataset = SlidingWindowVideoDataset([video_path] * 3, 8, 8)
+        loader = DataLoader(dataset, batch_size=None, num_workers=2)
+
+        windows = sorted((int(window.video), int(window.start)) for window in loader)
+
+        assert windows == [(video, start) for video in range(3) for start in [0, 8, 16]]
+
+    def test_default_transform_converts_to_tensor(self, video_path):
+        window = next(iter(SlidingWindowVideoDataset([video_path], 8)))
+
+        assert window.frames.shape == (3, 8, 48, 64)
+
+    @pytest.mark.parametrize("window_length,stride", [(0, 1), (1, 0)])
+    def test_invalid_arguments_raise_error(self, window_length, stride):
+        with pytest.raises(ValueError):
+            SlidingWindowVideoDataset([], window_length, stride)
@@ -1,13 +1,24 @@
 import os
 
 import numpy
+import pytest
 
 import torchvideo
+from torchvideo.internal.probing import FrameCountError
+from torchvideo.internal.readers import VideoInfo
 from torchvideo.datasets import LambdaLabelSet
 from torchvideo.datasets import DummyLabelSet
 from torchvideo.datasets import VideoFolderDataset
 from torchvideo.datasets import ImageFolderVideoDataset
-from torchvideo.samplers import frame_idx_to_list
+from torchvideo.internal.video_index import VideoIndex
+from torchvideo.samplers import (
+    ClipSampler,
+    KeyframeClipSampler,
+    LambdaSampler,
+    MultiClipSampler,
+    frame_idx_to_list,
+)
+from torchvideo.transforms import NDArrayVideoToTensor
 from ..mock_transforms import (
     MockFramesOnlyTransform,
     MockFramesAndOptionalTargetTransform,
@@ -49,8 +60,55 @@ class TestVideoFolderDatasetUnit:
         assert len(dataset.labels) == video_count
         assert all([label == i for i, label in enumerate(dataset.labels)])
 
+    def test_frame_counting_in_parallel(self, dataset_dir, fs):
+        self.make_video_files(dataset_dir, fs, 10)
+
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            frame_counter=lambda path: int(path.name[-len("X.mp4")]),
+            frame_counter_workers=4,
+        )
+
+        assert dataset.video_lengths == list(range(10))
+
+    def test_frame_count_failures_are_collected(self, dataset_dir, fs):
+        self.make_video_files(dataset_dir, fs, 10)
+
+        def frame_counter(path):
+            if path.name in {"video3.mp4", "video7.mp4"}:
+                raise ValueError("Corrupt video")
+            return 10
+
+        with pytest.raises(FrameCountError) as excinfo:
+            VideoFolderDataset(dataset_dir, frame_counter=frame_counter)
+
+        assert sorted(p.name for p in excinfo.value.failures) == [
+            "video3.mp4",
+            "video7.mp4",
+        ]
+
+    def test_unknown_probed_frame_counts_are_failures(
+        self, dataset_dir, fs, monkeypatch
+    ):
+        self.make_video_files(dataset_dir, fs, 4)
+
+        def probe_videofile(path):
+            n_frames = -1 if path.name == "video2.mp4" else 10
+            return VideoInfo(height=240, width=320, n_frames=n_frames, fps=25.0)
+
+        monkeypatch.setattr(
+            torchvideo.datasets.video_folder_dataset,
+            "_probe_videofile",
+            probe_videofile,
+        )
+
+        with pytest.raises(FrameCountError) as excinfo:
+            VideoFolderDataset(dataset_dir)
+
+        assert [p.name for p in excinfo.value.failures] == ["video2.mp4"]
+
     def test_transform_is_applied(self, dataset_dir, fs, monkeypatch):
-        def _load_mock_frames(self, frames_idx, video_file):
+        def _load_mock_frames(self, video_file, frames_idx):
             frames_count = len(frame_idx_to_list(frames_idx))
             return numpy.zeros((frames_count, 10, 20, 3))
 
@@ -74,7 +132,9 @@ class TestVideoFolderDatasetUnit:
         self, dataset_dir, fs, monkeypatch
     ):
         monkeypatch.setattr(
-            torchvideo.internal.readers, "default_loader", lambda file, idx: file
+            torchvideo.internal.readers,
+            "default_loader",
+            lambda file, idx, **kwargs: file,
         )
         self.make_video_files(dataset_dir, fs, 1)
         transform = MockFramesAndOptionalTargetTransform(lambda f: f, lambda t: t)
@@ -90,6 +150,170 @@ class TestVideoFolderDatasetUnit:
         assert target == 1
         transform.assert_called_once_with(frames, target=target)
 
+    def test_backend_is_passed_to_loader(self, dataset_dir, fs, monkeypatch):
+        backends = []
+
+        def default_loader(file, idx, backend=None, **kwargs):
+            backends.append(backend)
+            return file
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers, "default_loader", default_loader
+        )
+        self.make_video_files(dataset_dir, fs, 1)
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            transform=lambda frames: frames,
+            frame_counter=lambda p: 20,
+            backend="pyav",
+        )
+
+        dataset[0]
+
+        assert backends == ["pyav"]
+
+    def test_loading_frames_as_ndarray(self, dataset_dir, fs, monkeypatch):
+        loader_kwargs = []
+
+        def default_loader(file, idx, **kwargs):
+            loader_kwargs.append(kwargs)
+            return numpy.full((len(idx), 4, 6, 3), 255, dtype=numpy.uint8)
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers, "default_loader", default_loader
+        )
+        self.make_video_files(dataset_dir, fs, 1)
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            sampler=LambdaSampler(lambda video_length: [0, 1]),
+            frame_counter=lambda p: 20,
+            as_ndarray=True,
+        )
+
+        frames = dataset[0]
+
+        assert len(loader_kwargs) == 1
+        assert loader_kwargs[0]["as_ndarray"]
+        assert isinstance(dataset.transform, NDArrayVideoToTensor)
+        assert frames.shape == (3, 2, 4, 6)
+        assert frames.max().item() == 1
+
+    def test_multi_clip_samples_are_stacked(self, dataset_dir, fs, monkeypatch):
+        def default_loader(file, idx, **kwargs):
+            return numpy.zeros((len(idx), 3, 5, 7, 3), dtype=numpy.uint8)
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers, "default_loader", default_loader
+        )
+        self.make_video_files(dataset_dir, fs, 1)
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            sampler=MultiClipSampler(clip_length=3, clip_count=2),
+            frame_counter=lambda p: 20,
+            as_ndarray=True,
+        )
+
+        frames = dataset[0]
+
+        assert frames.shape == (2, 3, 3, 5, 7)
+
+    def test_frames_are_loaded_from_epoch_plan(self, dataset_dir, fs, monkeypatch):
+        loaded_idx = []
+
+        def default_loader(file, idx, **kwargs):
+            loaded_idx.append(frame_idx_to_list(idx))
+            return numpy.zeros((len(idx), 4, 6, 3), dtype=numpy.uint8)
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers, "default_loader", default_loader
+        )
+        self.make_video_files(dataset_dir, fs, 2)
+        sampler = ClipSampler(clip_length=4)
+        dataset = VideoFolderDataset(
+            dataset_dir, sampler=sampler, frame_counter=lambda p: 20, as_ndarray=True
+        )
+        plan = sampler.plan_epoch(dataset.video_lengths, seed=1, epoch=3)
+
+        dataset.set_epoch_plan(plan)
+        dataset[1]
+        dataset[0]
+
+        assert loaded_idx == [
+            plan.frame_idx.frame_idx(1).tolist(),
+            plan.frame_idx.frame_idx(0).tolist(),
+        ]
+
+    def test_keyframe_aware_samplers_get_keyframes_from_video_index(
+        self, dataset_dir, fs, monkeypatch
+    ):
+        loaded_idx = []
+
+        def default_loader(file, idx, **kwargs):
+            loaded_idx.append(frame_idx_to_list(idx))
+            return numpy.zeros((len(idx), 4, 6, 3), dtype=numpy.uint8)
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers, "default_loader", default_loader
+        )
+        monkeypatch.setattr(
+            torchvideo.datasets.video_dataset,
+            "load_video_index",
+            lambda path: VideoIndex(
+                frame_pts=numpy.arange(100),
+                keyframes=numpy.array([40]),
+                keyframe_offsets=numpy.array([-1]),
+            ),
+        )
+        self.make_video_files(dataset_dir, fs, 1)
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            sampler=KeyframeClipSampler(clip_length=4, keyframe_bias=1),
+            frame_counter=lambda p: 100,
+            as_ndarray=True,
+        )
+
+        dataset[0]
+
+        assert loaded_idx == [[40, 41, 42, 43]]
+
+    def test_video_index_is_loaded_once_per_video(self, dataset_dir, fs, monkeypatch):
+        loaded_indices = []
+
+        def load_video_index(path):
+            loaded_indices.append(path.name)
+            return None
+
+        monkeypatch.setattr(
+            torchvideo.internal.readers,
+            "default_loader",
+            lambda file, idx, **kwargs: numpy.zeros(
+                (len(idx), 4, 6, 3), dtype=numpy.uint8
+            ),
+        )
+        monkeypatch.setattr(
+            torchvideo.datasets.video_dataset, "load_video_index", load_video_index
+        )
+        self.make_video_files(dataset_dir, fs, 2)
+        dataset = VideoFolderDataset(
+            dataset_dir,
+            sampler=KeyframeClipSampler(clip_length=4),
+            frame_counter=lambda p: 100,
+            as_ndarray=True,
+        )
+
+        for index in [0, 1, 0, 1, 0]:
+            dataset[index]
+
+        assert loaded_indices == ["video0.mp4", "video1.mp4"]
+
+    def test_epoch_plan_for_other_dataset_raises_error(self, dataset_dir, fs):
+        self.make_video_files(dataset_dir, fs, 2)
+        dataset = VideoFolderDataset(dataset_dir, frame_counter=lambda p: 20)
+        plan = ClipSampler(clip_length=4).plan_epoch([20, 20, 20], seed=0)
+
+        with pytest.raises(ValueError):
+            dataset.set_epoch_plan(plan)
+
     def test_video_ids(self, dataset_dir, fs):
         video_count = 10
         self.make_video_files(dataset_dir, fs, video_count)
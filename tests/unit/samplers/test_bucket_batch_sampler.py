@@ -0,0 +1,120 @@
+import pytest
+from hypothesis import given, strategies as st
+from torch.utils.data import DataLoader
+
+from torchvideo.datasets import DatasetManifest, ManifestEntry
+from torchvideo.samplers import BucketBatchSampler
+
+
+def make_manifest(frame_counts, heights, widths):
+    return DatasetManifest.from_entries(
+        ManifestEntry(
+            video_id=str(i),
+            path="{}.mp4".format(i),
+            frame_count=frame_count,
+            height=height,
+            width=width,
+            fps=25.0,
+            size=0,
+            mtime_ns=0,
+            label=None,
+        )
+        for i, (frame_count, height, width) in enumerate(
+            zip(frame_counts, heights, widths)
+        )
+    )
+
+
+class TestBucketBatchSampler:
+    @given(
+        st.lists(st.integers(1, 1000), min_size=1, max_size=200),
+        st.integers(1, 20),
+        st.booleans(),
+    )
+    def test_every_video_is_sampled_once_per_epoch(
+        self, video_lengths, batch_size, shuffle
+    ):
+        sampler = BucketBatchSampler(video_lengths, batch_size, shuffle=shuffle, seed=0)
+
+        batches = list(sampler)
+
+        assert len(batches) == len(sampler)
+        assert sorted(sum(batches, [])) == list(range(len(video_lengths)))
+        assert all(1 <= len(batch) <= batch_size for batch in batches)
+
+    def test_batches_hold_videos_of_similar_length(self):
+        video_lengths = [10] * 8 + [1000] * 8
+        sampler = BucketBatchSampler(video_lengths, 4, length_buckets=2, seed=0)
+
+        for batch in sampler:
+            assert len({video_lengths[i] for i in batch}) == 1
+
+    def test_batches_hold_videos_of_similar_resolution(self):
+        heights = [240, 1080, -1] * 4
+        widths = [320, 1920, -1] * 4
+        sampler = BucketBatchSampler(
+            [100] * 12, 2, resolutions=(heights, widths), resolution_buckets=2, seed=0
+        )
+
+        assert len(sampler.buckets) == 3
+        for batch in sampler:
+            assert len({heights[i] for i in batch}) == 1
+
+    def test_drop_last(self):
+        sampler = BucketBatchSampler(
+            [10] * 5 + [1000] * 5, 2, length_buckets=2, drop_last=True
+        )
+
+        batches = list(sampler)
+
+        assert len(batches) == len(sampler) == 4
+        assert all(len(batch) == 2 for batch in batches)
+
+    def test_epochs_are_reproducible_and_differ(self):
+        sampler = BucketBatchSampler(list(range(1, 101)), 5, seed=3)
+
+        first_epoch = list(sampler)
+        second_epoch = list(sampler)
+        sampler.set_epoch(0)
+
+        assert list(sampler) == first_epoch
+        assert second_epoch != first_epoch
+
+    def test_from_dataset_uses_manifest(self):
+        manifest = make_manifest([10, 1000, 10, 1000], [240] * 4, [320] * 4)
+        dataset = _Dataset(manifest=manifest, video_lengths=[1] * 4)
+
+        sampler = BucketBatchSampler.from_dataset(dataset, 2, length_buckets=2)
+
+        assert sorted(map(sorted, sampler)) == [[0, 2], [1, 3]]
+
+    def test_from_dataset_uses_video_lengths(self):
+        dataset = _Dataset(manifest=None, video_lengths=[10, 1000, 10, 1000])
+
+        sampler = BucketBatchSampler.from_dataset(dataset, 2, length_buckets=2)
+
+        assert sorted(map(sorted, sampler)) == [[0, 2], [1, 3]]
+
+    def test_batch_sampler_of_dataloader(self):
+        dataset = _Dataset(manifest=None, video_lengths=[10, 1000, 10, 1000])
+        sampler = BucketBatchSampler.from_dataset(dataset, 2, length_buckets=2)
+
+        batches = list(DataLoader(dataset, batch_sampler=sampler))
+
+        assert sorted(batch.tolist() for batch in batches) == [[10, 10], [1000, 1000]]
+
+    def test_invalid_batch_size_raises_error(self):
+        with pytest.raises(ValueError):
+            BucketBatchSampler([10], 0)
+
+
+class _Dataset:
+    def __init__(self, manifest, video_lengths):
+        self.manifest = manifest
+        self.video_lengths = video_lengths
+
+    def __len__(self):
+        return len(self.video_lengths)
+
+    def __getitem__(self, index):
+        return self.video_lengths[index]
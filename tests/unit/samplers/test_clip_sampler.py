@@ -1,3 +1,4 @@
+import numpy as np
 from hypothesis import given, strategies as st
 
 from assertions.seq import assert_elems_lt, assert_elems_gte
@@ -45,5 +46,41 @@ class TestClipSampler:
         for i in range(1, sample_count):
             assert frame_idx[i - 1] == frame_idx[i]
 
+    @given(
+        st.lists(st.integers(1, 300), min_size=1, max_size=20),
+        st.integers(1, 20),
+        st.integers(1, 5),
+    )
+    def test_sample_batch_matches_sample_in_test_mode(
+        self, video_lengths, clip_length, frame_step
+    ):
+        sampler = ClipSampler(clip_length, frame_step=frame_step, test=True)
+
+        batch = sampler.sample_batch(np.array(video_lengths))
+
+        assert batch.as_array().shape == (len(video_lengths), clip_length)
+        for i, video_length in enumerate(video_lengths):
+            assert batch.frame_idx(i).tolist() == frame_idx_to_list(
+                sampler.sample(video_length)
+            )
+
+    @given(st.lists(st.integers(1, 300), min_size=1, max_size=20), st.integers(1, 5))
+    def test_sample_batch_samples_clips_within_video(self, video_lengths, frame_step):
+        sampler = ClipSampler(10, frame_step=frame_step)
+
+        frame_idx = sampler.sample_batch(np.array(video_lengths)).as_array()
+
+        for clip_idx, video_length in zip(frame_idx, video_lengths):
+            assert clip_idx.min() >= 0
+            assert clip_idx.max() < video_length
+            if video_length >= 1 + frame_step * 9:
+                assert np.all(np.diff(clip_idx) == frame_step)
+
+    def test_sample_batch_samples_all_offsets_but_the_last(self):
+        # sample draws the start of the clip from [0, max_offset)
+        starts = ClipSampler(2).sample_batch(np.full(1000, 5)).as_array()[:, 0]
+
+        assert set(starts.tolist()) == {0, 1, 2}
+
     def test_repr(self):
         assert repr(ClipSampler(10)) == "ClipSampler(clip_length=10, frame_step=1)"
@@ -1,6 +1,8 @@
+import numpy as np
+import pytest
 from hypothesis import given, strategies as st
 
-from torchvideo.samplers import FullVideoSampler
+from torchvideo.samplers import FullVideoSampler, frame_idx_to_list
 
 
 class TestFullVideoSampler:
@@ -14,6 +16,21 @@ class TestFullVideoSampler:
         assert idx_slice.start == 0
         assert idx_slice.step == 1
 
+    @given(st.lists(st.integers(1, 200), min_size=1, max_size=20), st.integers(1, 10))
+    def test_sample_batch_matches_sample(self, video_lengths, frame_step):
+        sampler = FullVideoSampler(frame_step=frame_step)
+
+        batch = sampler.sample_batch(np.array(video_lengths))
+
+        for i, video_length in enumerate(video_lengths):
+            assert batch.frame_idx(i).tolist() == frame_idx_to_list(
+                sampler.sample(video_length)
+            )
+
+    def test_sample_batch_raises_error_for_empty_videos(self):
+        with pytest.raises(ValueError):
+            FullVideoSampler().sample_batch(np.array([10, 0]))
+
     def test_full_video_sampler_repr(self):
         assert repr(FullVideoSampler()) == "FullVideoSampler()"
 
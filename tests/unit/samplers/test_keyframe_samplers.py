@@ -0,0 +1,165 @@
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st
+
+from assertions.seq import assert_elems_lt, assert_elems_gte
+from torchvideo.samplers import (
+    ClipSampler,
+    KeyframeClipSampler,
+    KeyframeTemporalSegmentSampler,
+    decode_amplification,
+    frame_idx_to_list,
+)
+
+keyframes = np.arange(0, 1000, 100)
+
+
+class TestDecodeAmplification:
+    def test_clip_starting_at_keyframe(self):
+        assert decode_amplification(slice(100, 110), keyframes) == 1
+
+    def test_clip_starting_after_keyframe(self):
+        # Frames 100-119 are decoded to load the 10 frames 110-119
+        assert decode_amplification(slice(110, 120), keyframes) == 2
+
+    def test_decoder_seeks_over_gops_without_requested_frames(self):
+        # 51 frames decoded up to frame 50, then frame 300 is decoded after seeking
+        assert decode_amplification([50, 300], keyframes) == 26
+
+    def test_decoder_continues_within_gop(self):
+        assert decode_amplification([10, 20], keyframes) == 10.5
+
+    def test_every_frame_a_keyframe(self):
+        assert decode_amplification([3, 7, 7], np.arange(10)) == 1
+
+
+class TestKeyframeClipSampler:
+    def test_clips_start_at_keyframes_with_full_bias(self):
+        sampler = KeyframeClipSampler(clip_length=10, keyframe_bias=1)
+
+        for _ in range(20):
+            frame_idx = sampler.sample(1000, keyframes)
+
+            assert frame_idx.start in keyframes
+            assert frame_idx.stop - frame_idx.start == 10
+
+    def test_clip_moved_to_previous_keyframe_when_it_wouldnt_fit(self):
+        sampler = KeyframeClipSampler(clip_length=150, keyframe_bias=1)
+
+        assert sampler.sample(250, np.array([0, 120])).start in {0, 120}
+        assert sampler.sample(250, np.array([0, 150])).start == 0
+
+    def test_samples_like_clip_sampler_without_keyframes(self):
+        sampler = KeyframeClipSampler(clip_length=10, keyframe_bias=1)
+        np.random.seed(0)
+        expected = ClipSampler(clip_length=10).sample(1000)
+        np.random.seed(0)
+
+        assert sampler.sample(1000) == expected
+
+    def test_test_mode_samples_central_clip(self):
+        sampler = KeyframeClipSampler(clip_length=10, test=True, keyframe_bias=1)
+
+        assert sampler.sample(30, keyframes) == slice(10, 20, 1)
+
+    @given(st.data())
+    def test_clips_are_within_video(self, data):
+        clip_length = data.draw(st.integers(1, 100))
+        video_length = data.draw(st.integers(1, 500))
+        video_keyframes = np.array(
+            sorted(data.draw(st.sets(st.integers(0, video_length - 1), min_size=1)))
+        )
+        bias = data.draw(st.floats(0, 1))
+        sampler = KeyframeClipSampler(clip_length=clip_length, keyframe_bias=bias)
+
+        frame_idx = frame_idx_to_list(sampler.sample(video_length, video_keyframes))
+
+        assert len(frame_idx) == clip_length
+        assert_elems_gte(frame_idx, 0)
+        assert_elems_lt(frame_idx, video_length)
+
+    def test_expected_decode_amplification_decreases_with_bias(self):
+        amplifications = [
+            KeyframeClipSampler(
+                clip_length=10, keyframe_bias=bias
+            ).expected_decode_amplification(1000, keyframes)
+            for bias in [0, 0.5, 1]
+        ]
+
+        assert amplifications[0] > amplifications[1] > amplifications[2] == 1
+
+    def test_expected_decode_amplification_matches_samples(self):
+        sampler = KeyframeClipSampler(clip_length=10, keyframe_bias=0.3)
+        np.random.seed(0)
+
+        amplification = np.mean(
+            [
+                decode_amplification(sampler.sample(1000, keyframes), keyframes)
+                for _ in range(5000)
+            ]
+        )
+
+        assert sampler.expected_decode_amplification(1000, keyframes) == pytest.approx(
+            amplification, rel=0.05
+        )
+
+    def test_invalid_bias_raises_error(self):
+        with pytest.raises(ValueError):
+            KeyframeClipSampler(clip_length=10, keyframe_bias=1.5)
+
+
+class TestKeyframeTemporalSegmentSampler:
+    def test_snippets_are_moved_to_keyframes_in_their_segment(self):
+        sampler = KeyframeTemporalSegmentSampler(
+            segment_count=10, snippet_length=2, test=False, keyframe_bias=1
+        )
+
+        frame_idx = sampler.sample(1000, keyframes)
+
+        assert [snippet.start for snippet in frame_idx] == keyframes.tolist()
+
+    def test_snippets_stay_in_segments_without_keyframes(self):
+        sampler = KeyframeTemporalSegmentSampler(
+            segment_count=20, test=False, keyframe_bias=1
+        )
+
+        frame_idx = sampler.sample(1000, keyframes)
+
+        for segment, snippet in enumerate(frame_idx):
+            assert segment * 50 <= snippet.start < (segment + 1) * 50
+
+    def test_test_mode_ignores_keyframes(self):
+        sampler = KeyframeTemporalSegmentSampler(segment_count=5, keyframe_bias=1)
+
+        assert sampler.sample(1000, keyframes) == sampler.sample(1000)
+
+    @given(st.data())
+    def test_snippets_are_within_video(self, data):
+        segment_count = data.draw(st.integers(1, 10))
+        snippet_length = data.draw(st.integers(1, 10))
+        video_length = data.draw(st.integers(1, 500))
+        video_keyframes = np.array(
+            sorted(data.draw(st.sets(st.integers(0, video_length - 1), min_size=1)))
+        )
+        sampler = KeyframeTemporalSegmentSampler(
+            segment_count, snippet_length, test=False, keyframe_bias=1
+        )
+
+        frame_idx = frame_idx_to_list(sampler.sample(video_length, video_keyframes))
+
+        assert len(frame_idx) == segment_count * snippet_length
+        assert_elems_gte(frame_idx, 0)
+        assert_elems_lt(frame_idx, video_length)
+
+    def test_expected_decode_amplification_restores_random_state(self):
+        sampler = KeyframeTemporalSegmentSampler(
+            segment_count=5, test=False, keyframe_bias=0.5
+        )
+        np.random.seed(0)
+        expected = np.random.random()
+        np.random.seed(0)
+
+        amplification = sampler.expected_decode_amplification(1000, keyframes)
+
+        assert np.random.random() == expected
+        assert 1 <= amplification
@@ -1,3 +1,4 @@
+import numpy as np
 import pytest
 
 from torchvideo.samplers import LambdaSampler
@@ -10,6 +11,14 @@ class TestLambdaSampler:
         with pytest.raises(ValueError):
             sampler.sample(10)
 
+    def test_sample_batch_calls_function_for_each_video(self):
+        sampler = LambdaSampler(lambda video_length: [0, video_length - 1])
+
+        batch = sampler.sample_batch(np.array([3, 7]))
+
+        assert batch.indices.tolist() == [0, 2, 0, 6]
+        assert batch.offsets.tolist() == [0, 2, 4]
+
     def test_repr(self):
         class MySampler:
             def __call__(self, video_length):
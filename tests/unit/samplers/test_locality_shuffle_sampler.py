@@ -0,0 +1,120 @@
+import os
+from types import SimpleNamespace
+
+import numpy as np
+import pytest
+from hypothesis import given, strategies as st
+
+from torchvideo.samplers import LocalityShuffleSampler
+
+
+class TestLocalityShuffleSampler:
+    @given(
+        st.lists(st.integers(0, 5), max_size=200),
+        st.one_of(st.none(), st.integers(1, 20)),
+        st.integers(1, 20),
+    )
+    def test_every_video_is_sampled_once_per_epoch(self, groups, block_size, window):
+        sampler = LocalityShuffleSampler(
+            groups, block_size=block_size, window=window, seed=0
+        )
+
+        assert sorted(sampler) == list(range(len(groups)))
+        assert len(sampler) == len(groups)
+
+    def test_blocks_are_read_in_storage_order_without_window(self):
+        groups = [0, 1, 0, 1, 0, 1]
+        positions = [3, 0, 1, 2, 2, 1]
+        sampler = LocalityShuffleSampler(groups, positions, window=1, seed=0)
+
+        order = list(sampler)
+
+        assert order in ([2, 4, 0, 1, 5, 3], [1, 5, 3, 2, 4, 0])
+
+    def test_groups_are_split_into_blocks(self):
+        sampler = LocalityShuffleSampler([0] * 10, block_size=4, window=1, seed=0)
+
+        assert sampler.blocks.tolist() == [0, 0, 0, 0, 1, 1, 1, 1, 2, 2]
+        order = list(sampler)
+        for start in range(0, 10, 4):
+            block = list(range(start, min(start + 4, 10)))
+            position = order.index(block[0])
+            assert order[position : position + len(block)] == block
+
+    def test_videos_stay_within_window(self):
+        sampler = LocalityShuffleSampler([0] * 100, block_size=None, window=10)
+
+        order = list(sampler)
+
+        for position, video in enumerate(order):
+            assert position // 10 == video // 10
+
+    def test_epochs_are_reproducible_and_differ(self):
+        sampler = LocalityShuffleSampler([0] * 50 + [1] * 50, block_size=10, seed=3)
+
+        first_epoch = list(sampler)
+        second_epoch = list(sampler)
+        sampler.set_epoch(0)
+
+        assert list(sampler) == first_epoch
+        assert second_epoch != first_epoch
+
+    def test_shuffle_quality(self):
+        groups = np.repeat(np.arange(20), 100)
+        in_order = LocalityShuffleSampler(groups, block_size=None, window=1, seed=0)
+        shuffled = LocalityShuffleSampler(groups, block_size=1, window=2000, seed=0)
+        local = LocalityShuffleSampler(groups, block_size=64, window=16, seed=0)
+
+        in_order_quality = in_order.shuffle_quality()
+        shuffled_quality = shuffled.shuffle_quality()
+        local_quality = local.shuffle_quality()
+
+        assert in_order_quality.sequential > 0.99
+        assert shuffled_quality.sequential < 0.01
+        assert shuffled_quality.displacement == pytest.approx(1, abs=0.05)
+        assert local_quality.displacement == pytest.approx(1, abs=0.1)
+        assert local_quality.sequential < 0.1
+        assert local_quality.locality > 10 * local_quality.full_shuffle_locality
+
+    def test_shuffle_quality_doesnt_advance_epoch(self):
+        sampler = LocalityShuffleSampler([0] * 10, seed=0)
+
+        sampler.shuffle_quality()
+
+        assert sampler.epoch == 0
+
+    def test_from_gulp_dataset_orders_videos_by_chunk_and_offset(self):
+        gulp_dir = SimpleNamespace(
+            chunk_lookup={"a": 1, "b": 0, "c": 1, "d": 0},
+            merged_meta_dict={
+                "a": {"frame_info": [[100, 0, 10]]},
+                "b": {"frame_info": [[50, 0, 10]]},
+                "c": {"frame_info": [[0, 0, 10]]},
+                "d": {"frame_info": [[0, 0, 10]]},
+            },
+        )
+        dataset = SimpleNamespace(gulp_dir=gulp_dir, video_ids=["a", "b", "c", "d"])
+
+        sampler = LocalityShuffleSampler.from_dataset(dataset, window=1)
+
+        assert sampler.storage_order.tolist() == [3, 1, 2, 0]
+
+    def test_from_folder_dataset_orders_videos_by_directory_and_inode(self, tmp_path):
+        paths = []
+        for directory in ["b", "a"]:
+            (tmp_path / directory).mkdir()
+            for name in ["y.mp4", "x.mp4"]:
+                path = tmp_path / directory / name
+                path.touch()
+                paths.append(path)
+        dataset = SimpleNamespace(video_ids=paths)
+
+        sampler = LocalityShuffleSampler.from_dataset(dataset, window=1)
+
+        inodes = [os.stat(str(path)).st_ino for path in paths]
+        expected = sorted(range(4), key=lambda i: (i // 2, inodes[i]))
+        assert sampler.storage_order.tolist() == expected
+
+    def test_invalid_window_raises_error(self):
+        with pytest.raises(ValueError):
+            LocalityShuffleSampler([0], window=0)
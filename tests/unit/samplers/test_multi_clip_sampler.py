@@ -0,0 +1,53 @@
+import pytest
+from hypothesis import given, strategies as st
+
+from assertions.seq import assert_elems_lt, assert_elems_gte
+from torchvideo.samplers import MultiClip, MultiClipSampler, frame_idx_to_list
+
+
+class TestMultiClipSampler:
+    def test_clips_are_spaced_evenly_through_video(self):
+        sampler = MultiClipSampler(clip_length=4, clip_count=3)
+
+        clips = sampler.sample(20)
+
+        assert isinstance(clips, MultiClip)
+        assert clips == [slice(0, 4, 1), slice(8, 12, 1), slice(16, 20, 1)]
+
+    def test_frame_step(self):
+        sampler = MultiClipSampler(clip_length=3, clip_count=2, frame_step=2)
+
+        clips = sampler.sample(10)
+
+        assert [frame_idx_to_list(clip) for clip in clips] == [[0, 2, 4], [5, 7, 9]]
+
+    @given(st.data())
+    def test_clips_are_within_video(self, data):
+        clip_length = data.draw(st.integers(1, 100))
+        clip_count = data.draw(st.integers(1, 20))
+        video_length = data.draw(st.integers(1, 500))
+        sampler = MultiClipSampler(clip_length=clip_length, clip_count=clip_count)
+
+        clips = sampler.sample(video_length)
+
+        assert len(clips) == clip_count
+        for clip in clips:
+            frame_idx = frame_idx_to_list(clip)
+            assert len(frame_idx) == clip_length
+            assert_elems_lt(frame_idx, video_length)
+            assert_elems_gte(frame_idx, 0)
+
+    def test_frame_idx_to_list_concatenates_clips(self):
+        clips = MultiClip([slice(0, 2), [5, 1]])
+
+        assert frame_idx_to_list(clips) == [0, 1, 5, 1]
+
+    def test_invalid_clip_count_raises_error(self):
+        with pytest.raises(ValueError):
+            MultiClipSampler(clip_length=4, clip_count=0)
+
+    def test_repr(self):
+        assert (
+            repr(MultiClipSampler(8, clip_count=10))
+            == "MultiClipSampler(clip_length=8, clip_count=10, frame_step=1)"
+        )
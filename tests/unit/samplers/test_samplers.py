@@ -1,15 +1,22 @@
 # PyTest has weird syntax for parameterizing fixtures:
 # https://docs.pytest.org/en/latest/fixture.html#parametrizing-fixtures
 
+import numpy as np
 import pytest
 from hypothesis import given
 import hypothesis.strategies as st
 
 from assertions.seq import assert_ordered, assert_elems_gte, assert_elems_lt
 from torchvideo.samplers import (
+    EpochPlan,
+    FrameIndexBatch,
     FullVideoSampler,
+    IndexPlan,
+    MultiClip,
     TemporalSegmentSampler,
     ClipSampler,
+    LambdaSampler,
+    epoch_rng,
     frame_idx_to_list,
 )
 
@@ -54,3 +61,165 @@ class TestFrameSampler:
         assert_ordered(frames_idx)
         assert_elems_lt(frames_idx, frame_count)
         assert_elems_gte(frames_idx, 0)
+
+
+class TestFrameIndexBatch:
+    def test_from_frame_idx(self):
+        batch = FrameIndexBatch.from_frame_idx(
+            [slice(0, 3), [slice(5, 7), slice(1, 2)], [4]]
+        )
+
+        assert batch.n_videos == 3
+        assert batch.counts.tolist() == [3, 3, 1]
+        assert batch.frame_idx(1).tolist() == [5, 6, 1]
+        assert batch.indices.dtype == np.int32
+
+    def test_as_array(self):
+        batch = FrameIndexBatch.from_array(np.array([[0, 1], [4, 5], [2, 3]]))
+
+        assert batch.as_array().tolist() == [[0, 1], [4, 5], [2, 3]]
+        assert batch.frame_idx(2).tolist() == [2, 3]
+
+    def test_as_array_raises_error_for_ragged_batch(self):
+        batch = FrameIndexBatch.from_frame_idx([[0, 1], [0]])
+
+        with pytest.raises(ValueError):
+            batch.as_array()
+
+    def test_empty_batch(self):
+        batch = FullVideoSampler().sample_batch(np.array([], dtype=np.int64))
+
+        assert batch.n_videos == 0
+        assert batch.as_array().shape == (0, 0)
+
+
+class TestIndexPlan:
+    def test_frames_are_deduplicated_and_sorted(self):
+        plan = IndexPlan.from_frame_idx([5, 1, 5, 2])
+
+        assert plan.load_idx.tolist() == [1, 2, 5]
+        assert plan.reconstruction_idx.tolist() == [2, 0, 2, 1]
+        assert plan.frame_idx.tolist() == [5, 1, 5, 2]
+
+    def test_consecutive_frames_are_coalesced_into_runs(self):
+        plan = IndexPlan.from_frame_idx([0, 1, 2, 10, 3, 11, 20])
+
+        assert plan.runs.tolist() == [[0, 4], [10, 12], [20, 21]]
+
+    def test_slice(self):
+        plan = IndexPlan.from_frame_idx(slice(2, 8, 2))
+
+        assert plan.load_idx.tolist() == [2, 4, 6]
+        assert plan.reconstruction_idx.tolist() == [0, 1, 2]
+        assert plan.runs.tolist() == [[2, 3], [4, 5], [6, 7]]
+
+    def test_multi_clip_plans_union_of_clips(self):
+        plan = IndexPlan.from_frame_idx(MultiClip([slice(0, 3), slice(2, 5)]))
+
+        assert plan.load_idx.tolist() == [0, 1, 2, 3, 4]
+        assert plan.runs.tolist() == [[0, 5]]
+        assert list(plan) == [0, 1, 2, 2, 3, 4]
+
+    def test_plan_stands_in_for_frame_idx(self):
+        plan = IndexPlan.from_frame_idx([3, 3, 1])
+
+        assert len(plan) == 3
+        assert frame_idx_to_list(plan) == [3, 3, 1]
+        assert IndexPlan.from_frame_idx(plan) is plan
+
+    def test_unique(self):
+        plan = IndexPlan.from_frame_idx([3, 3, 1]).unique()
+
+        assert list(plan) == [1, 3]
+
+    @given(st.lists(st.integers(0, 50), min_size=1))
+    def test_runs_cover_load_idx(self, frame_idx):
+        plan = IndexPlan.from_frame_idx(frame_idx)
+
+        covered = [i for start, stop in plan.runs for i in range(start, stop)]
+        assert covered == plan.load_idx.tolist()
+        assert all(plan.runs[1:, 0] > plan.runs[:-1, 1])
+
+    def test_sample_plan(self):
+        plan = ClipSampler(clip_length=3).sample_plan(3)
+
+        assert isinstance(plan, IndexPlan)
+        assert list(plan) == [0, 1, 2]
+
+
+class TestEpochPlan:
+    video_lengths = np.array([3, 40, 100, 7])
+
+    @pytest.mark.parametrize(
+        "sampler",
+        [
+            ClipSampler(clip_length=5),
+            TemporalSegmentSampler(segment_count=4, snippet_length=2, test=False),
+            LambdaSampler(lambda video_length: [np.random.randint(video_length)]),
+        ],
+    )
+    def test_plans_are_reproducible(self, sampler):
+        plan = sampler.plan_epoch(self.video_lengths, seed=3, epoch=1, shuffle=True)
+        np.random.seed(0)
+
+        replan = sampler.plan_epoch(self.video_lengths, seed=3, epoch=1, shuffle=True)
+
+        np.testing.assert_array_equal(plan.order, replan.order)
+        np.testing.assert_array_equal(plan.frame_idx.indices, replan.frame_idx.indices)
+
+    def test_epochs_are_planned_independently(self):
+        sampler = ClipSampler(clip_length=5)
+        video_lengths = np.full(100, 1000)
+
+        plans = [sampler.plan_epoch(video_lengths, seed=3, epoch=i) for i in range(2)]
+
+        assert not np.array_equal(
+            plans[0].frame_idx.indices, plans[1].frame_idx.indices
+        )
+
+    def test_order(self):
+        sampler = FullVideoSampler()
+
+        plan = sampler.plan_epoch(self.video_lengths, seed=0)
+        shuffled_plan = sampler.plan_epoch(self.video_lengths, seed=0, shuffle=True)
+
+        assert plan.order.tolist() == [0, 1, 2, 3]
+        assert sorted(shuffled_plan.order.tolist()) == [0, 1, 2, 3]
+
+    def test_planning_restores_global_random_state(self):
+        sampler = LambdaSampler(lambda video_length: [np.random.randint(video_length)])
+        np.random.seed(0)
+        expected = np.random.random()
+        np.random.seed(0)
+
+        sampler.plan_epoch(self.video_lengths, seed=1)
+
+        assert np.random.random() == expected
+
+    def test_save_and_load(self, tmp_path):
+        plan = TemporalSegmentSampler(3, test=False).plan_epoch(
+            self.video_lengths, seed=5, epoch=2, shuffle=True
+        )
+
+        plan.save(tmp_path / "plan.npz")
+        loaded = EpochPlan.load(tmp_path / "plan.npz")
+
+        assert (loaded.seed, loaded.epoch) == (5, 2)
+        np.testing.assert_array_equal(loaded.order, plan.order)
+        np.testing.assert_array_equal(loaded.frame_idx.indices, plan.frame_idx.indices)
+        np.testing.assert_array_equal(loaded.frame_idx.offsets, plan.frame_idx.offsets)
+
+    def test_schedule_follows_order(self):
+        plan = ClipSampler(clip_length=2).plan_epoch(
+            self.video_lengths, seed=0, shuffle=True
+        )
+
+        schedule = list(plan.schedule())
+
+        assert [video for video, _ in schedule] == plan.order.tolist()
+        for video, frame_idx in schedule:
+            assert list(plan.plan(video)) == frame_idx.tolist()
+
+    def test_negative_seed_raises_error(self):
+        with pytest.raises(ValueError):
+            epoch_rng(-1, 0)
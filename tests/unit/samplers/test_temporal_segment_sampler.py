@@ -11,6 +11,52 @@ from unit.samplers.assertions import (
 
 
 class TestTemporalSegmentSampler:
+    @given(
+        st.lists(st.integers(1, 300), min_size=1, max_size=20),
+        st.integers(1, 10),
+        st.integers(1, 10),
+    )
+    def test_sample_batch_matches_sample_in_test_mode(
+        self, video_lengths, segment_count, snippet_length
+    ):
+        sampler = TemporalSegmentSampler(segment_count, snippet_length, test=True)
+
+        batch = sampler.sample_batch(np.array(video_lengths))
+
+        for i, video_length in enumerate(video_lengths):
+            assert batch.frame_idx(i).tolist() == frame_idx_to_list(
+                sampler.sample(video_length)
+            )
+
+    @given(
+        st.lists(st.integers(1, 300), min_size=1, max_size=20),
+        st.integers(1, 10),
+        st.integers(1, 10),
+    )
+    def test_sample_batch_in_train_mode_samples_valid_snippets(
+        self, video_lengths, segment_count, snippet_length
+    ):
+        sampler = TemporalSegmentSampler(segment_count, snippet_length, test=False)
+
+        frame_idx = sampler.sample_batch(np.array(video_lengths)).as_array()
+
+        assert frame_idx.shape == (len(video_lengths), segment_count * snippet_length)
+        for sample_idx, video_length in zip(frame_idx, video_lengths):
+            assert sample_idx.min() >= 0
+            assert sample_idx.max() < video_length
+            snippets = sample_idx.reshape(segment_count, snippet_length)
+            if video_length > snippet_length:
+                assert np.all(np.diff(snippets, axis=1) == 1)
+                assert np.all(np.diff(snippets[:, 0]) >= 0)
+
+    def test_sample_batch_oversamples_segments_without_replacement(self):
+        sampler = TemporalSegmentSampler(4, 2, test=False)
+
+        frame_idx = sampler.sample_batch(np.full(100, 6)).as_array()
+
+        snippet_starts = frame_idx[:, ::2]
+        assert np.all(np.diff(snippet_starts, axis=1) > 0)
+
     def test_raises_value_error_when_sampling_from_a_video_of_0_frames(self):
         sampler = TemporalSegmentSampler(1, 1)
         with pytest.raises(ValueError):
@@ -0,0 +1,65 @@
+import io
+from pathlib import Path
+
+import pytest
+
+from torchvideo.internal.buffers import open_video_buffer, _buffer_pool
+
+
+@pytest.fixture()
+def video_path(tmpdir):
+    path = tmpdir.join("video.mp4")
+    path.write_binary(b"\x00\x01 video data")
+    return Path(str(path))
+
+
+class TestOpenVideoBuffer:
+    @pytest.mark.parametrize("buffer", ["read", "mmap", "pooled"])
+    def test_buffer_holds_file_contents(self, video_path, buffer):
+        with open_video_buffer(video_path, buffer=buffer) as data:
+            assert bytes(data) == b"\x00\x01 video data"
+
+    @pytest.mark.parametrize("buffer", ["read", "mmap", "pooled"])
+    def test_empty_file(self, tmpdir, buffer):
+        path = tmpdir.join("empty.mp4")
+        path.write_binary(b"")
+
+        with open_video_buffer(Path(str(path)), buffer=buffer) as data:
+            assert bytes(data) == b""
+
+    def test_file_objects_are_read(self):
+        with open_video_buffer(io.BytesIO(b"video data")) as data:
+            assert data == b"video data"
+
+    def test_pooled_buffer_is_reused_for_smaller_files(self, video_path, tmpdir):
+        small_path = tmpdir.join("small.mp4")
+        small_path.write_binary(b"small")
+        with open_video_buffer(video_path, buffer="pooled"):
+            pass
+        pool_buffer = _buffer_pool.buffer
+
+        with open_video_buffer(Path(str(small_path)), buffer="pooled") as data:
+            assert bytes(data) == b"small"
+
+        assert _buffer_pool.buffer is pool_buffer
+
+    def test_pooled_buffer_grows_for_larger_files(self, video_path, tmpdir):
+        large_path = tmpdir.join("large.mp4")
+        large_path.write_binary(b"x" * 4096)
+
+        with open_video_buffer(Path(str(large_path)), buffer="pooled") as data:
+            assert len(data) == 4096
+
+        assert len(_buffer_pool.buffer) >= 4096
+
+    def test_pooled_buffer_is_released_on_exit(self, video_path):
+        with open_video_buffer(video_path, buffer="pooled") as data:
+            pass
+
+        with pytest.raises(ValueError):
+            bytes(data)
+
+    def test_unknown_buffer_raises_error(self, video_path):
+        with pytest.raises(ValueError):
+            with open_video_buffer(video_path, buffer="unknown"):
+                pass
@@ -0,0 +1,229 @@
+import math
+import struct
+
+import pytest
+
+from torchvideo.internal.container_probe import ContainerProbeError, probe_container
+
+
+def box(box_type, *children):
+    payload = b"".join(children)
+    return struct.pack(">I4s", 8 + len(payload), box_type) + payload
+
+
+def mp4_track(handler, width=0, height=0, n_frames=0, timescale=12800, delta=512):
+    hdlr = box(b"hdlr", bytes(8), handler, bytes(13))
+    mdhd = box(
+        b"mdhd",
+        struct.pack(">IIIII", 0, 0, 0, timescale, n_frames * delta),
+        bytes(4),
+    )
+    sample_entry = (
+        struct.pack(">I4s", 86, b"avc1")
+        + bytes(6 + 2 + 16)
+        + struct.pack(">HH", width, height)
+        + bytes(50)
+    )
+    stsd = box(b"stsd", struct.pack(">II", 0, 1), sample_entry)
+    stts = box(b"stts", struct.pack(">IIII", 0, 1, n_frames, delta))
+    stsz = box(b"stsz", struct.pack(">III", 0, 1000, n_frames))
+    tkhd = box(b"tkhd", struct.pack(">IIIII", 0, 0, 0, 1, 0), bytes(64))
+    stbl = box(b"stbl", stsd, stts, stsz)
+    return box(b"trak", tkhd, box(b"mdia", mdhd, hdlr, box(b"minf", stbl)))
+
+
+def ebml_element(element_id, *children):
+    payload = b"".join(children)
+    id_bytes = element_id.to_bytes((element_id.bit_length() + 7) // 8, "big")
+    # 8 byte size vint
+    return id_bytes + b"\x01" + len(payload).to_bytes(7, "big") + payload
+
+
+def ebml_uint(element_id, value):
+    return ebml_element(element_id, value.to_bytes(8, "big"))
+
+
+def simple_block(track_number, lace_count=None):
+    flags = 0 if lace_count is None else 0x02
+    header = bytes([0x80 | track_number]) + bytes(2) + bytes([flags])
+    if lace_count is not None:
+        header += bytes([lace_count - 1])
+    return ebml_element(0xA3, header, bytes(20))
+
+
+def matroska_file(clusters, tags=b"", default_duration=40000000):
+    video_track = ebml_element(
+        0xAE,
+        ebml_uint(0xD7, 1),
+        ebml_uint(0x73C5, 1234),
+        ebml_uint(0x83, 1),
+        ebml_uint(0x23E383, default_duration) if default_duration else b"",
+        ebml_element(0xE0, ebml_uint(0xB0, 320), ebml_uint(0xBA, 240)),
+    )
+    audio_track = ebml_element(
+        0xAE, ebml_uint(0xD7, 2), ebml_uint(0x73C5, 5678), ebml_uint(0x83, 2)
+    )
+    info = ebml_element(
+        0x1549A966,
+        ebml_uint(0x2AD7B1, 1000000),
+        ebml_element(0x4489, struct.pack(">d", 2000.0)),
+    )
+    tracks = ebml_element(0x1654AE6B, video_track, audio_track)
+    seek_head = b""
+    if tags:
+        # Tags are written after the clusters, so are located through the seek head
+        def make_seek_head(tags_position):
+            return ebml_element(
+                0x114D9B74,
+                ebml_element(
+                    0x4DBB,
+                    ebml_element(0x53AB, (0x1254C367).to_bytes(4, "big")),
+                    ebml_uint(0x53AC, tags_position),
+                ),
+            )
+
+        seek_head = make_seek_head(0)
+        seek_head = make_seek_head(
+            len(seek_head) + len(info) + len(tracks) + len(clusters)
+        )
+    segment = ebml_element(0x18538067, seek_head, info, tracks, clusters, tags)
+    ebml_header = ebml_element(0x1A45DFA3, ebml_element(0x4282, b"matroska"))
+    return ebml_header + segment
+
+
+def frame_count_tags(track_uid, n_frames):
+    return ebml_element(
+        0x1254C367,
+        ebml_element(
+            0x7373,
+            ebml_element(0x63C0, ebml_uint(0x63C5, track_uid)),
+            ebml_element(
+                0x67C8,
+                ebml_element(0x45A3, b"NUMBER_OF_FRAMES"),
+                ebml_element(0x4487, str(n_frames).encode()),
+            ),
+        ),
+    )
+
+
+class TestProbeMP4:
+    def test_probing_video_track(self, tmp_path):
+        path = tmp_path / "video.mp4"
+        path.write_bytes(
+            box(b"ftyp", b"isom", bytes(4))
+            + box(b"mdat", bytes(100))
+            + box(
+                b"moov",
+                mp4_track(b"soun", n_frames=80),
+                mp4_track(b"vide", width=640, height=360, n_frames=50),
+            )
+        )
+
+        info = probe_container(path)
+
+        assert info.width == 640
+        assert info.height == 360
+        assert info.n_frames == 50
+        assert info.fps == pytest.approx(25)
+
+    def test_fragmented_file_counts_samples_in_fragments(self, tmp_path):
+        def fragment(n_samples):
+            return box(
+                b"moof",
+                box(
+                    b"traf",
+                    box(b"tfhd", struct.pack(">II", 0, 1)),
+                    box(b"trun", struct.pack(">II", 0, n_samples)),
+                ),
+            )
+
+        path = tmp_path / "video.mp4"
+        path.write_bytes(
+            box(b"ftyp", b"isom", bytes(4))
+            + box(b"moov", mp4_track(b"vide", width=64, height=48, n_frames=0))
+            + fragment(10)
+            + box(b"mdat", bytes(10))
+            + fragment(7)
+            + box(b"mdat", bytes(10))
+        )
+
+        info = probe_container(path)
+
+        assert info.n_frames == 17
+        assert math.isnan(info.fps)
+
+    def test_file_without_video_track_raises_error(self, tmp_path):
+        path = tmp_path / "audio.mp4"
+        path.write_bytes(box(b"ftyp", bytes(8)) + box(b"moov", mp4_track(b"soun")))
+
+        with pytest.raises(ContainerProbeError):
+            probe_container(path)
+
+    def test_truncated_file_raises_error(self, tmp_path):
+        data = box(b"ftyp", bytes(8)) + box(
+            b"moov", mp4_track(b"vide", width=64, height=48, n_frames=10)
+        )
+        path = tmp_path / "video.mp4"
+        path.write_bytes(data[:-20])
+
+        with pytest.raises(ContainerProbeError):
+            probe_container(path)
+
+
+class TestProbeMatroska:
+    def test_counting_blocks(self, tmp_path):
+        cluster = ebml_element(
+            0x1F43B675,
+            ebml_uint(0xE7, 0),
+            simple_block(1),
+            simple_block(2),
+            simple_block(1),
+            ebml_element(0xA0, ebml_element(0xA1, bytes([0x81, 0, 0, 0]), bytes(5))),
+        )
+        path = tmp_path / "video.mkv"
+        path.write_bytes(matroska_file(cluster + cluster))
+
+        info = probe_container(path)
+
+        assert info.width == 320
+        assert info.height == 240
+        assert info.n_frames == 6
+        assert info.fps == pytest.approx(25)
+
+    def test_counting_laced_blocks(self, tmp_path):
+        cluster = ebml_element(0x1F43B675, simple_block(1, lace_count=3))
+        path = tmp_path / "video.mkv"
+        path.write_bytes(matroska_file(cluster))
+
+        assert probe_container(path).n_frames == 3
+
+    def test_clusters_of_unknown_size(self, tmp_path):
+        cluster_id = (0x1F43B675).to_bytes(4, "big")
+        cluster = cluster_id + b"\xff" + simple_block(1) + simple_block(1)
+        path = tmp_path / "video.webm"
+        path.write_bytes(matroska_file(cluster + cluster))
+
+        assert probe_container(path).n_frames == 4
+
+    def test_frame_count_is_read_from_tags(self, tmp_path):
+        cluster = ebml_element(0x1F43B675, simple_block(1))
+        path = tmp_path / "video.mkv"
+        path.write_bytes(matroska_file(cluster, tags=frame_count_tags(1234, 500)))
+
+        assert probe_container(path).n_frames == 500
+
+    def test_fps_from_duration_without_default_duration(self, tmp_path):
+        cluster = ebml_element(0x1F43B675, *[simple_block(1)] * 10)
+        path = tmp_path / "video.mkv"
+        path.write_bytes(matroska_file(cluster, default_duration=None))
+
+        # 10 frames over a duration of 2 seconds
+        assert probe_container(path).fps == pytest.approx(5)
+
+
+def test_unsupported_container_raises_error(tmp_path):
+    path = tmp_path / "video.avi"
+    path.write_bytes(b"RIFF" + bytes(100))
+
+    with pytest.raises(ContainerProbeError):
+        probe_container(path)
@@ -0,0 +1,130 @@
+import io
+import os
+import pickle
+import signal
+
+import numpy as np
+import pytest
+
+from torchvideo.internal.decoder_pool import (
+    DecoderCrashedError,
+    DecoderPool,
+    DecoderTimeoutError,
+)
+from torchvideo.internal.readers import default_loader, pyav_loader
+
+av = pytest.importorskip("av")
+
+
+@pytest.fixture(scope="module")
+def video_path(tmp_path_factory):
+    path = tmp_path_factory.mktemp("videos") / "video.mp4"
+    with av.open(str(path), "w") as container:
+        stream = container.add_stream("mpeg4", rate=25)
+        stream.width, stream.height = 64, 48
+        stream.pix_fmt = "yuv420p"
+        for i in range(10):
+            frame = np.full((48, 64, 3), i * 20, dtype=np.uint8)
+            for packet in stream.encode(av.VideoFrame.from_ndarray(frame)):
+                container.mux(packet)
+        for packet in stream.encode():
+            container.mux(packet)
+    return path
+
+
+@pytest.fixture()
+def pool():
+    pool = DecoderPool("pyav", max_processes=1)
+    yield pool
+    pool.close()
+
+
+class TestDecoderPool:
+    def test_frames_match_in_process_decoding(self, pool, video_path):
+        frames = pool.decode(video_path, [0, 3, 3, 7])
+
+        expected = pyav_loader(video_path, [0, 3, 3, 7], as_ndarray=True)
+        np.testing.assert_array_equal(frames, expected)
+        assert frames.flags.writeable
+
+    def test_decoder_process_is_reused(self, pool, video_path):
+        pool.decode(video_path, [0])
+        pid = pool._processes[0]._process.pid
+
+        pool.decode(video_path, slice(2, 5), size=24)
+
+        assert pool._processes[0]._process.pid == pid
+
+    def test_decoding_file_objects(self, pool, video_path):
+        with open(str(video_path), "rb") as f:
+            frames = pool.decode(io.BytesIO(f.read()), [1, 2])
+
+        assert frames.shape == (2, 48, 64, 3)
+
+    def test_decoder_errors_are_reraised(self, pool, tmp_path):
+        with pytest.raises(av.error.FileNotFoundError):
+            pool.decode(tmp_path / "missing.mp4", [0])
+
+        assert pool.n_processes == 1
+
+    def test_process_is_released_after_decoder_errors(self, pool, tmp_path):
+        for _ in range(2):
+            with pytest.raises(av.error.FileNotFoundError):
+                pool.decode(tmp_path / "missing.mp4", [0])
+
+        assert pool._idle == pool._processes
+
+    def test_crashed_decoder_is_replaced(self, pool, video_path):
+        pool.decode(video_path, [0])
+        process = pool._processes[0]._process
+        os.kill(process.pid, signal.SIGSEGV)
+
+        with pytest.raises(DecoderCrashedError):
+            pool.decode(video_path, [0])
+
+        assert pool.n_processes == 1
+        assert pool._processes[0]._process.pid != process.pid
+        assert pool.decode(video_path, [0]).shape == (1, 48, 64, 3)
+
+    def test_hung_decoder_is_killed_and_replaced(self, video_path):
+        pool = DecoderPool("pyav", max_processes=1, timeout=1)
+        pool.decode(video_path, [0])
+        process = pool._processes[0]._process
+        os.kill(process.pid, signal.SIGSTOP)
+
+        with pytest.raises(DecoderTimeoutError):
+            pool.decode(video_path, [0])
+
+        assert process.returncode == -signal.SIGKILL
+        assert pool.n_processes == 1
+        assert pool.decode(video_path, [0]).shape == (1, 48, 64, 3)
+        pool.close()
+
+    def test_invalid_timeout_raises_error(self):
+        with pytest.raises(ValueError):
+            DecoderPool("pyav", timeout=0)
+
+    def test_unpickled_pool_starts_its_own_processes(self, pool, video_path):
+        pool.decode(video_path, [0])
+
+        copy = pickle.loads(pickle.dumps(pool))
+
+        assert copy.n_processes == 0
+        assert copy.decode(video_path, [0]).shape == (1, 48, 64, 3)
+        copy.close()
+
+    def test_close_stops_processes(self, video_path):
+        pool = DecoderPool("pyav", max_processes=1)
+        pool.decode(video_path, [0])
+        process = pool._processes[0]._process
+
+        pool.close()
+
+        assert process.poll() is not None
+        assert pool.n_processes == 0
+
+
+def test_subprocess_backend(video_path):
+    frames = list(default_loader(video_path, [1, 4], backend="pyav-subprocess"))
+
+    assert [frame.size for frame in frames] == [(64, 48), (64, 48)]
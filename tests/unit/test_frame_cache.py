@@ -0,0 +1,230 @@
+import multiprocessing
+import os
+import pickle
+
+import numpy as np
+import pytest
+from hypothesis import given, settings, strategies as st
+
+from torchvideo.internal.frame_cache import FrameCache, SharedFrameCache
+
+
+class RecordingDecoder:
+    def __init__(self, frame_nbytes=12):
+        self.calls = []
+        self.frame_nbytes = frame_nbytes
+
+    def __call__(self, frame_numbers):
+        self.calls.append(list(frame_numbers))
+        return np.stack(
+            [
+                np.full(self.frame_nbytes, n, dtype=np.uint8).reshape(1, -1, 1)
+                for n in frame_numbers
+            ]
+        )
+
+
+class TestFrameCache:
+    def test_missing_frames_are_decoded(self):
+        cache = FrameCache(max_bytes=1000)
+        decode = RecordingDecoder()
+
+        frames = cache.get_frames("video", np.array([0, 2]), decode)
+
+        assert decode.calls == [[0, 2]]
+        assert frames[:, 0, 0, 0].tolist() == [0, 2]
+        assert cache.stats().misses == 2
+
+    def test_only_missing_frames_are_decoded(self):
+        cache = FrameCache(max_bytes=1000)
+        decode = RecordingDecoder()
+        cache.get_frames("video", np.array([1, 2]), decode)
+
+        frames = cache.get_frames("video", np.array([0, 1, 2, 3]), decode)
+
+        assert decode.calls == [[1, 2], [0, 3]]
+        assert frames[:, 0, 0, 0].tolist() == [0, 1, 2, 3]
+        stats = cache.stats()
+        assert (stats.hits, stats.misses) == (2, 4)
+        assert stats.hit_rate == pytest.approx(1 / 3)
+
+    def test_fully_cached_frames_are_not_decoded(self):
+        cache = FrameCache(max_bytes=1000)
+        decode = RecordingDecoder()
+        cache.get_frames("video", np.array([4, 5]), decode)
+
+        frames = cache.get_frames("video", np.array([4, 5]), decode)
+
+        assert len(decode.calls) == 1
+        assert frames[:, 0, 0, 0].tolist() == [4, 5]
+
+    def test_videos_are_cached_separately(self):
+        cache = FrameCache(max_bytes=1000)
+        decode = RecordingDecoder()
+        cache.get_frames("video1", np.array([0]), decode)
+
+        cache.get_frames("video2", np.array([0]), decode)
+
+        assert decode.calls == [[0], [0]]
+
+    def test_least_recently_used_frames_are_evicted(self):
+        cache = FrameCache(max_bytes=3 * 12)
+        decode = RecordingDecoder()
+        cache.get_frames("video", np.array([0, 1, 2]), decode)
+        cache.get_frames("video", np.array([0]), decode)
+
+        cache.get_frames("video", np.array([3]), decode)
+        cache.get_frames("video", np.array([0, 2, 3]), decode)
+
+        assert decode.calls == [[0, 1, 2], [3]]
+        stats = cache.stats()
+        assert stats.evictions == 1
+        assert stats.frames == 3
+        assert stats.nbytes == cache.nbytes == 3 * 12
+
+    def test_frames_larger_than_budget_are_not_cached(self):
+        cache = FrameCache(max_bytes=10)
+        decode = RecordingDecoder(frame_nbytes=12)
+
+        cache.get_frames("video", np.array([0]), decode)
+
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    def test_cached_frames_are_not_views_of_returned_frames(self):
+        cache = FrameCache(max_bytes=1000)
+        frames = cache.get_frames("video", np.array([0]), RecordingDecoder())
+        frames[:] = 255
+
+        cached = cache.get_frames("video", np.array([0]), RecordingDecoder())
+
+        assert cached.max() == 0
+
+    def test_reset_stats_and_clear(self):
+        cache = FrameCache(max_bytes=1000)
+        cache.get_frames("video", np.array([0]), RecordingDecoder())
+
+        cache.reset_stats()
+        cache.clear()
+
+        assert cache.stats() == (0, 0, 0, 0, 0)
+
+    def test_negative_budget_raises_error(self):
+        with pytest.raises(ValueError):
+            FrameCache(max_bytes=-1)
+
+
+def fail_to_decode(frame_numbers):
+    raise AssertionError("Frames {} should be cached".format(frame_numbers))
+
+
+def cache_frames(cache, video_key, frame_numbers):
+    cache.get_frames(video_key, np.array(frame_numbers), RecordingDecoder())
+
+
+class TestSharedFrameCache:
+    def test_missing_frames_are_decoded_and_cached(self, tmp_path):
+        cache = SharedFrameCache(1000, 12, dir=str(tmp_path))
+        decode = RecordingDecoder()
+        cache.get_frames("video", np.array([0, 2]), decode)
+
+        frames = cache.get_frames("video", np.array([0, 1, 2]), decode)
+
+        assert decode.calls == [[0, 2], [1]]
+        assert frames.shape == (3, 1, 12, 1)
+        assert frames[:, 0, 0, 0].tolist() == [0, 1, 2]
+        assert cache.stats() == (2, 3, 0, 3, 36)
+
+    def test_least_recently_used_frames_are_evicted(self, tmp_path):
+        cache = SharedFrameCache(3 * 12, 12, dir=str(tmp_path))
+        decode = RecordingDecoder()
+        cache.get_frames("video", np.array([0, 1, 2]), decode)
+        cache.get_frames("video", np.array([0]), decode)
+
+        cache.get_frames("video", np.array([3]), decode)
+        cache.get_frames("video", np.array([0, 2, 3]), decode)
+
+        assert decode.calls == [[0, 1, 2], [3]]
+        assert cache.stats().evictions == 1
+        assert len(cache) == 3
+
+    def test_frequently_hit_frames_survive_eviction(self, tmp_path):
+        cache = SharedFrameCache(4 * 12, 12, dir=str(tmp_path))
+        decode = RecordingDecoder()
+
+        for frame_number in range(1, 20):
+            cache.get_frames("video", np.array([0, frame_number]), decode)
+
+        assert decode.calls[0] == [0, 1]
+        assert all(call[0] != 0 for call in decode.calls[1:])
+
+    @settings(deadline=None, max_examples=50)
+    @given(st.lists(st.lists(st.integers(0, 30), unique=True, min_size=1, max_size=4)))
+    def test_cached_frames_are_found_after_evictions(self, batches):
+        cache = SharedFrameCache(5 * 12, 12)
+
+        for frame_numbers in batches:
+            frames = cache.get_frames(
+                "video", np.array(frame_numbers, dtype=int), RecordingDecoder()
+            )
+            assert frames[:, 0, 0, 0].tolist() == frame_numbers
+
+        cached = [slot for slot in range(cache.n_slots) if cache._keys[slot] != 0]
+        assert len(cache) == len(cached)
+        assert np.count_nonzero(cache._index) == len(cached)
+        for slot in cached:
+            assert cache._find(int(cache._keys[slot])) == slot
+
+    def test_frames_larger_than_slots_are_not_cached(self, tmp_path):
+        cache = SharedFrameCache(100, 10, dir=str(tmp_path))
+
+        cache.get_frames("video", np.array([0]), RecordingDecoder(frame_nbytes=12))
+
+        assert len(cache) == 0
+
+    def test_clear(self, tmp_path):
+        cache = SharedFrameCache(100, 12, dir=str(tmp_path))
+        cache.get_frames("video", np.array([0]), RecordingDecoder())
+
+        cache.clear()
+
+        assert len(cache) == 0
+        assert cache.nbytes == 0
+
+    def test_budget_smaller_than_a_slot_raises_error(self, tmp_path):
+        with pytest.raises(ValueError):
+            SharedFrameCache(10, 12, dir=str(tmp_path))
+
+    def test_unpickled_cache_shares_frames(self, tmp_path):
+        cache = SharedFrameCache(1000, 12, dir=str(tmp_path))
+        cache.get_frames("video", np.array([5]), RecordingDecoder())
+
+        unpickled = pickle.loads(pickle.dumps(cache))
+        frames = unpickled.get_frames("video", np.array([5]), fail_to_decode)
+
+        assert frames[0, 0, 0, 0] == 5
+        assert cache.stats().hits == 1
+
+    @pytest.mark.parametrize("start_method", ["fork", "spawn"])
+    def test_frames_cached_by_worker_are_shared(self, tmp_path, start_method):
+        if start_method not in multiprocessing.get_all_start_methods():
+            pytest.skip("{} is unsupported".format(start_method))
+        cache = SharedFrameCache(1000, 12, dir=str(tmp_path))
+        context = multiprocessing.get_context(start_method)
+        worker = context.Process(target=cache_frames, args=(cache, "video", [1, 7]))
+
+        worker.start()
+        worker.join()
+
+        assert worker.exitcode == 0
+        frames = cache.get_frames("video", np.array([1, 7]), fail_to_decode)
+        assert frames[:, 0, 0, 0].tolist() == [1, 7]
+        assert cache.stats().misses == 2
+
+    def test_backing_file_is_removed_with_cache(self, tmp_path):
+        cache = SharedFrameCache(100, 12, dir=str(tmp_path))
+        path = cache.path
+
+        del cache
+
+        assert not os.path.exists(path)
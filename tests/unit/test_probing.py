@@ -0,0 +1,78 @@
+from pathlib import Path
+
+import pytest
+
+from torchvideo.internal.probing import FrameCountError, count_frames
+
+
+def _name_length(path: Path) -> int:
+    return len(path.name)
+
+
+def _fail_on_bad_videos(path: Path) -> int:
+    if path.name.startswith("bad"):
+        raise ValueError("Corrupt video")
+    return 10
+
+
+class TestCountFrames:
+    video_paths = [Path("/videos/{}.mp4".format("v" * i)) for i in range(1, 20)]
+
+    @pytest.mark.parametrize(
+        "workers,use_processes", [(0, False), (1, False), (4, False), (2, True)]
+    )
+    def test_counts_are_in_video_order(self, workers, use_processes):
+        counts = count_frames(
+            self.video_paths,
+            _name_length,
+            workers=workers,
+            use_processes=use_processes,
+        )
+
+        assert counts == [_name_length(path) for path in self.video_paths]
+
+    @pytest.mark.parametrize("workers", [0, 4])
+    def test_all_failures_are_reported_together(self, workers):
+        video_paths = [Path("bad0.mp4"), Path("good.mp4"), Path("bad1.mp4")]
+
+        with pytest.raises(FrameCountError) as excinfo:
+            count_frames(video_paths, _fail_on_bad_videos, workers=workers)
+
+        assert set(excinfo.value.failures.keys()) == {
+            Path("bad0.mp4"),
+            Path("bad1.mp4"),
+        }
+        assert "bad0.mp4" in str(excinfo.value)
+
+    def test_progress_is_reported_on_completion(self):
+        reports = []
+
+        count_frames(
+            self.video_paths,
+            _name_length,
+            progress=lambda done, total: reports.append((done, total)),
+        )
+
+        assert reports[-1] == (len(self.video_paths), len(self.video_paths))
+
+    def test_progress_is_reported_during_counting(self):
+        reports = []
+
+        count_frames(
+            self.video_paths,
+            _name_length,
+            progress=lambda done, total: reports.append((done, total)),
+            progress_interval=0,
+        )
+
+        assert [done for done, _ in reports[:-1]] == list(
+            range(1, len(self.video_paths) + 1)
+        )
+
+    def test_many_failures_are_summarised_in_message(self):
+        video_paths = [Path("bad{}.mp4".format(i)) for i in range(30)]
+
+        with pytest.raises(FrameCountError) as excinfo:
+            count_frames(video_paths, _fail_on_bad_videos)
+
+        assert "and 10 more" in str(excinfo.value)
@@ -1,11 +1,29 @@
 import io
+from pathlib import Path
 
 import numpy as np
 from unittest.mock import Mock
 import lintel
 import pytest
+from PIL import Image
 
-from torchvideo.internal.readers import lintel_loader
+import torchvideo
+import torchvideo.internal.readers
+from torchvideo.samplers import IndexPlan, MultiClip
+from torchvideo.internal.readers import (
+    lintel_loader,
+    default_loader,
+    register_video_backend,
+    get_video_backend_info,
+    _VIDEO_BACKENDS,
+    _decode_pyav_frames,
+    _reconstruct_frames,
+    _scaled_size,
+    _rgb_to_luma,
+    _ffprobe_videofile,
+    FrameCache,
+    VideoInfo,
+)
 
 
 @pytest.fixture()
@@ -52,6 +70,75 @@ class TestLintelReaderUnit:
             loadvid_frame_nums_mock, f, frame_nums, frames, [1, 3]
         )
 
+    @pytest.mark.parametrize("buffer", ["read", "mmap", "pooled"])
+    def test_loading_from_path(self, loadvid_frame_nums_mock, tmpdir, buffer):
+        path = tmpdir.join("video.mp4")
+        path.write_binary(b"video data")
+        received = []
+
+        def side_effect(binary_data, frame_nums, *args, **kwargs):
+            received.append(bytes(binary_data))
+            return b"\x00" * (2 * 2 * 3 * len(frame_nums)), 2, 2
+
+        loadvid_frame_nums_mock.side_effect = side_effect
+
+        frames = list(lintel_loader(str(path), [0, 1], buffer=buffer))
+
+        assert len(frames) == 2
+        assert received == [b"video data"]
+
+    @pytest.mark.parametrize(
+        "buffer,buffer_type", [(None, bytes), ("pooled", memoryview), ("read", bytes)]
+    )
+    def test_buffer_is_passed_to_lintel_without_copying(
+        self, loadvid_frame_nums_mock, tmpdir, buffer, buffer_type
+    ):
+        path = tmpdir.join("video.mp4")
+        path.write_binary(b"video data")
+        received = []
+
+        def side_effect(binary_data, frame_nums, *args, **kwargs):
+            received.append(type(binary_data))
+            return b"\x00" * (2 * 2 * 3 * len(frame_nums)), 2, 2
+
+        loadvid_frame_nums_mock.side_effect = side_effect
+        kwargs = {} if buffer is None else {"buffer": buffer}
+
+        list(lintel_loader(str(path), [0, 1], **kwargs))
+
+        assert received == [buffer_type]
+
+    def test_exact_size_is_passed_to_lintel(self, loadvid_frame_nums_mock):
+        def side_effect(binary_data, frame_nums, *args, width, height, **kwargs):
+            return b"\x00" * (width * height * 3 * len(frame_nums))
+
+        loadvid_frame_nums_mock.side_effect = side_effect
+
+        frames = lintel_loader(io.BytesIO(b""), [0, 1], as_ndarray=True, size=(4, 6))
+
+        assert frames.shape == (2, 4, 6, 3)
+        _, kwargs = loadvid_frame_nums_mock.call_args
+        assert (kwargs["height"], kwargs["width"]) == (4, 6)
+
+    def test_frames_are_resized_when_source_size_is_unknown(
+        self, loadvid_frame_nums_mock
+    ):
+        def side_effect(binary_data, frame_nums, *args, **kwargs):
+            return b"\x00" * (8 * 16 * 3 * len(frame_nums)), 16, 8
+
+        loadvid_frame_nums_mock.side_effect = side_effect
+
+        frames = lintel_loader(io.BytesIO(b""), [0], as_ndarray=True, size=4)
+
+        assert frames.shape == (1, 4, 8, 3)
+        _, kwargs = loadvid_frame_nums_mock.call_args
+        assert "width" not in kwargs
+
+    def test_loading_grayscale_frames(self, loadvid_frame_nums_mock):
+        frames = lintel_loader(io.BytesIO(b""), [0, 1], as_ndarray=True, grayscale=True)
+
+        assert frames.shape == (2, 5, 5, 1)
+
     def assert_loadvid_correctly_called(
         self, loadvid_frame_nums_mock, f, frame_nums, frames, expected_load_idx
     ):
@@ -64,3 +151,336 @@ class TestLintelReaderUnit:
         # Seeking behaviour in lintel is broken and causes C assertion errors at
         # runtime. Until this is fixed we have to disable it :(
         assert not kwargs["should_seek"]
+
+
+@pytest.fixture()
+def mock_backend(monkeypatch):
+    loader = Mock(return_value=iter([]))
+    with monkeypatch.context() as ctx:
+        ctx.setattr(torchvideo, "_video_backend", torchvideo.get_video_backend())
+        ctx.setitem(_VIDEO_BACKENDS, "mock", None)
+        register_video_backend("mock", loader, capabilities=["seek"])
+        yield loader
+
+
+class TestVideoBackendRegistry:
+    def test_lintel_is_the_default_backend(self):
+        assert torchvideo.get_video_backend() == "lintel"
+
+    def test_builtin_backends_are_registered(self):
+        assert {"lintel", "pyav"} <= set(_VIDEO_BACKENDS.keys())
+
+    def test_setting_unknown_backend_raises_error(self):
+        with pytest.raises(ValueError):
+            torchvideo.set_video_backend("not-a-backend")
+
+    def test_default_loader_uses_global_backend(self, mock_backend):
+        torchvideo.set_video_backend("mock")
+
+        default_loader("video.mp4", [0, 1])
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1])
+
+    def test_default_loader_backend_argument_overrides_global_backend(
+        self, mock_backend
+    ):
+        default_loader("video.mp4", [0, 1], backend="mock")
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1])
+
+    def test_backend_capabilities(self, mock_backend):
+        assert get_video_backend_info("mock").capabilities == frozenset({"seek"})
+
+    def test_backend_without_module_is_available(self, mock_backend):
+        assert "mock" in torchvideo.list_video_backends()
+
+    def test_ndarray_frames_are_stacked_for_backends_without_ndarray_support(
+        self, mock_backend
+    ):
+        frames = [Image.new("RGB", (6, 4), color=(i, 0, 0)) for i in range(3)]
+        mock_backend.return_value = iter(frames)
+
+        array = default_loader("video.mp4", [0, 1, 2], backend="mock", as_ndarray=True)
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1, 2])
+        assert array.shape == (3, 4, 6, 3)
+        assert array[:, 0, 0, 0].tolist() == [0, 1, 2]
+
+    def test_ndarray_backends_are_asked_for_ndarrays(self, mock_backend):
+        register_video_backend("mock", mock_backend, capabilities=["ndarray"])
+
+        default_loader("video.mp4", [0, 1], backend="mock", as_ndarray=True)
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1], as_ndarray=True)
+
+    def test_resize_backends_are_asked_to_resize(self, mock_backend):
+        register_video_backend("mock", mock_backend, capabilities=["resize"])
+
+        default_loader("video.mp4", [0, 1], backend="mock", size=(4, 6))
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1], size=(4, 6))
+
+    def test_frames_are_resized_for_backends_without_resize_support(self, mock_backend):
+        frames = [Image.new("RGB", (40, 20)) for _ in range(2)]
+        mock_backend.return_value = iter(frames)
+
+        array = default_loader(
+            "video.mp4", [0, 1], backend="mock", as_ndarray=True, size=10
+        )
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1])
+        assert array.shape == (2, 10, 20, 3)
+
+    def test_cached_frames_are_not_decoded_again(self, mock_backend):
+        register_video_backend("mock", mock_backend, capabilities=["ndarray"])
+        mock_backend.side_effect = lambda file, frames_idx, **kwargs: np.stack(
+            [np.full((2, 2, 3), i, dtype=np.uint8) for i in frames_idx]
+        )
+        cache = FrameCache(max_bytes=10 ** 6)
+
+        default_loader("video.mp4", [2, 1], backend="mock", cache=cache)
+        frames = default_loader(
+            "video.mp4", [1, 3, 3], backend="mock", as_ndarray=True, cache=cache
+        )
+
+        assert frames[:, 0, 0, 0].tolist() == [1, 3, 3]
+        assert [call[0][1] for call in mock_backend.call_args_list] == [[1, 2], [3]]
+        assert cache.stats().hits == 1
+
+    def test_frames_are_converted_to_grayscale_for_backends_without_support(
+        self, mock_backend
+    ):
+        frames = [Image.new("RGB", (6, 4), color=(255, 0, 0)) for _ in range(2)]
+        mock_backend.return_value = iter(frames)
+
+        array = default_loader(
+            "video.mp4", [0, 1], backend="mock", as_ndarray=True, grayscale=True
+        )
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1])
+        assert array.shape == (2, 4, 6, 1)
+        assert array[0, 0, 0, 0] == 76
+
+    def test_grayscale_backends_are_asked_for_grayscale_frames(self, mock_backend):
+        register_video_backend("mock", mock_backend, capabilities=["grayscale"])
+
+        default_loader("video.mp4", [0, 1], backend="mock", grayscale=True)
+
+        mock_backend.assert_called_once_with("video.mp4", [0, 1], grayscale=True)
+
+    def test_fast_decode_is_only_requested_from_backends_supporting_it(
+        self, mock_backend
+    ):
+        default_loader("video.mp4", [0, 1], backend="mock", fast_decode=True)
+        register_video_backend("mock", mock_backend, capabilities=["fast_decode"])
+        default_loader("video.mp4", [0, 1], backend="mock", fast_decode=True)
+
+        assert [call[1] for call in mock_backend.call_args_list] == [
+            {},
+            {"fast_decode": True},
+        ]
+
+    def test_index_plans_are_only_passed_to_backends_supporting_them(
+        self, mock_backend
+    ):
+        plan = IndexPlan.from_frame_idx([2, 0, 2])
+
+        default_loader("video.mp4", plan, backend="mock")
+        register_video_backend("mock", mock_backend, capabilities=["index_plan"])
+        default_loader("video.mp4", plan, backend="mock")
+
+        assert [call[0][1] for call in mock_backend.call_args_list] == [
+            [2, 0, 2],
+            plan,
+        ]
+
+
+class TestMultiClipLoading:
+    @pytest.fixture()
+    def ndarray_backend(self, mock_backend):
+        register_video_backend("mock", mock_backend, capabilities=["ndarray"])
+        mock_backend.side_effect = lambda file, frames_idx, **kwargs: np.stack(
+            [np.full((2, 2, 3), i, dtype=np.uint8) for i in frames_idx]
+        )
+        return mock_backend
+
+    def test_frames_of_all_clips_are_decoded_once(self, ndarray_backend):
+        clips = MultiClip([slice(0, 3), slice(2, 5)])
+
+        frames = default_loader("video.mp4", clips, backend="mock", as_ndarray=True)
+
+        assert frames.shape == (2, 3, 2, 2, 3)
+        assert frames[..., 0, 0, 0].tolist() == [[0, 1, 2], [2, 3, 4]]
+        ndarray_backend.assert_called_once()
+        assert ndarray_backend.call_args[0][1] == [0, 1, 2, 3, 4]
+
+    def test_clips_of_different_lengths(self, ndarray_backend):
+        clips = MultiClip([[4], slice(0, 2)])
+
+        frames = default_loader("video.mp4", clips, backend="mock", as_ndarray=True)
+
+        assert [clip[:, 0, 0, 0].tolist() for clip in frames] == [[4], [0, 1]]
+
+    def test_clips_of_pil_images(self, ndarray_backend):
+        clips = MultiClip([slice(0, 2), slice(1, 3)])
+
+        frames = default_loader("video.mp4", clips, backend="mock")
+
+        assert len(frames) == 2
+        assert [np.asarray(frame)[0, 0, 0] for frame in frames[1]] == [1, 2]
+
+
+def test_rgb_to_luma_matches_pil():
+    frame = np.random.RandomState(0).randint(0, 256, (10, 12, 3)).astype(np.uint8)
+
+    luma = _rgb_to_luma(frame[np.newaxis])
+
+    assert luma.shape == (1, 10, 12, 1)
+    np.testing.assert_array_equal(
+        luma[0, ..., 0], np.asarray(Image.fromarray(frame).convert("L"))
+    )
+
+
+class TestScaledSize:
+    @pytest.mark.parametrize(
+        "height,width,size,expected",
+        [
+            (240, 320, 120, (120, 160)),
+            (320, 240, 120, (160, 120)),
+            (100, 200, 120, (100, 200)),
+            (240, 320, (10, 20), (10, 20)),
+            (100, 199, 50, (50, 100)),
+        ],
+    )
+    def test_scaled_size(self, height, width, size, expected):
+        assert _scaled_size(height, width, size) == expected
+
+
+class TestReconstructFrames:
+    frames = np.arange(4).reshape(4, 1, 1, 1)
+
+    def test_sorted_unique_frames_are_not_copied(self):
+        array = _reconstruct_frames(self.frames, np.arange(4), as_ndarray=True)
+
+        assert array is self.frames
+
+    def test_frames_are_reordered(self):
+        array = _reconstruct_frames(self.frames, np.array([3, 0, 0]), as_ndarray=True)
+
+        assert array.ravel().tolist() == [3, 0, 0]
+
+    def test_frames_are_converted_to_pil(self):
+        frames = np.zeros((2, 4, 6, 3), dtype=np.uint8)
+
+        images = list(_reconstruct_frames(frames, np.array([1, 0]), as_ndarray=False))
+
+        assert [image.size for image in images] == [(6, 4), (6, 4)]
+
+
+class FakeAVFrame:
+    def __init__(self, frame_number):
+        self.frame_number = frame_number
+
+    height = 2
+    width = 4
+
+    interpolation = None
+
+    def to_ndarray(self, format, width=None, height=None, interpolation=None):
+        self.interpolation = interpolation
+        shape = (height or self.height, width or self.width)
+        if format == "rgb24":
+            shape += (3,)
+        return np.full(shape, self.frame_number, dtype=np.uint8)
+
+
+class TestPyAVDecoding:
+    def test_only_requested_frames_are_returned(self):
+        frames = _decode_pyav_frames(
+            enumerate(map(FakeAVFrame, range(10))), np.array([1, 4, 5])
+        )
+
+        np.testing.assert_array_equal(frames[:, 0, 0, 0], [1, 4, 5])
+
+    def test_decoding_stops_after_last_requested_frame(self):
+        decoded = []
+
+        def frames():
+            for i in range(10):
+                decoded.append(i)
+                yield i, FakeAVFrame(i)
+
+        _decode_pyav_frames(frames(), np.array([0, 2]))
+
+        assert max(decoded) <= 3
+
+    def test_frames_beyond_end_of_video_repeat_last_frame(self):
+        frames = _decode_pyav_frames(
+            enumerate(map(FakeAVFrame, range(3))), np.array([2, 3])
+        )
+
+        np.testing.assert_array_equal(frames[:, 0, 0, 0], [2, 2])
+
+    def test_decoding_after_seeking_starts_from_frame_number_of_keyframe(self):
+        numbered_frames = ((i, FakeAVFrame(i)) for i in range(48, 60))
+
+        frames = _decode_pyav_frames(numbered_frames, np.array([50, 59]))
+
+        np.testing.assert_array_equal(frames[:, 0, 0, 0], [50, 59])
+
+    def test_grayscale_frames_have_a_single_channel(self):
+        frames = _decode_pyav_frames(
+            enumerate(map(FakeAVFrame, range(3))), np.array([0, 2]), grayscale=True
+        )
+
+        assert frames.shape == (2, 2, 4, 1)
+        assert list(_reconstruct_frames(frames, np.arange(2), False))[0].mode == "L"
+
+    def test_frames_are_scaled_whilst_converting(self):
+        frames = _decode_pyav_frames(
+            enumerate(map(FakeAVFrame, range(3))), np.array([0, 5]), size=1
+        )
+
+        assert frames.shape == (2, 1, 2, 3)
+
+    def test_fast_decoding_converts_frames_with_fast_filter(self):
+        av_frames = [FakeAVFrame(i) for i in range(3)]
+
+        _decode_pyav_frames(enumerate(av_frames), np.array([1]), fast_decode=True)
+
+        assert av_frames[1].interpolation == "FAST_BILINEAR"
+
+
+class TestFFProbeVideofile:
+    @pytest.fixture()
+    def ffprobe_calls(self, monkeypatch):
+        calls = []
+        outputs = []
+
+        def run(command, **kwargs):
+            calls.append(command)
+            return Mock(stdout=outputs.pop(0).encode("utf-8"))
+
+        monkeypatch.setattr(torchvideo.internal.readers.subprocess, "run", run)
+        return calls, outputs
+
+    def test_frame_count_from_header_doesnt_count_packets(self, ffprobe_calls):
+        calls, outputs = ffprobe_calls
+        outputs.append("width=320\nheight=240\nnb_frames=100\navg_frame_rate=25/1\n")
+
+        info = _ffprobe_videofile(Path("video.mp4"))
+
+        assert info == VideoInfo(height=240, width=320, n_frames=100, fps=25.0)
+        assert len(calls) == 1
+        assert "-count_packets" not in calls[0]
+
+    def test_packets_are_counted_when_header_lacks_frame_count(self, ffprobe_calls):
+        calls, outputs = ffprobe_calls
+        outputs.append("width=320\nheight=240\nnb_frames=N/A\navg_frame_rate=25/1\n")
+        outputs.append("nb_read_packets=90\n")
+
+        info = _ffprobe_videofile(Path("video.webm"))
+
+        assert info.n_frames == 90
+        assert len(calls) == 2
+        assert "-count_packets" in calls[1]
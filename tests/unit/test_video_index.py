@@ -0,0 +1,112 @@
+from collections import namedtuple
+
+import numpy as np
+import pytest
+
+from torchvideo.internal.video_index import (
+    VideoIndex,
+    build_video_index,
+    save_video_index,
+    load_video_index,
+    video_index_path,
+)
+
+FakePacket = namedtuple("FakePacket", ("pts", "is_keyframe", "size", "pos"))
+
+
+class FakeContainer:
+    def __init__(self, packets):
+        self.packets = packets
+
+    def demux(self, stream):
+        return iter(self.packets)
+
+
+class TestVideoIndex:
+    index = VideoIndex(
+        frame_pts=np.arange(100) * 512,
+        keyframes=np.array([0, 24, 48]),
+        keyframe_offsets=np.array([48, 1024, 2048]),
+    )
+
+    @pytest.mark.parametrize(
+        "frame_number,expected_keyframe",
+        [(0, 0), (1, 0), (23, 0), (24, 24), (25, 24), (47, 24), (48, 48), (99, 48)],
+    )
+    def test_keyframe_before(self, frame_number, expected_keyframe):
+        assert self.index.keyframe_before(frame_number) == expected_keyframe
+
+    def test_keyframe_before_first_keyframe_is_start_of_video(self):
+        index = VideoIndex(
+            frame_pts=np.arange(10),
+            keyframes=np.array([2]),
+            keyframe_offsets=np.array([100]),
+        )
+
+        assert index.keyframe_before(1) == 0
+
+
+class TestBuildVideoIndex:
+    def test_frames_are_numbered_in_presentation_order(self):
+        # Decode order of an IBBP GOP: I0 P3 B1 B2 I4
+        packets = [
+            FakePacket(0, True, 10, 48),
+            FakePacket(3, False, 10, 58),
+            FakePacket(1, False, 10, 68),
+            FakePacket(2, False, 10, 78),
+            FakePacket(4, True, 10, 88),
+        ]
+
+        index = build_video_index(FakeContainer(packets), None)
+
+        np.testing.assert_array_equal(index.frame_pts, [0, 1, 2, 3, 4])
+        np.testing.assert_array_equal(index.keyframes, [0, 4])
+        np.testing.assert_array_equal(index.keyframe_offsets, [48, 88])
+
+    def test_flush_packets_are_ignored(self):
+        packets = [FakePacket(0, True, 10, 48), FakePacket(None, False, 0, None)]
+
+        index = build_video_index(FakeContainer(packets), None)
+
+        np.testing.assert_array_equal(index.frame_pts, [0])
+
+    def test_packets_without_timestamps_cant_be_indexed(self):
+        packets = [FakePacket(0, True, 10, 48), FakePacket(None, False, 10, 58)]
+
+        assert build_video_index(FakeContainer(packets), None) is None
+
+
+class TestVideoIndexSidecar:
+    index = VideoIndex(
+        frame_pts=np.arange(50) * 512,
+        keyframes=np.array([0, 25]),
+        keyframe_offsets=np.array([48, 4096]),
+    )
+
+    @pytest.fixture()
+    def video_path(self, tmpdir):
+        path = tmpdir.join("video.mp4")
+        path.write_binary(b"not really a video")
+        return str(path)
+
+    def test_sidecar_is_stored_next_to_video(self, video_path):
+        assert str(video_index_path(video_path)) == video_path + ".index.npz"
+
+    def test_saved_index_can_be_loaded(self, video_path):
+        save_video_index(self.index, video_path)
+
+        index = load_video_index(video_path)
+
+        for expected_field, field in zip(self.index, index):
+            np.testing.assert_array_equal(expected_field, field)
+
+    def test_missing_sidecar_loads_as_none(self, video_path):
+        assert load_video_index(video_path) is None
+
+    def test_sidecar_is_ignored_when_video_changes(self, video_path):
+        save_video_index(self.index, video_path)
+
+        with open(video_path, "ab") as f:
+            f.write(b"more data")
+
+        assert load_video_index(video_path) is None
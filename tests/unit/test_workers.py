@@ -0,0 +1,107 @@
+import os
+
+import pytest
+import torch
+from torch.utils.data import DataLoader, Dataset
+
+import torchvideo
+from torchvideo.workers import WorkerBudget
+
+
+class WorkerSettingsDataset(Dataset):
+    def __len__(self):
+        return 2
+
+    def __getitem__(self, index):
+        return (
+            torch.get_num_threads(),
+            torchvideo.get_decoder_threads(),
+            sorted(os.sched_getaffinity(0)),
+        )
+
+
+@pytest.fixture(autouse=True)
+def restore_settings():
+    torch_threads = torch.get_num_threads()
+    decoder_threads = torchvideo.get_decoder_threads()
+    affinity = os.sched_getaffinity(0)
+    yield
+    torch.set_num_threads(torch_threads)
+    torchvideo.set_decoder_threads(decoder_threads)
+    os.sched_setaffinity(0, affinity)
+
+
+class TestWorkerBudget:
+    def test_threads_default_to_cpus(self):
+        budget = WorkerBudget(cpus=4)
+
+        assert budget.torch_threads == 4
+        assert budget.decoder_threads == 4
+
+    def test_threads_default_to_one_without_cpus(self):
+        budget = WorkerBudget()
+
+        assert budget.torch_threads == 1
+        assert budget.decoder_threads == 1
+
+    def test_workers_get_consecutive_blocks_of_cpus(self):
+        budget = WorkerBudget(cpus=2)
+        available_cpus = {0, 1, 2, 3, 8, 9}
+
+        assert [budget.worker_cpus(i, available_cpus) for i in range(4)] == [
+            {0, 1},
+            {2, 3},
+            {8, 9},
+            {0, 1},
+        ]
+
+    def test_budget_larger_than_machine_shares_all_cpus(self):
+        assert WorkerBudget(cpus=8).worker_cpus(3, {0, 1}) == {0, 1}
+
+    def test_divide(self):
+        budget = WorkerBudget.divide(2)
+
+        assert budget.cpus == max(1, len(os.sched_getaffinity(0)) // 2)
+
+    def test_invalid_cpus_raise_error(self):
+        with pytest.raises(ValueError):
+            WorkerBudget(cpus=0)
+
+    def test_applying_budget(self, monkeypatch):
+        pinned = []
+        monkeypatch.setattr(
+            os, "sched_setaffinity", lambda pid, cpus: pinned.append(cpus)
+        )
+        worker_ids = []
+
+        WorkerBudget(
+            cpus=1, torch_threads=2, decoder_threads=3, worker_init_fn=worker_ids.append
+        )(0)
+
+        assert torch.get_num_threads() == 2
+        assert torchvideo.get_decoder_threads() == 3
+        assert pinned == [{min(os.sched_getaffinity(0))}]
+        assert worker_ids == [0]
+
+    def test_budget_applied_to_dataloader_workers(self):
+        loader = DataLoader(
+            WorkerSettingsDataset(),
+            num_workers=2,
+            batch_size=None,
+            worker_init_fn=WorkerBudget(cpus=1, decoder_threads=2),
+        )
+
+        settings = list(loader)
+
+        available_cpus = sorted(os.sched_getaffinity(0))
+        assert [threads for threads, _, _ in settings] == [1, 1]
+        assert [threads for _, threads, _ in settings] == [2, 2]
+        assert [cpus for _, _, cpus in settings] == [
+            [available_cpus[0]],
+            [available_cpus[1 % len(available_cpus)]],
+        ]
+
+
+def test_negative_decoder_threads_raise_error():
+    with pytest.raises(ValueError):
+        torchvideo.set_decoder_threads(-1)
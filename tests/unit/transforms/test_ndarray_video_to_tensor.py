@@ -0,0 +1,64 @@
+from itertools import permutations
+
+import numpy as np
+import pytest
+import torch
+from hypothesis import given
+
+from torchvideo.transforms import NDArrayVideoToTensor, PILVideoToTensor
+from ..strategies import pil_video
+
+
+class TestNDArrayVideoToTensor:
+    def test_repr(self):
+        assert (
+            repr(NDArrayVideoToTensor())
+            == "NDArrayVideoToTensor(rescale=True, ordering='CTHW')"
+        )
+
+    @given(pil_video())
+    def test_matches_pil_video_to_tensor(self, video):
+        frames = np.stack([np.asarray(frame) for frame in video])
+
+        tensor = NDArrayVideoToTensor()(frames)
+
+        assert torch.allclose(tensor, PILVideoToTensor()(video))
+
+    def test_tchw_ordering(self):
+        frames = np.zeros((5, 10, 20, 3), dtype=np.uint8)
+
+        tensor = NDArrayVideoToTensor(ordering="TCHW")(frames)
+
+        assert tensor.shape == (5, 3, 10, 20)
+
+    def test_single_channel_video_without_channel_dimension(self):
+        frames = np.zeros((5, 10, 20), dtype=np.uint8)
+
+        tensor = NDArrayVideoToTensor()(frames)
+
+        assert tensor.shape == (1, 5, 10, 20)
+
+    def test_disabled_rescale(self):
+        frames = np.full((2, 10, 20, 3), 255, dtype=np.uint8)
+
+        tensor = NDArrayVideoToTensor(rescale=False)(frames)
+
+        assert tensor.max().item() == 255
+
+    def test_read_only_arrays_are_supported(self):
+        frames = np.frombuffer(bytes(2 * 4 * 6 * 3), dtype=np.uint8).reshape(2, 4, 6, 3)
+
+        tensor = NDArrayVideoToTensor()(frames)
+
+        assert tensor.shape == (3, 2, 4, 6)
+
+    def test_raises_exception_if_ordering_isnt_tchw_or_cthw(self):
+        invalid_orderings = [
+            "".join(order)
+            for order in permutations(list("TCHW"))
+            if "".join(order) not in ["TCHW", "CTHW"]
+        ]
+
+        for invalid_ordering in invalid_orderings:
+            with pytest.raises(ValueError):
+                NDArrayVideoToTensor(ordering=invalid_ordering)
@@ -47,6 +47,19 @@ class TestNormalizeVideo:
         with pytest.raises(ValueError):
             transform(torch.randn(3, 1, 1, 1))
 
+    def test_grayscale_video_is_normalised_with_luma_of_rgb_statistics(self):
+        transform = NormalizeVideo([0.2, 0.4, 0.6], [0.1, 0.2, 0.3])
+        video = torch.full((1, 2, 3, 4), 0.5)
+
+        normalised = transform(video)
+
+        luma_mean = 0.299 * 0.2 + 0.587 * 0.4 + 0.114 * 0.6
+        luma_std = 0.299 * 0.1 + 0.587 * 0.2 + 0.114 * 0.3
+        assert normalised.shape == video.shape
+        assert normalised[0, 0, 0, 0].item() == pytest.approx(
+            (0.5 - luma_mean) / luma_std
+        )
+
     def test_transform_inplace(self):
         transform = NormalizeVideo([10], [5], inplace=True)
         pre_transform_tensor = torch.randn(1, 2, 3, 4)